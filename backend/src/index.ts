@@ -3,11 +3,15 @@ import { cors } from 'hono/cors';
 import { logger } from 'hono/logger';
 import { secureHeaders } from 'hono/secure-headers';
 import { authMiddleware } from './middleware/auth';
+import { cacheMiddleware } from './middleware/cache';
+import { storageMiddleware } from './middleware/storage';
 import { llmProxyRoutes } from './routes/llm';
 import { authRoutes } from './routes/auth';
 import { storyRoutes } from './routes/stories';
 import { configRoutes } from './routes/config';
 import { fileRoutes } from './routes/files';
+import { metricsRoutes } from './routes/metrics';
+import { handleParseBatch, sweepStalledParses } from './services/parseQueue';
 import type { Env } from './types/env';
 
 const app = new Hono<{ Bindings: Env }>();
@@ -16,6 +20,8 @@ const app = new Hono<{ Bindings: Env }>();
 app.use('*', cors());
 app.use('*', logger());
 app.use('*', secureHeaders());
+app.use('/api/*', cacheMiddleware);
+app.use('/api/*', storageMiddleware);
 
 // 健康检查
 app.get('/health', (c) => {
@@ -44,4 +50,14 @@ app.route('/api/config', configRoutes);
 // 文件处理路由
 app.route('/api/files', fileRoutes);
 
-export default app;
\ No newline at end of file
+// 运行指标路由
+app.route('/api/metrics', metricsRoutes);
+
+// HTTP 入口、Cloudflare Queues 消费者（绑定 STORYWEAVER_QUEUE 时生效）与定时补投（配置 cron 触发器时生效）
+export default {
+  fetch: app.fetch,
+  queue: handleParseBatch,
+  scheduled: (_controller: ScheduledController, env: Env, ctx: ExecutionContext) => {
+    ctx.waitUntil(sweepStalledParses(env));
+  },
+};
\ No newline at end of file
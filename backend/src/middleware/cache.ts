@@ -0,0 +1,9 @@
+import { Context, Next } from 'hono';
+import { bindCache } from '../utils/cache';
+import type { Env } from '../types/env';
+
+// 将当前请求的 KV 绑定注册到服务层缓存
+export const cacheMiddleware = async (c: Context<{ Bindings: Env }>, next: Next) => {
+  bindCache(c.env.STORYWEAVER_KV);
+  await next();
+};
@@ -0,0 +1,9 @@
+import { Context, Next } from 'hono';
+import { bindStorage } from '../utils/storage';
+import type { Env } from '../types/env';
+
+// 按当前请求的环境变量选择对象存储实现
+export const storageMiddleware = async (c: Context<{ Bindings: Env }>, next: Next) => {
+  bindStorage(c.env);
+  await next();
+};
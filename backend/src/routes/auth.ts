@@ -1,14 +1,14 @@
 import { Hono } from 'hono';
 import { sign } from 'jsonwebtoken';
 import { hash, compare } from 'bcryptjs';
-import { createClient } from '@supabase/supabase-js';
+import { getSupabaseClient, DEFAULT_SUPABASE_URL } from '../utils/supabase';
 import type { Env } from '../types/env';
 
 export const authRoutes = new Hono<{ Bindings: Env }>();
 
-const getSupabaseClient = (env: Env) => {
-  return createClient(
-    env.SUPABASE_URL || 'https://dqmwpihbwggsjwmpktmo.supabase.co',
+const getEnvSupabaseClient = (env: Env) => {
+  return getSupabaseClient(
+    env.SUPABASE_URL || DEFAULT_SUPABASE_URL,
     env.SUPABASE_KEY || ''
   );
 };
@@ -28,7 +28,7 @@ authRoutes.post('/signup', async (c) => {
   }
 
   try {
-    const supabase = getSupabaseClient(c.env);
+    const supabase = getEnvSupabaseClient(c.env);
     console.log('Signup attempt for:', email);
     const { data: existingUser, error: checkError } = await supabase
       .from('users')
@@ -146,7 +146,7 @@ authRoutes.post('/login', async (c) => {
   }
 
   try {
-    const supabase = getSupabaseClient(c.env);
+    const supabase = getEnvSupabaseClient(c.env);
     console.log('Login attempt for:', email);
     const { data: user, error: userError } = await supabase
       .from('users')
@@ -1,17 +1,77 @@
 import { Hono } from 'hono';
+import type { Context } from 'hono';
 import { fileService } from '../services/files';
+import { parseQueue } from '../services/parseQueue';
+import { DOCUMENT_COLUMNS } from '../repositories/documents';
+import { parsePageQuery, streamPages } from '../utils/pagination';
+import { extractMultipartFile, getBoundary, type MultipartFile } from '../utils/multipart';
+import { FileTooLargeError, MAX_UPLOAD_BYTES } from '../utils/storage';
 import type { Env } from '../types/env';
+import type { PageOptions } from '../types/index';
 
 export const fileRoutes = new Hono<{ Bindings: Env }>();
 
-// 文件上传
+const fileTooLarge = (c: Context<{ Bindings: Env }>) => c.json({
+  success: false,
+  error: {
+    code: 'FILE_TOO_LARGE',
+    message: `File exceeds the ${MAX_UPLOAD_BYTES / 1024 / 1024}MB limit`,
+  },
+}, 413);
+
+// 投递解析任务；进程内队列需在响应返回后继续执行
+const enqueueParse = async (c: Context<{ Bindings: Env }>, documentId: string, userId: string) => {
+  const drained = await parseQueue.enqueue(c.env, { documentId, userId });
+  if (!drained) return;
+
+  try {
+    c.executionCtx.waitUntil(drained);
+  } catch {
+    // 非 Workers 运行时（如本地测试）没有 ExecutionContext，队列照常在后台执行
+  }
+};
+
+// 文件上传：请求体流式写入对象存储
+// 支持 multipart/form-data（file 字段）或原始二进制请求体（文件名取自 X-File-Name 头或 name 查询参数）
 fileRoutes.post('/upload', async (c) => {
   try {
     const user = c.get('user') as any;
-    const formData = await c.req.formData();
-    const file = formData.get('file') as any;
+    const contentType = c.req.header('Content-Type') || '';
+    const body = c.req.raw.body;
+
+    // 声明的长度已超限时无需读取请求体（multipart 额外预留 64KB 的分隔与头部开销）
+    const declaredLength = Number(c.req.header('Content-Length') || 0);
+    if (declaredLength > MAX_UPLOAD_BYTES + 64 * 1024) {
+      return fileTooLarge(c);
+    }
+
+    let upload: MultipartFile | null = null;
+    if (body && contentType.startsWith('multipart/form-data')) {
+      const boundary = getBoundary(contentType);
+      upload = boundary ? await extractMultipartFile(body, boundary) : null;
+    } else if (body) {
+      // 请求头只能携带 ASCII，文件名由客户端做 URL 编码；查询参数已由 Hono 解码，原样使用
+      const header = c.req.header('X-File-Name');
+      let fileName = c.req.query('name');
+      if (header) {
+        try {
+          fileName = decodeURIComponent(header);
+        } catch {
+          return c.json({
+            success: false,
+            error: {
+              code: 'INVALID_INPUT',
+              message: 'X-File-Name must be URL-encoded',
+            },
+          }, 400);
+        }
+      }
+      upload = fileName
+        ? { fileName, contentType: contentType || 'application/octet-stream', stream: body }
+        : null;
+    }
     
-    if (!file) {
+    if (!upload) {
       return c.json({
         success: false,
         error: {
@@ -21,18 +81,17 @@ fileRoutes.post('/upload', async (c) => {
       }, 400);
     }
 
-    const arrayBuffer = await file.arrayBuffer();
-    const fileData = Buffer.from(arrayBuffer);
-
-    const document = await fileService.uploadFile(
+    const { document, needsParse } = await fileService.uploadFile(
       user.userId as string,
-      fileData,
-      file.name,
-      file.type
+      upload.stream,
+      upload.fileName,
+      upload.contentType
     );
 
-    fileService.parseDocument(document.id, user.userId as string)
-      .catch(error => console.error('Failed to parse document:', error));
+    // 内容重复时复用来源的解析结果（或等待来源的解析任务），无需再次入队
+    if (needsParse) {
+      await enqueueParse(c, document.id, user.userId as string);
+    }
 
     return c.json({
       success: true,
@@ -40,6 +99,10 @@ fileRoutes.post('/upload', async (c) => {
       message: 'File uploaded successfully',
     }, 201);
   } catch (error: any) {
+    if (error instanceof FileTooLargeError) {
+      return fileTooLarge(c);
+    }
+
     console.error('Upload file error:', error);
     return c.json({
       success: false,
@@ -52,15 +115,43 @@ fileRoutes.post('/upload', async (c) => {
   }
 });
 
-// 获取用户所有文件
+// 获取用户文件列表（默认摘要模式，不含 parsed_content；format=ndjson 时流式输出全部页）
 fileRoutes.get('/', async (c) => {
+  const user = c.get('user') as any;
+
+  let options: PageOptions & { summary: boolean };
   try {
-    const user = c.get('user') as any;
-    const documents = await fileService.getAllDocuments(user.userId as string);
+    options = {
+      ...parsePageQuery(c, DOCUMENT_COLUMNS),
+      summary: c.req.query('summary') !== 'false',
+    };
+  } catch (error: any) {
+    return c.json({
+      success: false,
+      error: {
+        code: 'INVALID_INPUT',
+        message: error?.message,
+      },
+    }, 400);
+  }
+
+  if (c.req.query('format') === 'ndjson') {
+    return streamPages(c, (cursor) =>
+      fileService.getAllDocuments(user.userId as string, { ...options, cursor })
+    );
+  }
+
+  try {
+    const page = await fileService.getAllDocuments(user.userId as string, options);
 
     return c.json({
       success: true,
-      data: documents,
+      data: page.items,
+      pagination: {
+        limit: options.limit,
+        nextCursor: page.nextCursor,
+        hasMore: page.hasMore,
+      },
     });
   } catch (error: any) {
     console.error('Get files error:', error);
@@ -75,6 +166,92 @@ fileRoutes.get('/', async (c) => {
   }
 });
 
+// 重新投递解析任务
+fileRoutes.post('/:id/parse', async (c) => {
+  try {
+    const user = c.get('user') as any;
+    const id = c.req.param('id');
+    const status = await fileService.getParseStatus(id, user.userId as string);
+
+    if (!status) {
+      return c.json({
+        success: false,
+        error: {
+          code: 'NOT_FOUND',
+          message: 'Document not found',
+        },
+      }, 404);
+    }
+
+    // 长时间未更新的 parsing 状态视为任务已丢失，允许重新投递
+    const active = (status.status === 'parsing' && !parseQueue.isStale(c.env, status)) || parseQueue.isActive(id);
+    if (active) {
+      return c.json({
+        success: false,
+        error: {
+          code: 'CONFLICT',
+          message: 'Document is already queued or parsing',
+        },
+      }, 409);
+    }
+
+    await fileService.resetParseStatus(id, user.userId as string);
+    await enqueueParse(c, id, user.userId as string);
+
+    return c.json({
+      success: true,
+      message: 'Parse job queued',
+    }, 202);
+  } catch (error: any) {
+    console.error('Enqueue parse error:', error);
+    return c.json({
+      success: false,
+      error: {
+        code: 'SERVER_ERROR',
+        message: 'Failed to enqueue parse job',
+        details: error?.message,
+      },
+    }, 500);
+  }
+});
+
+// 查询解析状态（供前端轮询）
+fileRoutes.get('/:id/status', async (c) => {
+  try {
+    const user = c.get('user') as any;
+    const id = c.req.param('id');
+    const status = await fileService.getParseStatus(id, user.userId as string);
+
+    if (!status) {
+      return c.json({
+        success: false,
+        error: {
+          code: 'NOT_FOUND',
+          message: 'Document not found',
+        },
+      }, 404);
+    }
+
+    return c.json({
+      success: true,
+      data: {
+        ...status,
+        queuePosition: parseQueue.position(id),
+      },
+    });
+  } catch (error: any) {
+    console.error('Get parse status error:', error);
+    return c.json({
+      success: false,
+      error: {
+        code: 'SERVER_ERROR',
+        message: 'Failed to get parse status',
+        details: error?.message,
+      },
+    }, 500);
+  }
+});
+
 // 获取单个文件
 fileRoutes.get('/:id', async (c) => {
   try {
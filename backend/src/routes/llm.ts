@@ -3,6 +3,61 @@ import type { Env } from '../types/env';
 
 export const llmProxyRoutes = new Hono<{ Bindings: Env }>();
 
+const DEFAULT_OPENAI_BASE_URL = 'https://api.openai.com/v1';
+const DEFAULT_CLAUDE_BASE_URL = 'https://api.anthropic.com/v1';
+
+export interface LLMProxyStats {
+  bufferedRequests: number;
+  streamedRequests: number;
+  averageFirstChunkMs: number;
+  averageStreamDurationMs: number;
+}
+
+const stats = {
+  bufferedRequests: 0,
+  streamedRequests: 0,
+  firstChunkTotal: 0,
+  firstChunkSamples: 0,
+  streamDurationTotal: 0,
+  streamDurationSamples: 0,
+};
+
+export const getLLMProxyStats = (): LLMProxyStats => ({
+  bufferedRequests: stats.bufferedRequests,
+  streamedRequests: stats.streamedRequests,
+  averageFirstChunkMs: stats.firstChunkSamples > 0 ? stats.firstChunkTotal / stats.firstChunkSamples : 0,
+  averageStreamDurationMs: stats.streamDurationSamples > 0 ? stats.streamDurationTotal / stats.streamDurationSamples : 0,
+});
+
+// 流式请求直接透传上游 SSE 字节流，不在 Worker 中缓冲；同时记录首个数据块与整体耗时
+const relayStream = (response: Response, startTime: number): Response => {
+  stats.streamedRequests++;
+  let firstChunk = true;
+
+  const body = response.body!.pipeThrough(new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      if (firstChunk) {
+        firstChunk = false;
+        stats.firstChunkTotal += Date.now() - startTime;
+        stats.firstChunkSamples++;
+      }
+      controller.enqueue(chunk);
+    },
+    flush() {
+      stats.streamDurationTotal += Date.now() - startTime;
+      stats.streamDurationSamples++;
+    },
+  }));
+
+  return new Response(body, {
+    status: response.status,
+    headers: {
+      'Content-Type': response.headers.get('Content-Type') || 'text/event-stream',
+      'Cache-Control': 'no-cache',
+    },
+  });
+};
+
 // OpenAI API 代理
 llmProxyRoutes.post('/openai/*', async (c) => {
   const path = c.req.path.replace('/api/llm/openai/', '');
@@ -21,7 +76,8 @@ llmProxyRoutes.post('/openai/*', async (c) => {
   }
   
   try {
-    const response = await fetch(`https://api.openai.com/v1/${path}`, {
+    const startTime = Date.now();
+    const response = await fetch(`${c.env.OPENAI_BASE_URL || DEFAULT_OPENAI_BASE_URL}/${path}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -30,6 +86,11 @@ llmProxyRoutes.post('/openai/*', async (c) => {
       body: JSON.stringify(body),
     });
 
+    if (body.stream && response.ok && response.body) {
+      return relayStream(response, startTime);
+    }
+
+    stats.bufferedRequests++;
     const data = await response.json();
     
     c.status(response.status as any);
@@ -73,7 +134,8 @@ llmProxyRoutes.post('/claude/*', async (c) => {
   }
   
   try {
-    const response = await fetch(`https://api.anthropic.com/v1/${path}`, {
+    const startTime = Date.now();
+    const response = await fetch(`${c.env.CLAUDE_BASE_URL || DEFAULT_CLAUDE_BASE_URL}/${path}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -83,6 +145,11 @@ llmProxyRoutes.post('/claude/*', async (c) => {
       body: JSON.stringify(body),
     });
 
+    if (body.stream && response.ok && response.body) {
+      return relayStream(response, startTime);
+    }
+
+    stats.bufferedRequests++;
     const data = await response.json();
     
     c.status(response.status as any);
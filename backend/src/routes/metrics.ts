@@ -0,0 +1,24 @@
+import { Hono } from 'hono';
+import { getSupabaseClientStats } from '../utils/supabase';
+import { getCacheStats } from '../utils/cache';
+import { getLLMProxyStats } from './llm';
+import { parseQueue } from '../services/parseQueue';
+import { getUploadDedupStats } from '../services/files';
+import type { Env } from '../types/env';
+
+export const metricsRoutes = new Hono<{ Bindings: Env }>();
+
+// 获取当前 isolate 的运行指标
+metricsRoutes.get('/', (c) => {
+  return c.json({
+    success: true,
+    data: {
+      supabase: getSupabaseClientStats(),
+      cache: getCacheStats(),
+      llm: getLLMProxyStats(),
+      parseQueue: parseQueue.getStats(),
+      uploadDedup: getUploadDedupStats(),
+    },
+    timestamp: Date.now(),
+  });
+});
@@ -1,18 +1,126 @@
-import { Hono } from 'hono';
+import { Hono, type Context } from 'hono';
 import { storyService } from '../services/stories';
+import { STORY_COLUMNS } from '../repositories/stories';
+import { parsePageQuery, streamPages } from '../utils/pagination';
 import type { Env } from '../types/env';
+import type { BulkResult, PageOptions } from '../types/index';
 
 export const storyRoutes = new Hono<{ Bindings: Env }>();
 
-// 获取用户的所有故事
-storyRoutes.get('/', async (c) => {
+// 批量接口：每批一条 SQL 语句，批大小取 ?batchSize=，其次 STORY_BULK_BATCH_SIZE
+const DEFAULT_BULK_BATCH_SIZE = 200;
+const MAX_BULK_BATCH_SIZE = 1000;
+const DEFAULT_BULK_MAX_ITEMS = 1000;
+
+const positiveInt = (value: string | undefined, fallback: number): number => {
+  const parsed = Number.parseInt(value ?? '', 10);
+  return Number.isFinite(parsed) && parsed > 0 ? parsed : fallback;
+};
+
+// 读取请求体中的数组字段，校验条目数并确定批大小
+const parseBulkRequest = async (
+  c: Context<{ Bindings: Env }>,
+  field: 'stories' | 'ids'
+): Promise<{ items: unknown[]; batchSize: number } | { error: string }> => {
+  const body = await c.req.json().catch(() => null);
+  const items = body?.[field];
+  const maxItems = positiveInt(c.env?.STORY_BULK_MAX_ITEMS, DEFAULT_BULK_MAX_ITEMS);
+
+  if (!Array.isArray(items) || items.length === 0) {
+    return { error: `Request body must contain a non-empty ${field} array` };
+  }
+  if (items.length > maxItems) {
+    return { error: `At most ${maxItems} items per request` };
+  }
+
+  const batchSize = positiveInt(
+    c.req.query('batchSize'),
+    positiveInt(c.env?.STORY_BULK_BATCH_SIZE, DEFAULT_BULK_BATCH_SIZE)
+  );
+  return { items, batchSize: Math.min(batchSize, MAX_BULK_BATCH_SIZE) };
+};
+
+// 全部成功时返回 successStatus，部分或全部条目失败时返回 207 与逐条结果
+const bulkResponse = <T>(c: Context<{ Bindings: Env }>, result: BulkResult<T>, successStatus: 200 | 201) =>
+  c.json({
+    success: result.failed === 0,
+    data: result.results,
+    summary: {
+      total: result.results.length,
+      succeeded: result.succeeded,
+      failed: result.failed,
+      batches: result.batches,
+    },
+  }, result.failed === 0 ? successStatus : 207);
+
+const bulkRoute = (
+  field: 'stories' | 'ids',
+  successStatus: 200 | 201,
+  action: string,
+  run: (userId: string, items: unknown[], batchSize: number) => Promise<BulkResult<unknown>>
+) => async (c: Context<{ Bindings: Env }>) => {
+  const request = await parseBulkRequest(c, field);
+  if ('error' in request) {
+    return c.json({
+      success: false,
+      error: {
+        code: 'INVALID_INPUT',
+        message: request.error,
+      },
+    }, 400);
+  }
+
   try {
     const user = c.get('user') as any;
-    const stories = await storyService.getAllStories(user.userId as string);
+    const result = await run(user.userId as string, request.items, request.batchSize);
+    return bulkResponse(c, result, successStatus);
+  } catch (error: any) {
+    console.error(`Bulk ${action} stories error:`, error);
+    return c.json({
+      success: false,
+      error: {
+        code: 'SERVER_ERROR',
+        message: `Failed to ${action} stories`,
+        details: error?.message,
+      },
+    }, 500);
+  }
+};
+
+// 获取用户的故事列表（游标分页，format=ndjson 时流式输出全部页）
+storyRoutes.get('/', async (c) => {
+  const user = c.get('user') as any;
+
+  let options: PageOptions;
+  try {
+    options = parsePageQuery(c, STORY_COLUMNS);
+  } catch (error: any) {
+    return c.json({
+      success: false,
+      error: {
+        code: 'INVALID_INPUT',
+        message: error?.message,
+      },
+    }, 400);
+  }
+
+  if (c.req.query('format') === 'ndjson') {
+    return streamPages(c, (cursor) =>
+      storyService.getAllStories(user.userId as string, { ...options, cursor })
+    );
+  }
+
+  try {
+    const page = await storyService.getAllStories(user.userId as string, options);
 
     return c.json({
       success: true,
-      data: stories,
+      data: page.items,
+      pagination: {
+        limit: options.limit,
+        nextCursor: page.nextCursor,
+        hasMore: page.hasMore,
+      },
     });
   } catch (error: any) {
     console.error('Get stories error:', error);
@@ -27,6 +135,54 @@ storyRoutes.get('/', async (c) => {
   }
 });
 
+// 搜索故事（按相关度排序，limit/offset 分页）
+storyRoutes.get('/search', async (c) => {
+  try {
+    const user = c.get('user') as any;
+    const query = c.req.query('q') || '';
+    const limit = Math.min(Math.max(Number(c.req.query('limit')) || 20, 1), 100);
+    const offset = Math.max(Number(c.req.query('offset')) || 0, 0);
+
+    const result = await storyService.searchStories(user.userId as string, query, { limit, offset });
+
+    return c.json({
+      success: true,
+      data: result.items,
+      pagination: {
+        limit,
+        offset,
+        total: result.total,
+        hasMore: offset + result.items.length < result.total,
+      },
+    });
+  } catch (error: any) {
+    console.error('Search stories error:', error);
+    return c.json({
+      success: false,
+      error: {
+        code: 'SERVER_ERROR',
+        message: 'Failed to search stories',
+        details: error?.message,
+      },
+    }, 500);
+  }
+});
+
+// 批量创建故事：{ stories: [...] }
+storyRoutes.post('/bulk', bulkRoute('stories', 201, 'create', (userId, items, batchSize) =>
+  storyService.createStories(userId, items, batchSize)
+));
+
+// 批量更新故事：{ stories: [{ id, ...updates }] }
+storyRoutes.patch('/bulk', bulkRoute('stories', 200, 'update', (userId, items, batchSize) =>
+  storyService.updateStories(userId, items, batchSize)
+));
+
+// 批量删除故事：{ ids: [...] }（须在 /:id 之前注册）
+storyRoutes.delete('/bulk', bulkRoute('ids', 200, 'delete', (userId, items, batchSize) =>
+  storyService.deleteStories(userId, items, batchSize)
+));
+
 // 获取单个故事
 storyRoutes.get('/:id', async (c) => {
   try {
@@ -161,28 +317,3 @@ storyRoutes.delete('/:id', async (c) => {
     }, 500);
   }
 });
-
-// 搜索故事
-storyRoutes.get('/search', async (c) => {
-  try {
-    const user = c.get('user') as any;
-    const query = c.req.query('q') || '';
-
-    const stories = await storyService.searchStories(user.userId as string, query);
-
-    return c.json({
-      success: true,
-      data: stories,
-    });
-  } catch (error: any) {
-    console.error('Search stories error:', error);
-    return c.json({
-      success: false,
-      error: {
-        code: 'SERVER_ERROR',
-        message: 'Failed to search stories',
-        details: error?.message,
-      },
-    }, 500);
-  }
-});
\ No newline at end of file
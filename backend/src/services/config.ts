@@ -1,15 +1,18 @@
 import { configRepository } from '../repositories/config';
+import { cache, cacheKeys, CACHE_TTL } from '../utils/cache';
 import type { UserConfig, UpdateConfigInput } from '../types/index';
 
 export const configService = {
   async getUserConfig(userId: string): Promise<UserConfig> {
-    let config = await configRepository.findByUserId(userId);
-    
-    if (!config) {
-      config = await configRepository.create(userId);
-    }
-    
-    return config;
+    return cache.getOrLoad(cacheKeys.config(userId), CACHE_TTL.config, async () => {
+      let config = await configRepository.findByUserId(userId);
+
+      if (!config) {
+        config = await configRepository.create(userId);
+      }
+
+      return config;
+    });
   },
 
   async updateUserConfig(userId: string, updates: UpdateConfigInput): Promise<UserConfig | null> {
@@ -21,12 +24,15 @@ export const configService = {
       throw new Error('Max tokens must be between 1 and 4096');
     }
 
-    return configRepository.update(userId, updates);
+    const config = await configRepository.update(userId, updates);
+    await cache.invalidate(cacheKeys.config(userId));
+    return config;
   },
 
   async resetUserConfig(userId: string): Promise<UserConfig> {
     const defaultConfig = await configRepository.getDefaultConfig();
     const updated = await configRepository.update(userId, defaultConfig);
+    await cache.invalidate(cacheKeys.config(userId));
     
     if (!updated) {
       return configRepository.create(userId);
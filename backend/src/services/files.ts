@@ -1,67 +1,225 @@
 import { documentRepository } from '../repositories/documents';
-import type { Document } from '../types/index';
+import { storyRepository } from '../repositories/stories';
+import type { Document, DocumentParseStatus, Page, PageOptions } from '../types/index';
 import { fileParser } from '../utils/fileParser';
+import { cache, cacheKeys, CACHE_TTL } from '../utils/cache';
+import { isDefaultPage } from '../utils/pagination';
+import { FileTooLargeError, getStorage, hashStream, limitStream, MAX_UPLOAD_BYTES } from '../utils/storage';
+
+export interface UploadDedupStats {
+  uploads: number;
+  hits: number;
+  hitRate: number;
+  bytesUploaded: number;
+  bytesSaved: number;
+}
+
+const dedupStats = {
+  uploads: 0,
+  hits: 0,
+  bytesUploaded: 0,
+  bytesSaved: 0,
+};
+
+export const getUploadDedupStats = (): UploadDedupStats => ({
+  uploads: dedupStats.uploads,
+  hits: dedupStats.hits,
+  hitRate: dedupStats.uploads > 0 ? dedupStats.hits / dedupStats.uploads : 0,
+  bytesUploaded: dedupStats.bytesUploaded,
+  bytesSaved: dedupStats.bytesSaved,
+});
 
 export const fileService = {
+  // 请求体流式写入对象存储，传输中超过大小上限即中断，同时计算内容哈希
+  // 该用户已上传过相同内容时，复用已有的存储对象、解析结果与故事（新文档行指向来源文档）；
+  // needsParse 为 false 时无需投递解析任务（已复用结果，或等待来源的解析任务完成后一并更新）
   async uploadFile(
     userId: string, 
-    fileData: Buffer, 
+    body: ReadableStream<Uint8Array>, 
     fileName: string, 
     mimeType: string
-  ): Promise<Document> {
-    const fileSize = fileData.length;
-    
-    const storagePath = `documents/${userId}/${Date.now()}-${fileName}`;
-    
-    const document = await documentRepository.create({
-      userId,
-      fileName,
-      fileType: mimeType,
-      fileSize,
-      storagePath,
-      parsedContent: '',
-      status: 'uploaded',
-      parsedAt: null,
-    });
+  ): Promise<{ document: Document; needsParse: boolean }> {
+    const storage = getStorage();
+    const storagePath = `documents/${userId}/${Date.now()}-${fileName.replace(/[\\/]/g, '_')}`;
+    const limiter = limitStream(MAX_UPLOAD_BYTES);
+    const hasher = hashStream();
+
+    try {
+      await storage.put(storagePath, body.pipeThrough(limiter.stream).pipeThrough(hasher.stream), mimeType);
+    } catch (error) {
+      await storage.delete(storagePath).catch(() => {});
+      if (limiter.exceeded()) {
+        throw new FileTooLargeError(MAX_UPLOAD_BYTES);
+      }
+      throw error;
+    }
+
+    const fileSize = limiter.bytes();
+    const contentHash = hasher.digest();
+    const existing = await documentRepository.findByContentHash(userId, contentHash);
+
+    dedupStats.uploads++;
+    dedupStats.bytesUploaded += fileSize;
+
+    let document: Document;
+    if (existing) {
+      dedupStats.hits++;
+      dedupStats.bytesSaved += fileSize;
+      await storage.delete(storagePath)
+        .catch(error => console.error('Failed to delete duplicate upload:', error));
+
+      // 写时复制：已解析的内容与故事直接复制；来源仍在解析中时新文档保持 uploaded，
+      // 由来源的解析任务完成后一并更新（存储对象共享）。
+      // 未解析的重复文档本身不会被解析，只能挂到它所等待的原始文档上
+      const parsed = existing.status === 'parsed';
+      const sourceId = parsed ? existing.id : existing.sourceDocumentId ?? existing.id;
+      document = await documentRepository.create({
+        userId,
+        fileName,
+        fileType: mimeType,
+        fileSize,
+        storagePath: existing.storagePath,
+        parsedContent: parsed ? existing.parsedContent : '',
+        status: parsed ? 'parsed' : 'uploaded',
+        parsedAt: parsed ? existing.parsedAt : null,
+        contentHash,
+        sourceDocumentId: sourceId,
+      });
+
+      if (parsed) {
+        await this.copyStories(userId, sourceId, document.id);
+      } else {
+        // 来源在查询后、新文档写入前完成（或失败）时，不会再有任务更新新文档，这里补上
+        const source = await documentRepository.findDuplicateById(sourceId, userId);
+        if (source?.status === 'parsed') {
+          await this.settleDuplicates(sourceId, userId, {
+            parsedContent: source.parsedContent,
+            parsedAt: new Date(source.parsedAt ?? Date.now()).toISOString(),
+          });
+        } else if (source?.status === 'failed') {
+          const status = await documentRepository.findStatusById(sourceId, userId);
+          await this.settleDuplicates(sourceId, userId, { parseError: status?.parseError || 'Source document parse failed' });
+        }
+      }
+    } else {
+      document = await documentRepository.create({
+        userId,
+        fileName,
+        fileType: mimeType,
+        fileSize,
+        storagePath,
+        parsedContent: '',
+        status: 'uploaded',
+        parsedAt: null,
+        contentHash,
+      });
+    }
+
+    await cache.invalidate(cacheKeys.documents(userId));
+    return { document, needsParse: !existing };
+  },
+
+  // 复制来源文档已有的故事；此后两份文档的故事各自独立编辑
+  async copyStories(userId: string, sourceDocumentId: string, documentId: string): Promise<void> {
+    const copied = await storyRepository.copyToDocument(userId, sourceDocumentId, documentId);
+    if (copied > 0) await cache.invalidate(cacheKeys.stories(userId));
+  },
 
-    return document;
+  // 来源文档解析结束后，同步更新等待它的重复文档
+  async settleDuplicates(
+    sourceId: string,
+    userId: string,
+    result: { parsedContent: string; parsedAt: string } | { parseError: string }
+  ): Promise<void> {
+    const duplicates = await documentRepository.settleDuplicates(sourceId, userId, result);
+    if ('parsedContent' in result) {
+      for (const id of duplicates) await this.copyStories(userId, sourceId, id);
+    }
   },
 
-  async parseDocument(documentId: string, userId: string): Promise<Document> {
-    const document = await documentRepository.findById(documentId, userId);
+  async parseDocument(documentId: string, userId: string, attempt: number = 1): Promise<Document> {
+    const source = await documentRepository.findSourceById(documentId, userId);
     
-    if (!document) {
+    if (!source) {
       throw new Error('Document not found');
     }
 
-    const fileData = Buffer.from('test content');
-    
-    const parseResult = await fileParser.parseFile(fileData, document.fileName, document.fileType);
+    await documentRepository.updateStatus(documentId, userId, 'parsing', { parseAttempts: attempt });
+
+    const fileStream = await getStorage().get(source.storagePath);
+    const parseResult = await fileParser.parseStream(fileStream, source.fileName, source.fileType, source.fileSize);
     
     const updatedDocument = await documentRepository.updateParsedContent(
       documentId, 
       userId, 
       parseResult.content
     );
+    await this.settleDuplicates(documentId, userId, {
+      parsedContent: parseResult.content,
+      parsedAt: new Date().toISOString(),
+    });
 
+    await cache.invalidate(cacheKeys.documents(userId));
     return updatedDocument!;
   },
 
+  // 重试耗尽后标记解析失败
+  async markParseFailed(documentId: string, userId: string, error: unknown): Promise<void> {
+    const message = error instanceof Error ? error.message : String(error);
+    await documentRepository.updateStatus(documentId, userId, 'failed', { parseError: message });
+    await this.settleDuplicates(documentId, userId, { parseError: message });
+    await cache.invalidate(cacheKeys.documents(userId));
+  },
+
+  async resetParseStatus(documentId: string, userId: string): Promise<void> {
+    await documentRepository.updateStatus(documentId, userId, 'uploaded', { parseAttempts: 0, parseError: null });
+    await cache.invalidate(cacheKeys.documents(userId));
+  },
+
+  async findStalledParses(olderThan: Date, limit: number): Promise<Array<{ id: string; userId: string }>> {
+    return documentRepository.findStalledParses(olderThan, limit);
+  },
+
+  async getParseStatus(id: string, userId: string): Promise<DocumentParseStatus | null> {
+    return documentRepository.findStatusById(id, userId);
+  },
+
   async getDocumentById(id: string, userId: string): Promise<Document | null> {
     return documentRepository.findById(id, userId);
   },
 
-  async getAllDocuments(userId: string): Promise<Document[]> {
-    return documentRepository.findAllByUserId(userId);
+  async getAllDocuments(
+    userId: string,
+    options: PageOptions & { summary?: boolean }
+  ): Promise<Page<Document>> {
+    // 仅缓存默认首页的摘要列表
+    if (!isDefaultPage(options) || options.summary === false) {
+      return documentRepository.findPageByUserId(userId, options);
+    }
+
+    return cache.getOrLoad(
+      cacheKeys.documents(userId),
+      CACHE_TTL.documents,
+      () => documentRepository.findPageByUserId(userId, options)
+    );
   },
 
   async deleteDocument(id: string, userId: string): Promise<boolean> {
-    const document = await documentRepository.findById(id, userId);
+    const source = await documentRepository.findSourceById(id, userId);
     
-    if (!document) {
+    if (!source) {
       return false;
     }
 
-    return documentRepository.delete(id, userId);
+    const success = await documentRepository.delete(id, userId);
+
+    // 去重后多个文档共享同一存储对象，最后一个引用删除时才删除对象
+    if (await documentRepository.countByStoragePath(source.storagePath) === 0) {
+      await getStorage().delete(source.storagePath)
+        .catch(error => console.error('Failed to delete stored file:', error));
+    }
+
+    await cache.invalidate(cacheKeys.documents(userId));
+    return success;
   },
 };
\ No newline at end of file
@@ -0,0 +1,142 @@
+import { fileService } from './files';
+import { InProcessQueue, type JobQueueStats } from '../utils/jobQueue';
+import { bindCache } from '../utils/cache';
+import { bindStorage } from '../utils/storage';
+import type { DocumentParseStatus } from '../types/index';
+import type { Env } from '../types/env';
+
+// 文档解析任务队列
+// 绑定 STORYWEAVER_QUEUE 时投递到 Cloudflare Queues，由 queue() 消费者处理；
+// 未绑定时使用进程内队列，并通过 waitUntil 保证响应返回后 isolate 继续执行
+
+export interface ParseJob {
+  documentId: string;
+  userId: string;
+}
+
+export interface ParseQueueStats extends JobQueueStats {
+  backend: 'cloudflare' | 'in-process';
+  dispatched: number;
+}
+
+const DEFAULT_PARSE_CONCURRENCY = 2;
+const DEFAULT_PARSE_MAX_ATTEMPTS = 3;
+const PARSE_RETRY_DELAY_MS = 1000;
+// 超过该时长未更新的 uploaded / parsing 状态视为任务已丢失（isolate 重启或投递失败），可重新投递
+const DEFAULT_PARSE_STALE_MS = 10 * 60 * 1000;
+// 每次定时补投的文档数上限
+const STALE_SWEEP_LIMIT = 50;
+
+const localQueue = new InProcessQueue<ParseJob>(
+  async (job, attempt) => {
+    await fileService.parseDocument(job.documentId, job.userId, attempt);
+  },
+  {
+    concurrency: DEFAULT_PARSE_CONCURRENCY,
+    maxAttempts: DEFAULT_PARSE_MAX_ATTEMPTS,
+    retryDelayMs: PARSE_RETRY_DELAY_MS,
+  },
+  (job, error) => fileService.markParseFailed(job.documentId, job.userId, error)
+);
+
+let dispatched = 0;
+// 本 isolate 中 Cloudflare Queues 消费者正在解析的文档
+const consuming = new Set<string>();
+let usingCloudflareQueue = false;
+
+const positiveInt = (value: string | undefined, fallback: number): number => {
+  const parsed = Number.parseInt(value ?? '', 10);
+  return Number.isFinite(parsed) && parsed > 0 ? parsed : fallback;
+};
+
+const maxAttempts = (env: Env): number => positiveInt(env.PARSE_MAX_ATTEMPTS, DEFAULT_PARSE_MAX_ATTEMPTS);
+const staleMs = (env: Env): number => positiveInt(env.PARSE_STALE_MS, DEFAULT_PARSE_STALE_MS);
+
+export const parseQueue = {
+  // 投递解析任务；使用进程内队列时返回队列排空的 Promise，交给 waitUntil
+  async enqueue(env: Env, job: ParseJob): Promise<Promise<void> | null> {
+    dispatched++;
+
+    if (env.STORYWEAVER_QUEUE) {
+      usingCloudflareQueue = true;
+      await env.STORYWEAVER_QUEUE.send(job);
+      return null;
+    }
+
+    localQueue.configure({
+      concurrency: positiveInt(env.PARSE_CONCURRENCY, DEFAULT_PARSE_CONCURRENCY),
+      maxAttempts: maxAttempts(env),
+    });
+    localQueue.enqueue(job);
+    return localQueue.onIdle();
+  },
+
+  // 任务在进程内队列中的排队位置（从 0 开始），不在队列中时为 null
+  position(documentId: string): number | null {
+    const index = localQueue.position(job => job.documentId === documentId);
+    return index >= 0 ? index : null;
+  },
+
+  // 文档是否在本 isolate 中排队或正在解析（含 Cloudflare Queues 消费者）
+  isActive(documentId: string): boolean {
+    return consuming.has(documentId) || localQueue.has(job => job.documentId === documentId);
+  }
+
+  // 解析中的文档长时间未更新且不在本 isolate 中执行，说明执行它的 isolate 已退出
+  isStale(env: Env, status: DocumentParseStatus): boolean {
+    if (status.status !== 'parsing' || this.isActive(status.id)) return false;
+    return Date.now() - new Date(status.updatedAt).getTime() > staleMs(env);
+  },
+
+  getStats(): ParseQueueStats {
+    return {
+      ...localQueue.getStats(),
+      backend: usingCloudflareQueue ? 'cloudflare' : 'in-process',
+      dispatched,
+    };
+  },
+};
+
+// Cloudflare Queues 消费者：失败时退避重试，重试耗尽后标记为 failed
+export async function handleParseBatch(batch: MessageBatch<ParseJob>, env: Env): Promise<void> {
+  bindCache(env.STORYWEAVER_KV);
+  bindStorage(env);
+
+  for (const message of batch.messages) {
+    const job = message.body;
+    consuming.add(job.documentId);
+
+    try {
+      await fileService.parseDocument(job.documentId, job.userId, message.attempts);
+      message.ack();
+    } catch (error) {
+      if (message.attempts < maxAttempts(env)) {
+        message.retry({ delaySeconds: Math.ceil((PARSE_RETRY_DELAY_MS * 2 ** (message.attempts - 1)) / 1000) });
+      } else {
+        await fileService.markParseFailed(job.documentId, job.userId, error);
+        message.ack();
+      }
+    } finally {
+      consuming.delete(job.documentId);
+    }
+  }
+}
+
+// 定时补投：长时间停留在 uploaded / parsing 的文档重置后重新入队
+// 等待来源文档的重复文档不在其列（由来源的解析任务一并更新）
+export async function sweepStalledParses(env: Env): Promise<void> {
+  bindCache(env.STORYWEAVER_KV);
+  bindStorage(env);
+
+  const stalled = await fileService.findStalledParses(new Date(Date.now() - staleMs(env)), STALE_SWEEP_LIMIT);
+  const drains: Promise<void>[] = [];
+
+  for (const { id, userId } of stalled) {
+    if (parseQueue.isActive(id)) continue;
+    await fileService.resetParseStatus(id, userId);
+    const drained = await parseQueue.enqueue(env, { documentId: id, userId });
+    if (drained) drains.push(drained);
+  }
+
+  await Promise.all(drains);
+}
@@ -1,9 +1,116 @@
 import { storyRepository } from '../repositories/stories';
-import type { CreateStoryInput, Story } from '../types/index';
+import { cache, cacheKeys, CACHE_TTL } from '../utils/cache';
+import { isDefaultPage } from '../utils/pagination';
+import type {
+  BulkItemResult,
+  BulkResult,
+  CreateStoryInput,
+  Page,
+  PageOptions,
+  SearchResult,
+  Story,
+  StorySearchHit,
+  UpdateStoryItem,
+} from '../types/index';
+
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const STRING_FIELDS = ['title', 'description', 'role', 'action', 'value', 'module', 'priority', 'status'] as const;
+// stories 表没有 role 列，批量更新不接受该字段
+const UPDATE_FIELDS = ['documentId', ...STRING_FIELDS.filter(field => field !== 'role')] as const;
+
+interface Indexed<T> {
+  index: number;
+  item: T;
+}
+
+const failure = <T>(index: number, code: string, message: string): BulkItemResult<T> => ({
+  index,
+  success: false,
+  error: { code, message },
+});
+
+// 校验故事字段，返回错误信息；required 为 true 时要求 title 与 module 非空
+const validateStoryFields = (input: Record<string, unknown>, required: boolean): string | null => {
+  for (const field of STRING_FIELDS) {
+    if (input[field] !== undefined && typeof input[field] !== 'string') {
+      return `Field ${field} must be a string`;
+    }
+  }
+  if (required && (!input.title || !input.module)) {
+    return 'Missing required fields';
+  }
+  const documentId = input.documentId;
+  if (documentId !== undefined && documentId !== null && documentId !== ''
+    && (typeof documentId !== 'string' || !UUID_PATTERN.test(documentId))) {
+    return 'Invalid documentId';
+  }
+  return null;
+};
+
+const isObject = (value: unknown): value is Record<string, unknown> =>
+  typeof value === 'object' && value !== null && !Array.isArray(value);
+
+// 按批写入，每批一条语句；某批整体失败时（如个别条目违反外键约束）逐条重试以定位出错的条目
+// write 返回值与批内条目一一对应，null 表示条目对应的故事不存在
+const writeInBatches = async <I, T>(
+  items: Indexed<I>[],
+  batchSize: number,
+  write: (batch: I[]) => Promise<Array<T | null>>,
+  results: BulkItemResult<T>[]
+): Promise<number> => {
+  const settle = (entry: Indexed<I>, data: T | null) => {
+    results[entry.index] = data === null
+      ? failure(entry.index, 'NOT_FOUND', 'Story not found')
+      : { index: entry.index, success: true, data };
+  };
+
+  let batches = 0;
+  for (let start = 0; start < items.length; start += batchSize) {
+    const batch = items.slice(start, start + batchSize);
+    batches++;
+
+    try {
+      const written = await write(batch.map(entry => entry.item));
+      batch.forEach((entry, position) => settle(entry, written[position]));
+      continue;
+    } catch (error: any) {
+      if (batch.length === 1) {
+        results[batch[0].index] = failure(batch[0].index, 'SERVER_ERROR', error?.message || 'Write failed');
+        continue;
+      }
+      console.warn(`Bulk write batch failed, retrying ${batch.length} items individually:`, error?.message);
+    }
+
+    for (const entry of batch) {
+      batches++;
+      try {
+        const [data] = await write([entry.item]);
+        settle(entry, data);
+      } catch (error: any) {
+        results[entry.index] = failure(entry.index, 'SERVER_ERROR', error?.message || 'Write failed');
+      }
+    }
+  }
+  return batches;
+};
+
+const summarize = <T>(results: BulkItemResult<T>[], batches: number): BulkResult<T> => {
+  const succeeded = results.filter(result => result.success).length;
+  return { results, succeeded, failed: results.length - succeeded, batches };
+};
 
 export const storyService = {
-  async getAllStories(userId: string): Promise<Story[]> {
-    return storyRepository.findAllByUserId(userId);
+  async getAllStories(userId: string, options: PageOptions): Promise<Page<Story>> {
+    // 仅缓存默认首页（仪表盘刷新的主要请求）
+    if (!isDefaultPage(options)) {
+      return storyRepository.findPageByUserId(userId, options);
+    }
+
+    return cache.getOrLoad(
+      cacheKeys.stories(userId),
+      CACHE_TTL.stories,
+      () => storyRepository.findPageByUserId(userId, options)
+    );
   },
 
   async getStoryById(id: string, userId: string): Promise<Story | null> {
@@ -15,22 +122,105 @@ export const storyService = {
       throw new Error('Missing required fields');
     }
 
-    return storyRepository.create(input);
+    const story = await storyRepository.create(input);
+    await cache.invalidate(cacheKeys.stories(input.userId));
+    return story;
   },
 
   async updateStory(id: string, userId: string, updates: Partial<CreateStoryInput>): Promise<Story | null> {
-    return storyRepository.update(id, userId, updates);
+    const story = await storyRepository.update(id, userId, updates);
+    await cache.invalidate(cacheKeys.stories(userId));
+    return story;
+  },
+
+  // 批量创建：逐条校验，合法条目按 batchSize 分批写入
+  async createStories(userId: string, inputs: unknown[], batchSize: number): Promise<BulkResult<Story>> {
+    const results: BulkItemResult<Story>[] = new Array(inputs.length);
+    const valid: Indexed<CreateStoryInput>[] = [];
+
+    inputs.forEach((input, index) => {
+      const error = isObject(input) ? validateStoryFields(input, true) : 'Story must be an object';
+      if (error) {
+        results[index] = failure(index, 'INVALID_INPUT', error);
+      } else {
+        valid.push({ index, item: { ...(input as unknown as CreateStoryInput), userId } });
+      }
+    });
+
+    const batches = await writeInBatches(valid, batchSize, batch => storyRepository.createMany(batch), results);
+    if (results.some(result => result.success)) await cache.invalidate(cacheKeys.stories(userId));
+    return summarize(results, batches);
+  },
+
+  // 批量更新：每个条目须包含 id 与至少一个待更新字段
+  async updateStories(userId: string, items: unknown[], batchSize: number): Promise<BulkResult<Story>> {
+    const results: BulkItemResult<Story>[] = new Array(items.length);
+    const valid: Indexed<UpdateStoryItem>[] = [];
+
+    items.forEach((item, index) => {
+      let error: string | null;
+      if (!isObject(item)) {
+        error = 'Story must be an object';
+      } else if (typeof item.id !== 'string' || !UUID_PATTERN.test(item.id)) {
+        error = 'Invalid id';
+      } else if (item.role !== undefined) {
+        error = 'Field role is not updatable';
+      } else if (!UPDATE_FIELDS.some(field => item[field] !== undefined)) {
+        error = 'No fields to update';
+      } else {
+        error = validateStoryFields(item, false);
+      }
+
+      if (error) {
+        results[index] = failure(index, 'INVALID_INPUT', error);
+      } else {
+        valid.push({ index, item: item as unknown as UpdateStoryItem });
+      }
+    });
+
+    const batches = await writeInBatches(valid, batchSize, async batch => {
+      const updated = await storyRepository.updateMany(userId, batch);
+      return batch.map(item => updated.get(item.id) ?? null);
+    }, results);
+    if (results.some(result => result.success)) await cache.invalidate(cacheKeys.stories(userId));
+    return summarize(results, batches);
+  },
+
+  async deleteStories(userId: string, ids: unknown[], batchSize: number): Promise<BulkResult<{ id: string }>> {
+    const results: BulkItemResult<{ id: string }>[] = new Array(ids.length);
+    const valid: Indexed<string>[] = [];
+
+    ids.forEach((id, index) => {
+      if (typeof id !== 'string' || !UUID_PATTERN.test(id)) {
+        results[index] = failure(index, 'INVALID_INPUT', 'Invalid id');
+      } else {
+        valid.push({ index, item: id });
+      }
+    });
+
+    const batches = await writeInBatches(valid, batchSize, async batch => {
+      const deleted = await storyRepository.deleteMany(userId, batch);
+      return batch.map(id => (deleted.has(id) ? { id } : null));
+    }, results);
+    if (results.some(result => result.success)) await cache.invalidate(cacheKeys.stories(userId));
+    return summarize(results, batches);
   },
 
   async deleteStory(id: string, userId: string): Promise<boolean> {
-    return storyRepository.delete(id, userId);
+    const success = await storyRepository.delete(id, userId);
+    await cache.invalidate(cacheKeys.stories(userId));
+    return success;
   },
 
-  async searchStories(userId: string, query: string): Promise<Story[]> {
+  async searchStories(
+    userId: string,
+    query: string,
+    options: { limit: number; offset: number }
+  ): Promise<SearchResult<StorySearchHit>> {
     if (!query || query.trim().length < 2) {
-      return [];
+      return { items: [], total: 0 };
     }
 
-    return storyRepository.search(userId, query.trim());
+    return storyRepository.search(userId, query.trim(), options);
   },
-};
\ No newline at end of file
+};
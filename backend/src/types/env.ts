@@ -2,11 +2,22 @@ export interface Env {
   JWT_SECRET?: string;
   OPENAI_API_KEY?: string;
   CLAUDE_API_KEY?: string;
+  OPENAI_BASE_URL?: string;
+  CLAUDE_BASE_URL?: string;
   SUPABASE_URL?: string;
   SUPABASE_KEY?: string;
+  SUPABASE_SERVICE_KEY?: string;
   STORYWEAVER_KV?: KVNamespace;
   STORYWEAVER_R2?: R2Bucket;
   STORYWEAVER_QUEUE?: Queue;
+  PARSE_CONCURRENCY?: string;
+  PARSE_MAX_ATTEMPTS?: string;
+  PARSE_STALE_MS?: string;
+  STORY_BULK_BATCH_SIZE?: string;
+  STORY_BULK_MAX_ITEMS?: string;
+  STORAGE_DRIVER?: 'supabase' | 'local';
+  STORAGE_BUCKET?: string;
+  STORAGE_LOCAL_DIR?: string;
   NODE_ENV?: 'development' | 'production' | 'test';
   Variables: {
     user: {
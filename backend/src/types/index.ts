@@ -98,6 +98,48 @@ export interface CreateStoryInput {
   tags?: string[];
 }
 
+// 批量更新：id 之外的字段为待更新的值
+export type UpdateStoryItem = Partial<Omit<CreateStoryInput, 'userId'>> & { id: string };
+
+// 批量操作中单个条目的结果，index 为条目在请求数组中的位置
+export interface BulkItemResult<T> {
+  index: number;
+  success: boolean;
+  data?: T;
+  error?: {
+    code: string;
+    message: string;
+  };
+}
+
+export interface BulkResult<T> {
+  results: BulkItemResult<T>[];
+  succeeded: number;
+  failed: number;
+  batches: number;
+}
+
+export interface PageOptions {
+  limit: number;
+  cursor?: string | null;
+  fields?: string[];
+}
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+  hasMore: boolean;
+}
+
+export interface StorySearchHit extends Story {
+  score: number;
+}
+
+export interface SearchResult<T> {
+  items: T[];
+  total: number;
+}
+
 export interface UserConfig {
   id: string;
   userId: string;
@@ -161,7 +203,40 @@ export interface Document {
   storagePath: string;
   parsedContent: string;
   status: string;
+  parseAttempts?: number;
+  parseError?: string | null;
+  contentHash?: string | null;
+  sourceDocumentId?: string | null;
   parsedAt: Date | null;
   createdAt: Date;
   updatedAt: Date;
+}
+
+// 文档在对象存储中的位置
+export interface DocumentSource {
+  id: string;
+  fileName: string;
+  fileType: string;
+  fileSize: number;
+  storagePath: string;
+}
+
+// 内容哈希相同的已有文档（上传去重）
+export interface DocumentDuplicate {
+  id: string;
+  status: string;
+  storagePath: string;
+  parsedContent: string;
+  parsedAt: Date | null;
+  sourceDocumentId: string | null;
+}
+
+// 文档解析状态：uploaded → parsing → parsed / failed
+export interface DocumentParseStatus {
+  id: string;
+  status: string;
+  parseAttempts: number;
+  parseError: string | null;
+  parsedAt: Date | null;
+  updatedAt: Date;
 }
\ No newline at end of file
@@ -0,0 +1,113 @@
+// 基于 STORYWEAVER_KV 的读穿透缓存
+// 未绑定 KV（如本地开发）时直接回源，不影响功能
+
+export const CACHE_TTL = {
+  stories: 300,
+  documents: 300,
+  config: 3600,
+};
+
+// Cloudflare KV 要求 expirationTtl 不小于 60 秒
+const MIN_KV_TTL = 60;
+
+export const cacheKeys = {
+  stories: (userId: string) => `cache:stories:page:${userId}`,
+  documents: (userId: string) => `cache:documents:page:${userId}`,
+  config: (userId: string) => `cache:config:${userId}`,
+};
+
+export interface CacheStats {
+  enabled: boolean;
+  hits: number;
+  misses: number;
+  bypasses: number;
+  errors: number;
+  invalidations: number;
+  hitRate: number;
+  averageHitLatencyMs: number;
+  averageMissLatencyMs: number;
+}
+
+let kv: KVNamespace | undefined;
+
+const stats = {
+  hits: 0,
+  misses: 0,
+  bypasses: 0,
+  errors: 0,
+  invalidations: 0,
+  hitLatencyTotal: 0,
+  missLatencyTotal: 0,
+};
+
+export const bindCache = (namespace: KVNamespace | undefined) => {
+  kv = namespace;
+};
+
+export const cache = {
+  async getOrLoad<T>(key: string, ttlSeconds: number, loader: () => Promise<T>): Promise<T> {
+    if (!kv) {
+      stats.bypasses++;
+      return loader();
+    }
+
+    const startTime = Date.now();
+
+    try {
+      const cached = await kv.get<T>(key, 'json');
+      if (cached !== null) {
+        stats.hits++;
+        stats.hitLatencyTotal += Date.now() - startTime;
+        return cached;
+      }
+    } catch (error) {
+      stats.errors++;
+      console.error('Cache read error:', error);
+    }
+
+    const value = await loader();
+    stats.misses++;
+    stats.missLatencyTotal += Date.now() - startTime;
+
+    if (value !== null && value !== undefined) {
+      try {
+        await kv.put(key, JSON.stringify(value), {
+          expirationTtl: Math.max(ttlSeconds, MIN_KV_TTL),
+        });
+      } catch (error) {
+        stats.errors++;
+        console.error('Cache write error:', error);
+      }
+    }
+
+    return value;
+  },
+
+  async invalidate(...keys: string[]): Promise<void> {
+    if (!kv) return;
+
+    stats.invalidations += keys.length;
+    try {
+      await Promise.all(keys.map(key => kv!.delete(key)));
+    } catch (error) {
+      stats.errors++;
+      console.error('Cache invalidate error:', error);
+    }
+  },
+};
+
+export const getCacheStats = (): CacheStats => {
+  const lookups = stats.hits + stats.misses;
+
+  return {
+    enabled: !!kv,
+    hits: stats.hits,
+    misses: stats.misses,
+    bypasses: stats.bypasses,
+    errors: stats.errors,
+    invalidations: stats.invalidations,
+    hitRate: lookups > 0 ? stats.hits / lookups : 0,
+    averageHitLatencyMs: stats.hits > 0 ? stats.hitLatencyTotal / stats.hits : 0,
+    averageMissLatencyMs: stats.misses > 0 ? stats.missLatencyTotal / stats.misses : 0,
+  };
+};
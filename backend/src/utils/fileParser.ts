@@ -4,16 +4,151 @@ import { marked } from 'marked';
 
 export type FileType = 'docx' | 'pdf' | 'txt' | 'md' | 'unknown';
 
+export interface PageTiming {
+  page: number;
+  ms: number;
+  cached: boolean;
+}
+
 export interface ParseResult {
   content: string;
   metadata: {
     wordCount: number;
     charCount: number;
     pages?: number;
+    pageTimings?: PageTiming[];
   };
 }
 
+// PDF 页面并发提取数
+const PDF_PAGE_CONCURRENCY = 4;
+
+// 逐页文本缓存（isolate 内 LRU，按字符数限制总量）
+// 解析任务重试、重复上传同一文件时跳过已提取的页面
+const PAGE_CACHE_MAX_CHARS = 8 * 1024 * 1024;
+
+class PageTextCache {
+  private entries = new Map<string, string>();
+  private chars = 0;
+
+  get(key: string): string | undefined {
+    const value = this.entries.get(key);
+    if (value !== undefined) {
+      this.entries.delete(key);
+      this.entries.set(key, value);
+    }
+    return value;
+  }
+
+  set(key: string, value: string) {
+    const existing = this.entries.get(key);
+    if (existing !== undefined) {
+      this.chars -= existing.length;
+      this.entries.delete(key);
+    }
+
+    this.entries.set(key, value);
+    this.chars += value.length;
+
+    while (this.chars > PAGE_CACHE_MAX_CHARS && this.entries.size > 1) {
+      const [oldestKey, oldestValue] = this.entries.entries().next().value as [string, string];
+      this.entries.delete(oldestKey);
+      this.chars -= oldestValue.length;
+    }
+  }
+}
+
+const pageTextCache = new PageTextCache();
+
+const sha256Hex = async (data: Uint8Array): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+// 以固定数量的 worker 依次领取下标执行任务
+const runWithConcurrency = async (
+  count: number,
+  limit: number,
+  task: (index: number) => Promise<void>
+): Promise<void> => {
+  let next = 0;
+  const worker = async () => {
+    while (next < count) {
+      await task(next++);
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(limit, count) }, worker));
+};
+
+// 流式读取为单个缓冲区：按文件大小预分配，避免分块拼接产生多份副本
+const readBytes = async (stream: ReadableStream<Uint8Array>, sizeHint: number): Promise<Uint8Array> => {
+  let buffer = new Uint8Array(Math.max(sizeHint, 64 * 1024));
+  let length = 0;
+
+  const reader = stream.getReader();
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    if (length + value.byteLength > buffer.length) {
+      const grown = new Uint8Array(Math.max(buffer.length * 2, length + value.byteLength));
+      grown.set(buffer.subarray(0, length));
+      buffer = grown;
+    }
+    buffer.set(value, length);
+    length += value.byteLength;
+  }
+
+  return buffer.subarray(0, length);
+};
+
+// 文本按块增量解码
+const readText = async (stream: ReadableStream<Uint8Array>): Promise<string> => {
+  const decoder = new TextDecoder('utf-8');
+  const chunks: string[] = [];
+
+  const reader = stream.getReader();
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    chunks.push(decoder.decode(value, { stream: true }));
+  }
+  chunks.push(decoder.decode());
+
+  return chunks.join('');
+};
+
 export const fileParser = {
+  // 从存储流式读取并解析：文本类边读边解码，DOCX/PDF 读入一个按文件大小预分配的缓冲区
+  async parseStream(
+    stream: ReadableStream<Uint8Array>,
+    fileName: string,
+    mimeType: string,
+    sizeHint: number = 0
+  ): Promise<ParseResult> {
+    const fileType = this.detectFileType(fileName, mimeType);
+
+    if (fileType === 'unknown') {
+      await stream.cancel();
+      throw new Error(`Unsupported file type: ${fileType}`);
+    }
+
+    if (fileType === 'txt' || fileType === 'md') {
+      const content = await readText(stream);
+      return {
+        content,
+        metadata: {
+          wordCount: content.split(/\s+/).filter(word => word.length > 0).length,
+          charCount: content.length,
+        },
+      };
+    }
+
+    const bytes = await readBytes(stream, sizeHint);
+    return this.parseFile(Buffer.from(bytes.buffer, bytes.byteOffset, bytes.byteLength), fileName, mimeType);
+  },
+
   async parseFile(fileData: Buffer, fileName: string, mimeType: string): Promise<ParseResult> {
     const fileType = this.detectFileType(fileName, mimeType);
 
@@ -71,20 +206,42 @@ export const fileParser = {
     }
   },
 
+  // 页面按有界并发提取，逐页文本按 (文档哈希, 页码) 缓存，结果记录每页耗时
   async parsePdf(fileData: Buffer): Promise<ParseResult> {
     try {
-      const data = new Uint8Array(fileData);
+      // 直接复用底层内存，不复制文件字节
+      const data = new Uint8Array(fileData.buffer, fileData.byteOffset, fileData.byteLength);
+      const docHash = await sha256Hex(data);
       const pdf = await pdfjs.getDocument(data).promise;
       const pages = pdf.numPages;
-      let content = '';
-      
-      for (let i = 1; i <= pages; i++) {
-        const page = await pdf.getPage(i);
-        const textContent = await page.getTextContent();
-        const pageText = textContent.items.map(item => (item as any).str).join(' ');
-        content += pageText + '\n';
+      const pageTexts: string[] = new Array(pages);
+      const pageTimings: PageTiming[] = new Array(pages);
+
+      try {
+        await runWithConcurrency(pages, PDF_PAGE_CONCURRENCY, async (index) => {
+          const pageNumber = index + 1;
+          const startTime = Date.now();
+          const cacheKey = `${docHash}:${pageNumber}`;
+          const cached = pageTextCache.get(cacheKey);
+
+          if (cached !== undefined) {
+            pageTexts[index] = cached;
+          } else {
+            const page = await pdf.getPage(pageNumber);
+            const textContent = await page.getTextContent();
+            pageTexts[index] = textContent.items.map(item => (item as any).str).join(' ');
+            page.cleanup();
+            pageTextCache.set(cacheKey, pageTexts[index]);
+          }
+
+          pageTimings[index] = { page: pageNumber, ms: Date.now() - startTime, cached: cached !== undefined };
+        });
+      } finally {
+        await pdf.destroy();
       }
-      
+
+      // 每页文本后跟换行，与逐页拼接的结果一致
+      const content = pageTexts.length > 0 ? pageTexts.join('\n') + '\n' : '';
       const wordCount = content.split(/\s+/).filter(word => word.length > 0).length;
       
       return {
@@ -93,6 +250,7 @@ export const fileParser = {
           wordCount,
           charCount: content.length,
           pages,
+          pageTimings,
         },
       };
     } catch (error) {
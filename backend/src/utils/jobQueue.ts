@@ -0,0 +1,165 @@
+// 进程内任务队列：有界并发的 worker 循环 + 失败指数退避重试
+// 绑定 Cloudflare Queues 时由平台负责投递与重试，未绑定（本地开发、测试）时使用此实现
+
+export interface JobQueueOptions {
+  concurrency: number;
+  maxAttempts: number;
+  retryDelayMs: number;
+}
+
+export interface JobQueueStats {
+  depth: number;
+  active: number;
+  concurrency: number;
+  enqueued: number;
+  completed: number;
+  failed: number;
+  retried: number;
+  averageWaitMs: number;
+  averageRunMs: number;
+}
+
+export type JobHandler<T> = (payload: T, attempt: number) => Promise<void>;
+export type JobFailureHandler<T> = (payload: T, error: unknown) => Promise<void>;
+
+interface QueuedJob<T> {
+  payload: T;
+  attempts: number;
+  enqueuedAt: number;
+  availableAt: number;
+}
+
+export class InProcessQueue<T> {
+  private pending: QueuedJob<T>[] = [];
+  private active = 0;
+  // 正在执行（含等待失败处理）的任务
+  private running = new Set<T>();
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private idleWaiters: Array<() => void> = [];
+  private counters = {
+    enqueued: 0,
+    completed: 0,
+    failed: 0,
+    retried: 0,
+    waitTotal: 0,
+    runTotal: 0,
+    runs: 0,
+  };
+
+  constructor(
+    private handler: JobHandler<T>,
+    private options: JobQueueOptions,
+    private onFailure?: JobFailureHandler<T>
+  ) {}
+
+  configure(options: Partial<JobQueueOptions>) {
+    this.options = { ...this.options, ...options };
+    this.pump();
+  }
+
+  enqueue(payload: T) {
+    const now = Date.now();
+    this.pending.push({ payload, attempts: 0, enqueuedAt: now, availableAt: now });
+    this.counters.enqueued++;
+    this.pump();
+  }
+
+  // 返回满足条件的任务在队列中的位置（从 0 开始），不在队列中时返回 -1
+  position(predicate: (payload: T) => boolean): number {
+    return this.pending.findIndex(job => predicate(job.payload));
+  }
+
+  // 是否有满足条件的任务在排队或正在执行
+  has(predicate: (payload: T) => boolean): boolean {
+    if (this.pending.some(job => predicate(job.payload))) return true;
+    for (const payload of this.running) {
+      if (predicate(payload)) return true;
+    }
+    return false;
+  }
+
+  // 队列清空且无执行中任务时 resolve，供 waitUntil 保持 isolate 存活
+  onIdle(): Promise<void> {
+    if (this.isIdle()) return Promise.resolve();
+    return new Promise(resolve => this.idleWaiters.push(resolve));
+  }
+
+  getStats(): JobQueueStats {
+    return {
+      depth: this.pending.length,
+      active: this.active,
+      concurrency: this.options.concurrency,
+      enqueued: this.counters.enqueued,
+      completed: this.counters.completed,
+      failed: this.counters.failed,
+      retried: this.counters.retried,
+      averageWaitMs: this.counters.runs > 0 ? this.counters.waitTotal / this.counters.runs : 0,
+      averageRunMs: this.counters.runs > 0 ? this.counters.runTotal / this.counters.runs : 0,
+    };
+  }
+
+  private isIdle(): boolean {
+    return this.pending.length === 0 && this.active === 0;
+  }
+
+  private pump() {
+    while (this.active < this.options.concurrency) {
+      const now = Date.now();
+      const index = this.pending.findIndex(job => job.availableAt <= now);
+      if (index < 0) break;
+
+      const [job] = this.pending.splice(index, 1);
+      this.run(job);
+    }
+
+    this.scheduleRetryWakeup();
+
+    if (this.isIdle()) {
+      this.idleWaiters.splice(0).forEach(resolve => resolve());
+    }
+  }
+
+  // 仅剩退避中的任务时，在最早可执行的时间点重新调度
+  private scheduleRetryWakeup() {
+    if (this.timer || this.pending.length === 0 || this.active >= this.options.concurrency) return;
+
+    const nextAt = Math.min(...this.pending.map(job => job.availableAt));
+    this.timer = setTimeout(() => {
+      this.timer = null;
+      this.pump();
+    }, Math.max(nextAt - Date.now(), 0));
+  }
+
+  private async run(job: QueuedJob<T>) {
+    this.active++;
+    this.running.add(job.payload);
+    job.attempts++;
+
+    const startTime = Date.now();
+    this.counters.waitTotal += startTime - job.availableAt;
+
+    try {
+      await this.handler(job.payload, job.attempts);
+      this.counters.completed++;
+    } catch (error) {
+      if (job.attempts < this.options.maxAttempts) {
+        this.counters.retried++;
+        job.availableAt = Date.now() + this.options.retryDelayMs * 2 ** (job.attempts - 1);
+        this.pending.push(job);
+      } else {
+        this.counters.failed++;
+        try {
+          await this.onFailure?.(job.payload, error);
+        } catch (failureError) {
+          console.error('Job failure handler error:', failureError);
+        }
+      }
+    } finally {
+      this.counters.runs++;
+      this.counters.runTotal += Date.now() - startTime;
+      this.active--;
+      this.running.delete(job.payload);
+      this.pump();
+    }
+  }
+}
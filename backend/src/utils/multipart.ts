@@ -0,0 +1,128 @@
+// 流式 multipart/form-data 解析：只定位目标文件字段，文件内容以流的形式向下游传递，不整体缓冲
+
+export interface MultipartFile {
+  fileName: string;
+  contentType: string;
+  stream: ReadableStream<Uint8Array>;
+}
+
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+const HEADER_END = encoder.encode('\r\n\r\n');
+
+export const getBoundary = (contentType: string): string | null => {
+  const match = contentType.match(/boundary=(?:"([^"]+)"|([^;]+))/i);
+  return match ? (match[1] || match[2]).trim() : null;
+};
+
+const indexOf = (haystack: Uint8Array, needle: Uint8Array, from: number = 0): number => {
+  const first = needle[0];
+  const last = haystack.length - needle.length;
+
+  for (let i = haystack.indexOf(first, from); i >= 0 && i <= last; i = haystack.indexOf(first, i + 1)) {
+    let j = 1;
+    while (j < needle.length && haystack[i + j] === needle[j]) j++;
+    if (j === needle.length) return i;
+  }
+  return -1;
+};
+
+const concat = (a: Uint8Array, b: Uint8Array): Uint8Array => {
+  if (a.length === 0) return b;
+  const result = new Uint8Array(a.length + b.length);
+  result.set(a);
+  result.set(b, a.length);
+  return result;
+};
+
+const headerParam = (headers: string, name: string): string | null => {
+  const match = headers.match(new RegExp(`(?:^|[;\\s])${name}="([^"]*)"`, 'i'));
+  return match ? match[1] : null;
+};
+
+export async function extractMultipartFile(
+  body: ReadableStream<Uint8Array>,
+  boundary: string,
+  field: string = 'file'
+): Promise<MultipartFile | null> {
+  const reader = body.getReader();
+  const delimiter = encoder.encode(`\r\n--${boundary}`);
+  // 首个分隔符前补 \r\n，使所有分隔符形式一致
+  let buffer = encoder.encode('\r\n');
+
+  const pull = async (): Promise<boolean> => {
+    const { done, value } = await reader.read();
+    if (done) return false;
+    buffer = concat(buffer, value);
+    return true;
+  };
+
+  const close = () => reader.cancel().catch(() => {});
+
+  while (true) {
+    // 跳过目标字段之前的内容，只保留可能构成分隔符前缀的尾部
+    let start = indexOf(buffer, delimiter);
+    while (start < 0) {
+      if (buffer.length > delimiter.length) {
+        buffer = buffer.slice(buffer.length - delimiter.length);
+      }
+      if (!(await pull())) return null;
+      start = indexOf(buffer, delimiter);
+    }
+    buffer = buffer.slice(start + delimiter.length);
+
+    while (buffer.length < 2) {
+      if (!(await pull())) return null;
+    }
+    // 结束分隔符 --boundary--
+    if (buffer[0] === 0x2d && buffer[1] === 0x2d) {
+      await close();
+      return null;
+    }
+
+    let headerEnd = indexOf(buffer, HEADER_END);
+    while (headerEnd < 0) {
+      if (!(await pull())) return null;
+      headerEnd = indexOf(buffer, HEADER_END);
+    }
+
+    const headers = decoder.decode(buffer.slice(0, headerEnd));
+    buffer = buffer.slice(headerEnd + HEADER_END.length);
+
+    const fileName = headerParam(headers, 'filename');
+    if (headerParam(headers, 'name') !== field || !fileName) continue;
+
+    const contentType = headers.match(/content-type:\s*([^\r\n]+)/i)?.[1].trim() || 'application/octet-stream';
+
+    const stream = new ReadableStream<Uint8Array>({
+      async pull(controller) {
+        while (true) {
+          const end = indexOf(buffer, delimiter);
+          if (end >= 0) {
+            if (end > 0) controller.enqueue(buffer.slice(0, end));
+            controller.close();
+            await close();
+            return;
+          }
+
+          const safe = buffer.length - (delimiter.length - 1);
+          if (safe > 0) {
+            controller.enqueue(buffer.slice(0, safe));
+            buffer = buffer.slice(safe);
+            return;
+          }
+
+          if (!(await pull())) {
+            controller.error(new Error('Unexpected end of multipart body'));
+            return;
+          }
+        }
+      },
+      cancel() {
+        return close();
+      },
+    });
+
+    return { fileName, contentType, stream };
+  }
+}
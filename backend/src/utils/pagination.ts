@@ -0,0 +1,111 @@
+import type { Context } from 'hono';
+import { stream } from 'hono/streaming';
+import type { Page, PageOptions } from '../types/index';
+
+export const DEFAULT_PAGE_SIZE = 50;
+export const MAX_PAGE_SIZE = 200;
+
+// 游标为 (created_at, id) 的 base64url 编码，按创建时间倒序翻页
+export const encodeCursor = (createdAt: string, id: string): string => {
+  return btoa(`${createdAt}|${id}`).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+};
+
+export const decodeCursor = (cursor: string): { createdAt: string; id: string } => {
+  try {
+    const padded = cursor.replace(/-/g, '+').replace(/_/g, '/');
+    const [createdAt, id] = atob(padded + '='.repeat((4 - (padded.length % 4)) % 4)).split('|');
+    if (!/^[0-9T:.+\- Z]+$/.test(createdAt) || !/^[0-9a-f-]{36}$/i.test(id) || Number.isNaN(Date.parse(createdAt))) {
+      throw new Error();
+    }
+    return { createdAt, id };
+  } catch {
+    throw new Error('Invalid cursor');
+  }
+};
+
+// PostgREST 的 or() 过滤条件，取严格早于游标位置的行
+export const keysetFilter = (cursor: string): string => {
+  const { createdAt, id } = decodeCursor(cursor);
+  return `created_at.lt."${createdAt}",and(created_at.eq."${createdAt}",id.lt.${id})`;
+};
+
+// 解析 fields= 投影参数，只允许白名单列，并始终带上游标所需的列
+export const resolveColumns = (
+  fields: string[] | undefined,
+  allowed: readonly string[],
+  defaultColumns: string = '*'
+): string => {
+  if (!fields || fields.length === 0) {
+    return defaultColumns;
+  }
+
+  const columns = new Set(['id', 'created_at']);
+  for (const field of fields) {
+    if (!allowed.includes(field)) {
+      throw new Error(`Unknown field: ${field}`);
+    }
+    columns.add(field);
+  }
+  return [...columns].join(',');
+};
+
+export const toPage = <T extends { id: string; created_at?: string }>(rows: T[], limit: number): Page<T> => {
+  const hasMore = rows.length > limit;
+  const items = hasMore ? rows.slice(0, limit) : rows;
+  const last = items[items.length - 1];
+
+  return {
+    items,
+    hasMore,
+    nextCursor: hasMore && last?.created_at ? encodeCursor(last.created_at, last.id) : null,
+  };
+};
+
+export const parsePageQuery = (c: Context, allowedFields: readonly string[]): PageOptions => {
+  const limit = Number(c.req.query('limit') || DEFAULT_PAGE_SIZE);
+  if (!Number.isInteger(limit) || limit < 1) {
+    throw new Error('Invalid limit');
+  }
+
+  const cursor = c.req.query('cursor') || null;
+  if (cursor) {
+    decodeCursor(cursor);
+  }
+
+  const fieldsParam = c.req.query('fields');
+  const fields = fieldsParam ? fieldsParam.split(',').map(f => f.trim()).filter(Boolean) : undefined;
+  resolveColumns(fields, allowedFields);
+
+  return {
+    limit: Math.min(limit, MAX_PAGE_SIZE),
+    cursor,
+    fields,
+  };
+};
+
+export const isDefaultPage = (options: PageOptions): boolean => {
+  return !options.cursor && !options.fields && options.limit === DEFAULT_PAGE_SIZE;
+};
+
+// 逐页读取并以 NDJSON 输出，内存中始终只保留一页
+export const streamPages = <T>(
+  c: Context,
+  loadPage: (cursor: string | null) => Promise<Page<T>>
+) => {
+  c.header('Content-Type', 'application/x-ndjson');
+
+  return stream(c, async (s) => {
+    let cursor: string | null = null;
+
+    do {
+      const page: Page<T> = await loadPage(cursor);
+      if (page.items.length > 0) {
+        await s.write(page.items.map(item => JSON.stringify(item)).join('\n') + '\n');
+      }
+      cursor = page.nextCursor;
+    } while (cursor && !s.aborted);
+  }, async (error, s) => {
+    console.error('Stream pages error:', error);
+    await s.write(JSON.stringify({ error: { code: 'SERVER_ERROR', message: error.message } }) + '\n');
+  });
+};
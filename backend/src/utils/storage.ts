@@ -0,0 +1,185 @@
+import { createHash } from 'node:crypto';
+import { DEFAULT_SUPABASE_URL } from './supabase';
+import type { Env } from '../types/env';
+
+// 文件对象存储：上传时请求体直接流式写入，解析时流式读回，文件字节只在存储中保存一份
+// 默认使用 Supabase Storage；STORAGE_DRIVER=local 时写入本地目录（本地开发与测试）
+
+export const MAX_UPLOAD_BYTES = 50 * 1024 * 1024;
+
+const DEFAULT_BUCKET = 'documents';
+const DEFAULT_LOCAL_DIR = '/tmp/storyweaver-storage';
+
+export class FileTooLargeError extends Error {
+  constructor(public maxBytes: number) {
+    super(`File exceeds the ${Math.round(maxBytes / 1024 / 1024)}MB limit`);
+    this.name = 'FileTooLargeError';
+  }
+}
+
+export interface ObjectStorage {
+  put(path: string, body: ReadableStream<Uint8Array>, contentType: string): Promise<void>;
+  get(path: string): Promise<ReadableStream<Uint8Array>>;
+  delete(path: string): Promise<void>;
+}
+
+// 传输过程中统计字节数，超过上限立即中断，不等整个请求体到达
+export const limitStream = (maxBytes: number) => {
+  let bytes = 0;
+  let exceeded = false;
+
+  const stream = new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      bytes += chunk.byteLength;
+      if (bytes > maxBytes) {
+        exceeded = true;
+        controller.error(new FileTooLargeError(maxBytes));
+        return;
+      }
+      controller.enqueue(chunk);
+    },
+  });
+
+  return {
+    stream,
+    bytes: () => bytes,
+    exceeded: () => exceeded,
+  };
+};
+
+// 传输过程中增量计算 SHA-256，文件写完即得到内容哈希
+export const hashStream = () => {
+  const hash = createHash('sha256');
+  let digest: string | null = null;
+
+  const stream = new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      hash.update(chunk);
+      controller.enqueue(chunk);
+    },
+    flush() {
+      digest = hash.digest('hex');
+    },
+  });
+
+  return {
+    stream,
+    digest: () => {
+      if (digest === null) throw new Error('Stream has not finished');
+      return digest;
+    },
+  };
+};
+
+const encodePath = (path: string) => path.split('/').map(encodeURIComponent).join('/');
+
+class SupabaseStorage implements ObjectStorage {
+  constructor(private url: string, private key: string, private bucket: string) {}
+
+  private headers(extra: Record<string, string> = {}) {
+    return {
+      Authorization: `Bearer ${this.key}`,
+      apikey: this.key,
+      ...extra,
+    };
+  }
+
+  async put(path: string, body: ReadableStream<Uint8Array>, contentType: string): Promise<void> {
+    const response = await fetch(`${this.url}/storage/v1/object/${this.bucket}/${encodePath(path)}`, {
+      method: 'POST',
+      headers: this.headers({ 'Content-Type': contentType || 'application/octet-stream', 'x-upsert': 'false' }),
+      body,
+      // Node/undici 发送流式请求体时要求显式声明
+      duplex: 'half',
+    } as RequestInit);
+
+    if (!response.ok) {
+      throw new Error(`Storage upload failed: ${response.status} ${await response.text()}`);
+    }
+  }
+
+  async get(path: string): Promise<ReadableStream<Uint8Array>> {
+    const response = await fetch(
+      `${this.url}/storage/v1/object/authenticated/${this.bucket}/${encodePath(path)}`,
+      { headers: this.headers() }
+    );
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Storage download failed: ${response.status}`);
+    }
+    return response.body;
+  }
+
+  async delete(path: string): Promise<void> {
+    const response = await fetch(`${this.url}/storage/v1/object/${this.bucket}`, {
+      method: 'DELETE',
+      headers: this.headers({ 'Content-Type': 'application/json' }),
+      body: JSON.stringify({ prefixes: [path] }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Storage delete failed: ${response.status}`);
+    }
+  }
+}
+
+class LocalFileStorage implements ObjectStorage {
+  constructor(private root: string) {}
+
+  private async resolve(path: string): Promise<string> {
+    const { resolve, sep } = await import('node:path');
+    const root = resolve(this.root);
+    const fullPath = resolve(root, path);
+    if (!fullPath.startsWith(root + sep)) {
+      throw new Error('Invalid storage path');
+    }
+    return fullPath;
+  }
+
+  async put(path: string, body: ReadableStream<Uint8Array>): Promise<void> {
+    const { createWriteStream, promises } = await import('node:fs');
+    const { dirname } = await import('node:path');
+    const { Writable } = await import('node:stream');
+
+    const fullPath = await this.resolve(path);
+    await promises.mkdir(dirname(fullPath), { recursive: true });
+    await body.pipeTo(Writable.toWeb(createWriteStream(fullPath)) as WritableStream<Uint8Array>);
+  }
+
+  async get(path: string): Promise<ReadableStream<Uint8Array>> {
+    const { createReadStream } = await import('node:fs');
+    const { Readable } = await import('node:stream');
+
+    return Readable.toWeb(createReadStream(await this.resolve(path))) as ReadableStream<Uint8Array>;
+  }
+
+  async delete(path: string): Promise<void> {
+    const { promises } = await import('node:fs');
+    await promises.rm(await this.resolve(path), { force: true });
+  }
+}
+
+let storage: ObjectStorage | undefined;
+
+// 存储桶只对 service role 开放（见 supabase/document-storage.sql），不回退到随前端分发的 anon key
+export const bindStorage = (env: Env) => {
+  if (env.STORAGE_DRIVER === 'local') {
+    storage = new LocalFileStorage(env.STORAGE_LOCAL_DIR || DEFAULT_LOCAL_DIR);
+    return;
+  }
+
+  storage = env.SUPABASE_SERVICE_KEY
+    ? new SupabaseStorage(
+        env.SUPABASE_URL || DEFAULT_SUPABASE_URL,
+        env.SUPABASE_SERVICE_KEY,
+        env.STORAGE_BUCKET || DEFAULT_BUCKET
+      )
+    : undefined;
+};
+
+export const getStorage = (): ObjectStorage => {
+  if (!storage) {
+    throw new Error('Object storage is not bound: set SUPABASE_SERVICE_KEY or STORAGE_DRIVER=local');
+  }
+  return storage;
+};
@@ -0,0 +1,270 @@
+"""LLM 批量优化基准测试
+
+在进程内启动 mock_llm_server，按 LLMOptimizer 的提示模板分别以逐条模式
+（每条故事一次请求）和批量模式（同一章节的故事合并为一次请求）优化同一组故事，
+对比请求数、token 用量、估算成本与总耗时。批量响应中缺失的条目按逐条模式回退。
+
+用法示例:
+    python bench-llm-batch.py --stories 40 --batch-size 5 --concurrency 4 --drop-rate 0.05
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import loadtest
+import mock_llm_server
+
+GOALS = ["提升描述的清晰度", "补充缺失信息", "优化语言表达", "增强置信度"]
+
+REQUIREMENTS = """## 优化要求
+1. 保持角色、功能、价值的核心含义不变
+2. 提升描述的清晰度和准确性
+3. 优化语言表达，符合用户故事标准格式
+4. 补充缺失的信息（如发现"待补充"）
+5. 提供详细的优化说明"""
+
+SCHEMA = """{
+  "title": "优化后的标题",
+  "description": "优化后的详细描述",
+  "role": "优化后的角色",
+  "action": "优化后的功能",
+  "value": "优化后的价值",
+  "module": "优化后的模块",
+  "priority": "优化后的优先级",
+  "changes": ["优化项1", "优化项2"],
+  "confidence": 0.95
+}"""
+
+# 与 LLMProvider.MODEL_PRICES 中 gpt-4o-mini 的单价一致（每 1K tokens）
+COST_PER_1K_TOKENS = 0.15
+
+
+def make_stories(count, section_size):
+    stories = []
+    for index in range(count):
+        section = index // section_size
+        stories.append({
+            "role": "产品经理",
+            "action": f"在第 {section + 1} 章中批量导入第 {index + 1} 条需求并自动拆分为用户故事",
+            "value": "（待补充）",
+            "module": f"章节 {section + 1}",
+            "priority": "P1",
+            "confidence": 0.55,
+            "description": f"As a 产品经理, I want to 导入第 {index + 1} 条需求, So that （待补充）",
+            "context": f"产品经理可以在第 {section + 1} 章中导入第 {index + 1} 条需求（待补充）",
+        })
+    return stories
+
+
+def story_lines(story):
+    return f"""- 角色：{story['role']}
+- 功能：{story['action']}
+- 价值：{story['value']}
+- 模块：{story['module']}
+- 优先级：{story['priority']}
+- 置信度：{story['confidence'] * 100:.0f}%
+- 原始描述：{story['description']}"""
+
+
+def single_prompt(story):
+    goals = "\n".join(f"- {goal}" for goal in GOALS)
+    return f"""# 用户故事优化任务
+
+## 原始故事信息
+{story_lines(story)}
+
+## 优化目标
+{goals}
+
+## 上下文信息
+{story['context']}
+
+{REQUIREMENTS}
+
+## 输出格式
+严格返回JSON格式，不要包含其他内容：
+{SCHEMA}
+"""
+
+
+def batch_prompt(stories):
+    blocks = "\n\n".join(
+        f"### 故事 {index + 1}\n{story_lines(story)}\n- 上下文：{story['context']}"
+        for index, story in enumerate(stories)
+    )
+    goals = "\n".join(f"- {goal}" for goal in GOALS)
+    schema = "[\n  " + SCHEMA.replace("{\n", '{\n    "index": 1,\n', 1).replace("\n", "\n  ") + "\n]"
+    return f"""# 用户故事批量优化任务
+
+## 原始故事列表
+{blocks}
+
+## 优化目标
+{goals}
+
+{REQUIREMENTS}
+
+## 输出格式
+严格返回JSON数组，每条故事对应一个元素，index 为故事序号，不要包含其他内容：
+{schema}
+"""
+
+
+def call(ctx, prompt):
+    session = loadtest.get_session(ctx["concurrency"])
+    response = session.post(
+        f"{ctx['mock_url']}/chat/completions",
+        json={"model": "gpt-4o-mini", "messages": [{"role": "user", "content": prompt}], "max_tokens": ctx["max_tokens"]},
+        timeout=ctx["timeout"],
+    )
+    response.raise_for_status()
+    payload = response.json()
+    usage = payload["usage"]
+    return payload["choices"][0]["message"]["content"], usage["prompt_tokens"], usage["completion_tokens"]
+
+
+def parse_batch(content, count):
+    """与 LLMOptimizer.parseBatchResponse 一致：按 index 对位，缺失条目为 None"""
+    items = [None] * count
+    match = re.search(r"\[[\s\S]*\]", content)
+    if not match:
+        return items
+    try:
+        parsed = json.loads(match.group(0))
+    except ValueError:
+        return items
+    for position, item in enumerate(parsed if isinstance(parsed, list) else []):
+        if not isinstance(item, dict):
+            continue
+        index = item["index"] - 1 if isinstance(item.get("index"), int) else (position if len(parsed) == count else -1)
+        if 0 <= index < count and items[index] is None:
+            items[index] = item
+    return items
+
+
+def run_single(ctx, stories):
+    totals = {"calls": 0, "prompt": 0, "completion": 0}
+    lock = threading.Lock()
+
+    def optimize(story):
+        _, prompt_tokens, completion_tokens = call(ctx, single_prompt(story))
+        with lock:
+            totals["calls"] += 1
+            totals["prompt"] += prompt_tokens
+            totals["completion"] += completion_tokens
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=ctx["concurrency"]) as pool:
+        list(pool.map(optimize, stories))
+    totals["elapsed"] = time.perf_counter() - start
+    totals["fallbacks"] = 0
+    return totals
+
+
+def run_batch(ctx, stories, batch_size):
+    totals = {"calls": 0, "prompt": 0, "completion": 0, "fallbacks": 0}
+    lock = threading.Lock()
+
+    sections = {}
+    for story in stories:
+        sections.setdefault(story["module"], []).append(story)
+    chunks = [
+        group[start:start + batch_size]
+        for group in sections.values()
+        for start in range(0, len(group), batch_size)
+    ]
+
+    def optimize(chunk):
+        if len(chunk) == 1:
+            content, prompt_tokens, completion_tokens = call(ctx, single_prompt(chunk[0]))
+            missing = []
+        else:
+            content, prompt_tokens, completion_tokens = call(ctx, batch_prompt(chunk))
+            missing = [story for story, item in zip(chunk, parse_batch(content, len(chunk))) if item is None]
+        with lock:
+            totals["calls"] += 1
+            totals["prompt"] += prompt_tokens
+            totals["completion"] += completion_tokens
+        for story in missing:
+            _, prompt_tokens, completion_tokens = call(ctx, single_prompt(story))
+            with lock:
+                totals["calls"] += 1
+                totals["fallbacks"] += 1
+                totals["prompt"] += prompt_tokens
+                totals["completion"] += completion_tokens
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=ctx["concurrency"]) as pool:
+        list(pool.map(optimize, chunks))
+    totals["elapsed"] = time.perf_counter() - start
+    return totals
+
+
+def report(name, totals, count):
+    tokens = totals["prompt"] + totals["completion"]
+    cost = tokens / 1000 * COST_PER_1K_TOKENS
+    print(
+        f"{name:<6} {totals['calls']:>6} {totals['fallbacks']:>6} {totals['prompt']:>10} {totals['completion']:>10} "
+        f"{tokens / count:>10.0f} {cost:>10.4f} {totals['elapsed']:>8.2f}s"
+    )
+    return tokens, cost
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM 批量优化基准测试")
+    parser.add_argument("--stories", type=int, default=40)
+    parser.add_argument("--section-size", type=int, default=10, help="每个章节的故事数")
+    parser.add_argument("--batch-size", type=int, default=0, help="缺省按 --max-tokens 推算（与 getBatchSize 一致）")
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="批量响应中丢弃条目的概率")
+    args = parser.parse_args(argv)
+
+    batch_size = args.batch_size or max(1, min(args.max_tokens // 400, 8))
+
+    mock_args = mock_llm_server.parse_args([
+        "--port", str(args.mock_port),
+        "--latency", "lognormal",
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--drop-rate", str(args.drop_rate),
+        "--simulate-generation",
+    ])
+    server = mock_llm_server.create_server(mock_args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    ctx = {
+        "mock_url": f"http://127.0.0.1:{args.mock_port}/v1",
+        "concurrency": args.concurrency,
+        "max_tokens": args.max_tokens,
+        "timeout": 120.0,
+    }
+    stories = make_stories(args.stories, args.section_size)
+
+    print(f"=== {args.stories} 条故事, 批量大小 {batch_size}, 并发 {args.concurrency} ===")
+    print(f"{'模式':<6} {'请求数':>6} {'回退':>6} {'输入token':>10} {'输出token':>10} {'每条token':>10} {'成本$':>10} {'耗时':>9}")
+    single = run_single(ctx, stories)
+    single_tokens, single_cost = report("逐条", single, args.stories)
+    batch = run_batch(ctx, stories, batch_size)
+    batch_tokens, batch_cost = report("批量", batch, args.stories)
+
+    print("\n=== 批量 vs 逐条 ===")
+    print(f"请求数: -{1 - batch['calls'] / single['calls']:.0%}")
+    print(f"token: -{1 - batch_tokens / single_tokens:.0%}  成本: -{1 - batch_cost / single_cost:.0%}")
+    print(f"耗时: {batch['elapsed'] / single['elapsed']:.2f}x")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
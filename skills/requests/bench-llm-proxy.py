@@ -0,0 +1,142 @@
+"""LLM 代理开销基准测试
+
+在进程内启动 mock_llm_server，分别直连模拟服务和经由后端 /api/llm 代理调用，
+对比延迟分位数，得出代理本身的开销。后端需以
+OPENAI_BASE_URL=http://127.0.0.1:9100/v1 启动（wrangler dev --var 或 .dev.vars）。
+
+--stream-samples 大于 0 时，另外对比经由代理的缓冲响应与 SSE 流式响应的
+首字节、首字段（title 完整到达）与总耗时。
+
+用法示例:
+    python bench-llm-proxy.py --base-url http://localhost:8888 --token <JWT> --rate-5xx 0.05
+    python bench-llm-proxy.py --token <JWT> --duration 5 --stream-samples 20 --tokens-per-sec 30
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+import loadtest
+import mock_llm_server
+
+
+def scenario_direct(session, ctx):
+    body = {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": "作为用户，我可以上传PRD文档，以便自动生成用户故事"}],
+        "max_tokens": 64,
+    }
+    return session.post(f"{ctx['mock_url']}/chat/completions", json=body, timeout=ctx["timeout"])
+
+
+FIRST_FIELD_RE = re.compile(r'"title"\s*:\s*"(?:[^"\\]|\\.)*"')
+
+
+def measure_stream(ctx, stream):
+    """返回 (首字节, 首字段, 总耗时) 毫秒；缓冲模式下三者都取决于完整响应"""
+    body = {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": "- 角色：产品经理\n- 功能：上传PRD文档\n- 价值：自动生成用户故事"}],
+        "max_tokens": 512,
+        "stream": stream,
+    }
+    start = time.perf_counter()
+    first_byte = first_field = None
+    content = ""
+    with requests.post(
+        f"{ctx['base_url']}/api/llm/openai/chat/completions",
+        headers=ctx["headers"], json=body, timeout=ctx["timeout"], stream=True,
+    ) as response:
+        response.raise_for_status()
+        buffer = ""
+        for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+            now = (time.perf_counter() - start) * 1000
+            first_byte = first_byte if first_byte is not None else now
+            buffer += chunk
+            if not stream:
+                continue
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                data = line.strip()[5:].strip() if line.startswith("data:") else ""
+                if data and data != "[DONE]":
+                    content += json.loads(data)["choices"][0]["delta"].get("content") or ""
+            if first_field is None and FIRST_FIELD_RE.search(content):
+                first_field = now
+        total = (time.perf_counter() - start) * 1000
+    if not stream:
+        first_field = total
+    return first_byte, first_field if first_field is not None else total, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM 代理开销基准测试")
+    parser.add_argument("--base-url", default=loadtest.DEFAULT_BASE_URL)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--stream-samples", type=int, default=0, help="流式对比的采样次数（0 表示跳过）")
+    args = parser.parse_args(argv)
+
+    mock_args = mock_llm_server.parse_args([
+        "--port", str(args.mock_port),
+        "--latency", "lognormal",
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--rate-429", str(args.rate_429),
+        "--rate-5xx", str(args.rate_5xx),
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--simulate-generation",
+    ])
+    server = mock_llm_server.create_server(mock_args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    ctx = {
+        "base_url": args.base_url.rstrip("/"),
+        "mock_url": f"http://127.0.0.1:{args.mock_port}/v1",
+        "headers": {"Authorization": f"Bearer {args.token}"},
+        "timeout": 30.0,
+        "llm_provider": "openai",
+    }
+
+    print(f"=== LLM 代理开销 (并发 {args.concurrency}, 每组 {args.duration}s) ===")
+    results = {}
+    for name, scenario in (("直连模拟服务", scenario_direct), ("经由后端代理", loadtest.scenario_llm)):
+        stats, _ = loadtest.run_stage(scenario, args.concurrency, args.duration, ctx)
+        results[name] = stats
+        print(
+            f"{name}: {stats['requests']} 请求, {stats['throughput']:.1f} req/s, "
+            f"p50 {stats['p50']:.1f}ms, p95 {stats['p95']:.1f}ms, p99 {stats['p99']:.1f}ms, "
+            f"状态码 {stats['status']}"
+        )
+
+    direct, proxied = results["直连模拟服务"], results["经由后端代理"]
+    print("\n=== 代理开销 ===")
+    for key in ("p50", "p95", "p99"):
+        print(f"{key}: +{proxied[key] - direct[key]:.1f}ms")
+
+    if args.stream_samples > 0:
+        print(f"\n=== 缓冲 vs 流式 ({args.stream_samples} 次, 中位数) ===")
+        for name, stream in (("缓冲响应", False), ("SSE 流式", True)):
+            samples = [measure_stream(ctx, stream) for _ in range(args.stream_samples)]
+            first_byte, first_field, total = (statistics.median(column) for column in zip(*samples))
+            print(f"{name}: 首字节 {first_byte:.1f}ms, 首字段 {first_field:.1f}ms, 总耗时 {total:.1f}ms")
+
+    print(f"模拟服务统计: {server.RequestHandlerClass.stats.snapshot()}")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+/**
+ * 多模型路由与对冲请求基准
+ *
+ * 启动本地模拟 LLM 服务（mock_llm_server.py，对数正态延迟分布，长尾明显），通过 LLMRouter
+ * （src/services/LLMRouter.ts）以固定并发发送请求，对比只使用单个模型与开启路由 + 对冲请求时的
+ * p50/p95/p99 延迟，以及对冲带来的额外请求比例（以模拟服务实际收到的请求数计）。
+ * 基准只关心提供方的响应延迟，因此放宽了本地的提供方限流。
+ *
+ * 用法示例（Node 22+）:
+ *     node --experimental-transform-types --no-warnings skills/requests/bench-llm-router.ts --requests 400 --latency-ms 120 --jitter-ms 240
+ */
+import { register } from 'node:module';
+import { pathToFileURL, fileURLToPath } from 'node:url';
+import { spawn } from 'node:child_process';
+
+// 解析 Vite 的 @/ 别名，并为 src 内不带扩展名的相对导入补全 .ts
+const SRC = new URL('../../src/', import.meta.url).href;
+register(
+  'data:text/javascript,' + encodeURIComponent(`
+    export async function resolve(specifier, context, next) {
+      if (specifier.startsWith('@/')) {
+        return next(${JSON.stringify(SRC)} + specifier.slice(2) + '.ts', context);
+      }
+      if (specifier.startsWith('.') && context.parentURL?.startsWith(${JSON.stringify(SRC)}) && !/\\.\\w+$/.test(specifier)) {
+        return next(specifier + '.ts', context);
+      }
+      return next(specifier, context);
+    }
+  `),
+  pathToFileURL('./')
+);
+
+const { LLMRouter } = await import('../../src/services/LLMRouter.ts');
+const { LLMModel, getServiceType } = await import('../../src/services/LLMService.ts');
+const { DEFAULT_PROVIDER_LIMITS } = await import('../../src/services/LLMBatchPipeline.ts');
+
+const args = process.argv.slice(2);
+const option = (name: string, fallback: number) => {
+  const index = args.indexOf(`--${name}`);
+  return index >= 0 ? Number(args[index + 1]) : fallback;
+};
+const REQUESTS = option('requests', 400);
+const CONCURRENCY = option('concurrency', 4);
+const PORT = option('port', 9123);
+const LATENCY_MS = option('latency-ms', 120);
+const JITTER_MS = option('jitter-ms', 240);
+
+const PRIMARY = LLMModel.GPT4oMini;
+// 备选模型与主模型同属一个服务提供方，沿用同一 baseUrl（模拟服务）
+const ROUTES = [LLMModel.GPT4o];
+for (const model of [PRIMARY, ...ROUTES]) {
+  DEFAULT_PROVIDER_LIMITS[getServiceType(model)] = { maxConcurrency: 64, requestsPerSecond: 1000, burst: 64 };
+}
+
+const BASE_URL = `http://127.0.0.1:${PORT}`;
+const server = spawn('python3', [
+  fileURLToPath(new URL('./mock_llm_server.py', import.meta.url)),
+  '--port', String(PORT),
+  '--latency', 'lognormal',
+  '--latency-ms', String(LATENCY_MS),
+  '--jitter-ms', String(JITTER_MS),
+], { stdio: 'ignore' });
+
+async function waitForServer() {
+  for (let i = 0; i < 50; i++) {
+    try {
+      if ((await fetch(`${BASE_URL}/health`)).ok) return;
+    } catch {
+      // 服务尚未启动
+    }
+    await new Promise(resolve => setTimeout(resolve, 100));
+  }
+  throw new Error('模拟服务启动失败');
+}
+
+const quantile = (sorted: number[], p: number) => sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)];
+
+async function run(label: string, routeModels: typeof ROUTES, hedge: boolean) {
+  await fetch(`${BASE_URL}/__reset`, { method: 'POST' });
+  const router = new LLMRouter({
+    model: PRIMARY,
+    apiKey: 'bench',
+    temperature: 0.3,
+    maxTokens: 2000,
+    requestTimeout: 30000,
+    baseUrl: `${BASE_URL}/v1`,
+    stream: false,
+    routeModels,
+    hedge,
+  });
+
+  const latencies: number[] = [];
+  let next = 0;
+  let hedged = 0;
+  const started = Date.now();
+  await Promise.all(Array.from({ length: CONCURRENCY }, async () => {
+    while (next < REQUESTS) {
+      const prompt = `- 功能：路由基准请求 ${next++}`;
+      const start = performance.now();
+      const result = await router.complete(prompt);
+      latencies.push(performance.now() - start);
+      if (result.hedged) hedged++;
+    }
+  }));
+  const elapsed = Date.now() - started;
+
+  const stats = await (await fetch(`${BASE_URL}/__stats`)).json();
+  latencies.sort((a, b) => a - b);
+  console.log(
+    `${label.padEnd(16)} p50 ${quantile(latencies, 0.5).toFixed(0).padStart(5)}ms` +
+    `  p95 ${quantile(latencies, 0.95).toFixed(0).padStart(5)}ms` +
+    `  p99 ${quantile(latencies, 0.99).toFixed(0).padStart(5)}ms` +
+    `  额外请求 ${(((stats.requests - REQUESTS) / REQUESTS) * 100).toFixed(1).padStart(4)}%` +
+    `  对冲 ${hedged} 次  总耗时 ${(elapsed / 1000).toFixed(1)}s`
+  );
+}
+
+try {
+  await waitForServer();
+  console.log(`请求 ${REQUESTS}，并发 ${CONCURRENCY}，延迟 lognormal 中位数 ${LATENCY_MS}ms / jitter ${JITTER_MS}ms`);
+  await run('单模型', [], false);
+  await run('路由 + 对冲', ROUTES, true);
+} finally {
+  server.kill();
+}
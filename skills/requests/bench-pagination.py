@@ -0,0 +1,107 @@
+"""故事列表分页/投影基准测试
+
+逐步向当前用户写入测试故事，在每个数据量下对比
+全量流式读取、单页读取、带字段投影的单页读取的响应体积与延迟。
+
+用法示例:
+    python bench-pagination.py --token <JWT> --sizes 100,1000,5000 --cleanup
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import loadtest
+
+MODES = {
+    "全量(ndjson)": {"format": "ndjson"},
+    "单页(50)": {"limit": 50},
+    "单页+投影": {"limit": 50, "fields": "id,title,priority,status"},
+}
+
+
+def seed_stories(ctx, start, end, workers):
+    def create(index):
+        session = loadtest.get_session(workers)
+        response = session.post(
+            f"{ctx['base_url']}/api/stories",
+            headers=ctx["headers"],
+            json={
+                "title": f"[bench] 故事 {index}",
+                "description": f"作为用户，我可以查看第 {index} 条基准测试故事，以便评估分页性能",
+                "action": f"查看第 {index} 条基准测试故事",
+                "value": "评估分页性能",
+                "module": "Benchmark",
+                "priority": "P2",
+            },
+            timeout=ctx["timeout"],
+        )
+        response.raise_for_status()
+        return response.json()["data"]["id"]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(create, range(start, end)))
+
+
+def measure(ctx, params, repeat):
+    latencies = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = requests.get(
+            f"{ctx['base_url']}/api/stories",
+            headers=ctx["headers"],
+            params=params,
+            timeout=ctx["timeout"],
+        )
+        body = response.content
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        size = len(body)
+    return statistics.median(latencies), size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="故事列表分页/投影基准测试")
+    parser.add_argument("--base-url", default=loadtest.DEFAULT_BASE_URL)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--cleanup", action="store_true", help="结束后删除写入的测试故事")
+    args = parser.parse_args(argv)
+
+    ctx = {
+        "base_url": args.base_url.rstrip("/"),
+        "headers": {"Authorization": f"Bearer {args.token}"},
+        "timeout": 120.0,
+    }
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+
+    created = []
+    print(f"{'故事数':>8} {'模式':<14} {'响应体积':>12} {'延迟(中位数)':>14}")
+    try:
+        for size in sizes:
+            if size > len(created):
+                created += seed_stories(ctx, len(created), size, args.workers)
+            for name, params in MODES.items():
+                latency, body_size = measure(ctx, params, args.repeat)
+                print(f"{size:>8} {name:<14} {body_size / 1024:>10.1f}KB {latency:>12.1f}ms")
+    finally:
+        if args.cleanup and created:
+            print(f"\n清理 {len(created)} 条测试故事...")
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                list(pool.map(
+                    lambda story_id: requests.delete(
+                        f"{ctx['base_url']}/api/stories/{story_id}", headers=ctx["headers"], timeout=30
+                    ),
+                    created,
+                ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+/**
+ * 迭代排期基准
+ *
+ * 生成带依赖的合成故事集，分别用原 StoryMap.autoAssignSprints 的逐条实现（每个依赖在已排期
+ * 数组中线性查找，导出与渲染时按 Release、Sprint 反复过滤）和排期引擎
+ * （src/services/SprintScheduler.ts）完成排期与分组，校验引擎结果满足依赖先后与速率约束，
+ * 并对比耗时（各取多轮最佳）。
+ *
+ * 用法示例（Node 22+）:
+ *     node --experimental-transform-types --no-warnings skills/requests/bench-sprint-scheduler.ts --stories 10000 --velocity 20 --cycles 3 --rounds 5
+ */
+const { scheduleSprints, groupByRelease } = await import('../../src/services/SprintScheduler.ts');
+
+const args = process.argv.slice(2);
+const option = (name: string, fallback: number) => {
+  const index = args.indexOf(`--${name}`);
+  return index >= 0 ? Number(args[index + 1]) : fallback;
+};
+const STORIES = option('stories', 10000);
+const VELOCITY = option('velocity', 20);
+const DEPENDENCY_RATE = option('dependency-rate', 0.3);
+const CYCLES = option('cycles', 0);
+const LEGACY_LIMIT = option('legacy-limit', 20000);
+const ROUNDS = option('rounds', 5);
+const SEED = option('seed', 42);
+
+type Story = {
+  id: string;
+  title: string;
+  storyPoints: number;
+  dependencies: string[];
+  priority: '高' | '中' | '低';
+  sprint?: number;
+  release?: string;
+};
+
+const random = (() => {
+  let state = SEED >>> 0;
+  return () => {
+    state = (Math.imul(state, 1664525) + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+})();
+
+// 依赖只指向编号更小的故事（无环），再按 --cycles 注入若干个环
+const stories: Story[] = Array.from({ length: STORIES }, (_, index) => ({
+  id: `story-${index}`,
+  title: `故事 ${index}`,
+  storyPoints: Math.ceil(random() * 8) + 1,
+  dependencies: [],
+  priority: (['高', '中', '低'] as const)[Math.floor(random() * 3)],
+}));
+stories.forEach((story, index) => {
+  while (index > 0 && random() < DEPENDENCY_RATE && story.dependencies.length < 3) {
+    story.dependencies.push(stories[Math.floor(random() * index)].id);
+  }
+});
+for (let cycle = 0; cycle < CYCLES; cycle++) {
+  const a = Math.floor(random() * STORIES);
+  const b = Math.floor(random() * STORIES);
+  if (a !== b) {
+    stories[a].dependencies.push(stories[b].id);
+    stories[b].dependencies.push(stories[a].id);
+  }
+}
+
+// ---------------------------------------------------------------
+// 原实现：按优先级排序后逐条排期，依赖在已排期数组中线性查找
+// ---------------------------------------------------------------
+
+const legacySchedule = (input: Story[]) => {
+  let currentSprint = 1;
+  let currentPoints = 0;
+  let currentRelease = 1;
+  let sprintsInRelease = 0;
+
+  const priorityOrder: { [key: string]: number } = { '高': 3, '中': 2, '低': 1 };
+  const sorted = [...input].sort((a, b) => (priorityOrder[b.priority] || 0) - (priorityOrder[a.priority] || 0));
+  const updated: Story[] = [];
+
+  for (const story of sorted) {
+    const dependencyMet = story.dependencies.every((depId) => {
+      const dep = updated.find((s) => s.id === depId);
+      return dep && dep.sprint && dep.sprint < currentSprint;
+    });
+
+    if (!dependencyMet && story.dependencies.length > 0) {
+      currentSprint++;
+      currentPoints = 0;
+      sprintsInRelease++;
+    }
+
+    if (currentPoints + story.storyPoints > VELOCITY) {
+      currentSprint++;
+      currentPoints = 0;
+      sprintsInRelease++;
+      if (sprintsInRelease >= 3) {
+        currentRelease++;
+        sprintsInRelease = 0;
+      }
+    }
+
+    currentPoints += story.storyPoints;
+    updated.push({ ...story, sprint: currentSprint, release: `R${currentRelease}` });
+  }
+  return updated;
+};
+
+const legacyGroup = (input: Story[]) => {
+  const releases = Array.from(new Set(input.map((s) => s.release).filter(Boolean)));
+  let groups = 0;
+  releases.forEach((release) => {
+    const releaseStories = input.filter((s) => s.release === release);
+    const sprints = Array.from(new Set(releaseStories.map((s) => s.sprint).filter(Boolean)));
+    sprints.forEach((sprint) => {
+      const sprintStories = releaseStories.filter((s) => s.sprint === sprint);
+      groups += sprintStories.length > 0 ? 1 : 0;
+    });
+  });
+  return groups;
+};
+
+// ---------------------------------------------------------------
+// 校验与计时
+// ---------------------------------------------------------------
+
+// 多轮取最佳，首轮同时作为 JIT 预热
+const time = <R>(fn: () => R, rounds = ROUNDS): [R, number] => {
+  let result!: R;
+  let best = Infinity;
+  for (let round = 0; round < rounds; round++) {
+    const start = performance.now();
+    result = fn();
+    best = Math.min(best, performance.now() - start);
+  }
+  return [result, best];
+};
+
+const [schedule, scheduleMs] = time(() => scheduleSprints(stories, { velocity: VELOCITY }));
+const [groups, groupMs] = time(() => groupByRelease(schedule.stories));
+
+const sprintById = new Map(schedule.stories.map(story => [story.id, story.sprint]));
+let violations = 0;
+let overfull = 0;
+for (const story of schedule.stories) {
+  if (!story.sprint) continue;
+  for (const dependency of story.dependencies) {
+    const sprint = sprintById.get(dependency);
+    if (!sprint || sprint >= story.sprint) violations++;
+  }
+}
+for (const release of groups) {
+  for (const sprint of release.sprints) {
+    if (sprint.points > VELOCITY && sprint.stories.length > 1) overfull++;
+  }
+}
+const totalPoints = stories.reduce((sum, story) => sum + story.storyPoints, 0);
+const scheduledPoints = schedule.stories.reduce((sum, story) => sum + (story.sprint ? story.storyPoints : 0), 0);
+
+console.log(`=== ${STORIES.toLocaleString()} 条故事, 速率 ${VELOCITY}, 依赖比例 ${DEPENDENCY_RATE}, 注入环 ${CYCLES} ===`);
+console.log(`${'实现'.padEnd(6)} ${'排期'.padStart(12)} ${'分组'.padStart(12)} ${'Sprint 数'.padStart(10)} ${'装载率'.padStart(8)}`);
+console.log(
+  `${'引擎'.padEnd(6)} ${(scheduleMs.toFixed(1) + 'ms').padStart(12)} ${(groupMs.toFixed(1) + 'ms').padStart(12)} ${String(schedule.sprintCount).padStart(10)} ${(scheduledPoints / (schedule.sprintCount * VELOCITY) * 100).toFixed(1).padStart(7)}%`
+);
+
+if (STORIES <= LEGACY_LIMIT) {
+  const [legacy, legacyMs] = time(() => legacySchedule(stories), Math.min(ROUNDS, 2));
+  const [, legacyGroupMs] = time(() => legacyGroup(legacy), Math.min(ROUNDS, 2));
+  const legacySprints = legacy.reduce((max, story) => Math.max(max, story.sprint || 0), 0);
+  console.log(
+    `${'原实现'.padEnd(5)} ${(legacyMs.toFixed(1) + 'ms').padStart(12)} ${(legacyGroupMs.toFixed(1) + 'ms').padStart(12)} ${String(legacySprints).padStart(10)} ${(totalPoints / (legacySprints * VELOCITY) * 100).toFixed(1).padStart(7)}%`
+  );
+  console.log(`\n加速: 排期 ${(legacyMs / scheduleMs).toFixed(1)}x, 分组 ${(legacyGroupMs / groupMs).toFixed(1)}x`);
+} else {
+  console.log(`\n故事数超过 --legacy-limit ${LEGACY_LIMIT}，跳过原实现`);
+}
+
+console.log(`依赖违例: ${violations}  超载 Sprint: ${overfull}  环: ${schedule.cycles.length}  无法排期: ${schedule.stories.length - schedule.stories.filter(s => s.sprint).length}`);
+process.exitCode = violations > 0 || overfull > 0 ? 1 : 0;
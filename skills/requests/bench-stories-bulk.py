@@ -0,0 +1,132 @@
+"""故事批量写入基准测试
+
+对每个数据量 N，分别用 N 次 POST /api/stories 与一次 POST /api/stories/bulk 创建故事，
+再分别用 N 次 PUT /api/stories/:id 与一次 PATCH /api/stories/bulk 更新，
+对比总耗时、每条耗时与请求数。测试故事最后通过 DELETE /api/stories/bulk 删除。
+
+用法示例:
+    python bench-stories-bulk.py --token <JWT> --sizes 10,100,500 --batch-size 200
+    python bench-stories-bulk.py --token <JWT> --sizes 100 --workers 16   # 单条请求改为并发发送
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import loadtest
+
+
+def make_story(index):
+    return {
+        "title": f"[bench] 批量故事 {index}",
+        "description": f"作为用户，我可以批量写入第 {index} 条基准测试故事，以便评估批量接口性能",
+        "action": f"批量写入第 {index} 条基准测试故事",
+        "value": "评估批量接口性能",
+        "module": "Benchmark",
+        "priority": "P2",
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_single(ctx, method, items, workers):
+    """逐条请求；workers > 1 时并发发送"""
+    def send(item):
+        session = loadtest.get_session(workers)
+        path, body = item
+        response = session.request(
+            method, f"{ctx['base_url']}/api/stories{path}",
+            headers=ctx["headers"], json=body, timeout=ctx["timeout"],
+        )
+        response.raise_for_status()
+        return response.json()["data"]
+
+    if workers <= 1:
+        return [send(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(send, items))
+
+
+def run_bulk(ctx, method, field, items, batch_size):
+    response = requests.request(
+        method, f"{ctx['base_url']}/api/stories/bulk",
+        headers=ctx["headers"], params={"batchSize": batch_size},
+        json={field: items}, timeout=ctx["timeout"],
+    )
+    if response.status_code not in (200, 201, 207):
+        response.raise_for_status()
+    body = response.json()
+    failed = body["summary"]["failed"]
+    if failed:
+        errors = {r["error"]["message"] for r in body["data"] if not r["success"]}
+        print(f"  ⚠️  {failed} 条失败: {', '.join(sorted(errors))}")
+    return body
+
+
+def delete_bulk(ctx, ids, batch_size):
+    for start in range(0, len(ids), 1000):
+        run_bulk(ctx, "DELETE", "ids", ids[start:start + 1000], batch_size)
+
+
+def report(label, size, requests_count, ms):
+    print(
+        f"{size:>6} {label:<16} {requests_count:>6} 请求 {ms:>10.1f}ms "
+        f"{ms / size:>8.2f}ms/条 {size / (ms / 1000):>9.1f} 条/秒"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="故事批量写入基准测试")
+    parser.add_argument("--base-url", default=loadtest.DEFAULT_BASE_URL)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--sizes", default="10,100,500")
+    parser.add_argument("--batch-size", type=int, default=200, help="批量接口每条 SQL 语句写入的条数")
+    parser.add_argument("--workers", type=int, default=1, help="单条请求的并发数（默认逐个发送）")
+    args = parser.parse_args(argv)
+
+    ctx = {
+        "base_url": args.base_url.rstrip("/"),
+        "headers": {"Authorization": f"Bearer {args.token}"},
+        "timeout": 300.0,
+    }
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    print(f"=== 故事批量写入基准测试 ({ctx['base_url']}, batchSize={args.batch_size}, 单条并发 {args.workers}) ===")
+    created = []
+    try:
+        for size in sizes:
+            stories = [make_story(i) for i in range(size)]
+
+            single, ms = timed(lambda: run_single(ctx, "POST", [("", s) for s in stories], args.workers))
+            created += [story["id"] for story in single]
+            report("POST 逐条", size, size, ms)
+
+            body, bulk_ms = timed(lambda: run_bulk(ctx, "POST", "stories", stories, args.batch_size))
+            bulk_ids = [r["data"]["id"] for r in body["data"] if r["success"]]
+            created += bulk_ids
+            report("POST /bulk", size, 1, bulk_ms)
+            print(f"{'':>6} {'':<16} 加速 {ms / bulk_ms:.1f}x，SQL 批次 {body['summary']['batches']}")
+
+            updates = [(f"/{story_id}", {"priority": "P1"}) for story_id in bulk_ids]
+            _, ms = timed(lambda: run_single(ctx, "PUT", updates, args.workers))
+            report("PUT 逐条", len(updates), len(updates), ms)
+
+            patch = [{"id": story_id, "priority": "P0"} for story_id in bulk_ids]
+            body, bulk_ms = timed(lambda: run_bulk(ctx, "PATCH", "stories", patch, args.batch_size))
+            report("PATCH /bulk", len(patch), 1, bulk_ms)
+            print(f"{'':>6} {'':<16} 加速 {ms / bulk_ms:.1f}x，SQL 批次 {body['summary']['batches']}\n")
+    finally:
+        if created:
+            print(f"清理 {len(created)} 条测试故事...")
+            delete_bulk(ctx, created, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""/api/stories 单请求延迟基准测试
+
+按并发梯度请求 /api/stories，并在前后读取 /api/metrics，
+输出每请求延迟分位数以及每请求新建的 Supabase 客户端数。
+可用 --save 保存结果，在另一版本的后端上用 --baseline 对比延迟变化。
+
+用法示例:
+    python bench-stories.py --token <JWT> --save before.json   # 旧版本后端
+    python bench-stories.py --token <JWT> --baseline before.json
+"""
+import argparse
+import json
+import sys
+
+import requests
+
+import loadtest
+
+
+def fetch_metrics(ctx):
+    try:
+        response = requests.get(f"{ctx['base_url']}/api/metrics", headers=ctx["headers"], timeout=10)
+        if response.ok:
+            return response.json()["data"]
+    except requests.RequestException:
+        pass
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/api/stories 延迟基准测试")
+    parser.add_argument("--base-url", default=loadtest.DEFAULT_BASE_URL)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--levels", default="1,4,16")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--save", help="将结果保存为 JSON")
+    parser.add_argument("--baseline", help="与已保存的结果对比")
+    args = parser.parse_args(argv)
+
+    ctx = {
+        "base_url": args.base_url.rstrip("/"),
+        "headers": {"Authorization": f"Bearer {args.token}"},
+        "timeout": 30.0,
+    }
+    levels = [int(l) for l in args.levels.split(",") if l.strip()]
+
+    print(f"=== GET /api/stories 基准测试 ({ctx['base_url']}) ===")
+    results = {}
+    for concurrency in levels:
+        before = fetch_metrics(ctx)
+        stats, _ = loadtest.run_stage(loadtest.scenario_stories, concurrency, args.duration, ctx)
+        after = fetch_metrics(ctx)
+
+        line = (
+            f"并发 {concurrency:>3}: {stats['requests']:>6} 请求, {stats['throughput']:>7.1f} req/s, "
+            f"p50 {stats['p50']:>7.1f}ms, p95 {stats['p95']:>7.1f}ms, p99 {stats['p99']:>7.1f}ms"
+        )
+        if before and after and stats["requests"]:
+            created = after["supabase"]["clientsCreated"] - before["supabase"]["clientsCreated"]
+            stats["clientsPerRequest"] = created / stats["requests"]
+            line += f", 客户端创建/请求 {stats['clientsPerRequest']:.3f}"
+            line += f", 峰值并发查询 {after['supabase']['peakInFlightQueries']}"
+        print(line)
+        results[str(concurrency)] = stats
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n=== 与基线对比 ===")
+        for level, stats in results.items():
+            base = baseline.get(level)
+            if not base:
+                continue
+            deltas = ", ".join(
+                f"{key} {stats[key] - base[key]:+.1f}ms ({(stats[key] / base[key] - 1) if base[key] else 0:+.1%})"
+                for key in ("p50", "p95", "p99")
+            )
+            print(f"并发 {level:>3}: {deltas}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 结果已保存到 {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+/**
+ * 近似重复故事检测基准
+ *
+ * 生成带有改写型近似重复的合成故事集（同义替换、增删字词、标点变化），分别用
+ * MinHash/LSH 去重（src/services/StoryDeduplicator.ts）和逐对比较的朴素实现去重，
+ * 对比吞吐量、候选比较次数，并以朴素实现为基准计算召回率。
+ *
+ * 用法示例（Node 22+）:
+ *     node --experimental-transform-types --no-warnings skills/requests/bench-story-dedup.ts --stories 20000 --threshold 0.7 --naive-limit 10000
+ */
+const { StoryDeduplicator } = await import('../../src/services/StoryDeduplicator.ts');
+
+const args = process.argv.slice(2);
+const option = (name: string, fallback: number) => {
+  const index = args.indexOf(`--${name}`);
+  return index >= 0 ? Number(args[index + 1]) : fallback;
+};
+const STORIES = option('stories', 10000);
+const THRESHOLD = option('threshold', 0.7);
+const DUPLICATE_RATE = option('duplicate-rate', 0.2);
+const NAIVE_LIMIT = option('naive-limit', 10000);
+const SEED = option('seed', 42);
+
+type StoryFields = { title: string; action: string; value: string };
+
+const random = (() => {
+  let state = SEED >>> 0;
+  return () => {
+    state = (Math.imul(state, 1664525) + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+})();
+const pick = <T>(items: T[]): T => items[Math.floor(random() * items.length)];
+
+// ---------------------------------------------------------------
+// 合成故事
+// ---------------------------------------------------------------
+
+const VERBS = ['上传', '导出', '筛选', '查看', '编辑', '删除', '分享', '搜索', '归档', '审批', '订阅', '对比'];
+const OBJECTS = ['需求文档', '用户故事', '验收标准', '故事地图', '迭代计划', '评审记录', '操作日志', '团队成员', 'API 配置', '原型截图'];
+const SCOPES = ['', '批量', '按模块', '按优先级', '在移动端', '离线', '定时', '跨项目'];
+const VALUES = ['快速完成需求拆分', '减少重复的手工整理工作', '保证团队对需求理解一致', '及时发现遗漏的功能点', '提升评审效率', '控制调用成本', '（待补充）'];
+const SYNONYMS: Array<[string, string]> = [['上传', '导入'], ['查看', '浏览'], ['删除', '移除'], ['搜索', '检索'], ['需求文档', '需求文件'], ['用户故事', '故事']];
+
+// 业务实体名从常用字中随机组合，保证非注入的故事之间互不相似
+const CHARS = '客户订单合同发票库存仓储物流渠道会员积分优惠券营销活动报表预算审计权限角色部门岗位考勤薪资招聘培训资产设备工单巡检告警消息通知模板流程节点规则';
+const entity = () => Array.from({ length: 4 }, () => CHARS[Math.floor(random() * CHARS.length)]).join('');
+
+const makeStory = (): StoryFields => {
+  const action = `${pick(SCOPES)}${pick(VERBS)}${entity()}${pick(OBJECTS)}，并${pick(VERBS)}${entity()}`;
+  return {
+    title: action.length <= 15 ? action : action.substring(0, 15) + '...',
+    action,
+    value: pick(VALUES),
+  };
+};
+
+// 改写：同义替换、插入或删除个别字、改变标点与空格
+const reword = (story: StoryFields): StoryFields => {
+  let action = story.action;
+  const [from, to] = pick(SYNONYMS);
+  if (action.includes(from) && random() < 0.5) action = action.replace(from, to);
+  else if (random() < 0.5) action = action + '功能';
+  else action = action.replace('，并', '，同时');
+  return {
+    title: action.length <= 15 ? action : action.substring(0, 15) + '...',
+    action,
+    value: random() < 0.8 ? story.value : story.value + '。',
+  };
+};
+
+const stories: StoryFields[] = [];
+while (stories.length < STORIES) {
+  stories.push(stories.length > 0 && random() < DUPLICATE_RATE ? reword(pick(stories)) : makeStory());
+}
+
+// ---------------------------------------------------------------
+// 朴素实现：与所有已保留的故事逐一比较
+// ---------------------------------------------------------------
+
+const shingleSet = (story: StoryFields): Set<string> => {
+  const value = story.value === '（待补充）' ? '' : story.value;
+  const text = `${story.title}${story.action}${value}`.toLowerCase().replace(/[^\p{L}\p{N}]+/gu, '');
+  const size = Math.min(2, text.length);
+  const shingles = new Set<string>();
+  for (let i = 0; i + size <= text.length; i++) shingles.add(text.slice(i, i + size));
+  return shingles;
+};
+
+const naiveDedup = (items: StoryFields[]) => {
+  const kept: Array<{ story: StoryFields; shingles: Set<string>; action: string }> = [];
+  let comparisons = 0;
+  for (const story of items) {
+    const action = story.action.toLowerCase().trim();
+    const shingles = shingleSet(story);
+    const duplicate = kept.some(other => {
+      comparisons++;
+      if (other.action === action) return true;
+      let shared = 0;
+      for (const shingle of shingles) if (other.shingles.has(shingle)) shared++;
+      const union = shingles.size + other.shingles.size - shared;
+      return union > 0 && shared / union >= THRESHOLD;
+    });
+    if (!duplicate) kept.push({ story, shingles, action });
+  }
+  return { kept: kept.map(entry => entry.story), comparisons };
+};
+
+// ---------------------------------------------------------------
+// 计时
+// ---------------------------------------------------------------
+
+const time = <R>(fn: () => R): [R, number] => {
+  const start = performance.now();
+  const result = fn();
+  return [result, performance.now() - start];
+};
+
+// 预热 JIT
+new StoryDeduplicator<StoryFields>({ threshold: THRESHOLD }).filter(stories.slice(0, 1000));
+
+const deduplicator = new StoryDeduplicator<StoryFields>({ threshold: THRESHOLD });
+const [lshKept, lshMs] = time(() => deduplicator.filter(stories));
+const stats = deduplicator.getStats();
+
+console.log(`=== ${STORIES.toLocaleString()} 条故事, 注入重复比例 ${DUPLICATE_RATE}, 阈值 ${THRESHOLD} ===`);
+console.log(`${'方法'.padEnd(8)} ${'耗时'.padStart(10)} ${'条/秒'.padStart(12)} ${'比较次数'.padStart(14)} ${'保留'.padStart(8)} ${'去重'.padStart(8)}`);
+const row = (label: string, ms: number, count: number, comparisons: number, kept: number) =>
+  console.log(
+    `${label.padEnd(8)} ${(ms.toFixed(1) + 'ms').padStart(10)} ${Math.round(count / (ms / 1000)).toLocaleString().padStart(12)} ${comparisons.toLocaleString().padStart(14)} ${String(kept).padStart(8)} ${String(count - kept).padStart(8)}`
+  );
+
+row('LSH', lshMs, STORIES, stats.candidatePairs, lshKept.length);
+
+if (STORIES <= NAIVE_LIMIT) {
+  const [naive, naiveMs] = time(() => naiveDedup(stories));
+  row('逐对', naiveMs, STORIES, naive.comparisons, naive.kept.length);
+
+  const naiveDuplicates = STORIES - naive.kept.length;
+  const lshKeptSet = new Set(lshKept);
+  const naiveKeptSet = new Set(naive.kept);
+  const found = stories.filter(story => !naiveKeptSet.has(story) && !lshKeptSet.has(story)).length;
+  const extra = stories.filter(story => naiveKeptSet.has(story) && !lshKeptSet.has(story)).length;
+
+  console.log(`\n加速: ${(naiveMs / lshMs).toFixed(1)}x  召回率: ${naiveDuplicates > 0 ? (found / naiveDuplicates * 100).toFixed(1) : '100.0'}%  额外去重: ${extra}`);
+} else {
+  console.log(`\n故事数超过 --naive-limit ${NAIVE_LIMIT}，跳过逐对比较`);
+}
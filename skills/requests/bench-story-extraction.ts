@@ -0,0 +1,244 @@
+/**
+ * 故事启发式抽取微基准
+ *
+ * 生成中英文混合的合成需求语料，分别用逐项多遍抽取（原 StoryGenerator 实现，每次调用重建
+ * 正则与关键词数组）和编译后的单遍匹配器（src/services/StoryRules.ts）计算全部抽取信号，
+ * 校验两者结果逐句一致，并对比每秒处理句数。
+ *
+ * 用法示例（Node 22+）:
+ *     node --experimental-transform-types --no-warnings skills/requests/bench-story-extraction.ts --sentences 200000 --rounds 5
+ */
+import { register } from 'node:module';
+import { pathToFileURL } from 'node:url';
+
+// 解析 Vite 的 @/ 别名并补全 .ts 扩展名
+const SRC = new URL('../../src/', import.meta.url).href;
+register(
+  'data:text/javascript,' + encodeURIComponent(`
+    export async function resolve(specifier, context, next) {
+      if (specifier.startsWith('@/')) {
+        return next(${JSON.stringify(SRC)} + specifier.slice(2) + '.ts', context);
+      }
+      return next(specifier, context);
+    }
+  `),
+  pathToFileURL('./')
+);
+
+const { storyRuleMatcher } = await import('../../src/services/StoryRules.ts');
+
+const args = process.argv.slice(2);
+const option = (name: string, fallback: number) => {
+  const index = args.indexOf(`--${name}`);
+  return index >= 0 ? Number(args[index + 1]) : fallback;
+};
+const SENTENCES = option('sentences', 100000);
+const ROUNDS = option('rounds', 3);
+const SEED = option('seed', 42);
+
+// ---------------------------------------------------------------
+// 原实现：逐项抽取，每个方法独立扫描句子
+// ---------------------------------------------------------------
+
+const legacy = {
+  extractRole(text: string) {
+    const explicitPatterns = [
+      /作为[了一个个名]*\s*([^，,]+?)(?:，|,|我|可以|能够|需要|想要)/i,
+      /(?:^|\n)([^，,]{2,20}?)可以/,
+      /(?:^|\n)([^，,]{2,20}?)能够/
+    ];
+    for (const pattern of explicitPatterns) {
+      const match = text.match(pattern);
+      if (match) {
+        const extractedRole = match[1]?.trim();
+        if (extractedRole && extractedRole.length >= 2) return { role: extractedRole, confidence: 0.9 };
+      }
+    }
+    const roleKeywords: Record<string, string[]> = {
+      '用户': ['用户', '使用者', '终端用户', '普通用户'],
+      '管理员': ['管理员', '超级管理员', '系统管理员', 'admin'],
+      '访客': ['访客', '游客', '未登录用户', '临时用户']
+    };
+    for (const [role, keywords] of Object.entries(roleKeywords)) {
+      for (const keyword of keywords) {
+        if (text.includes(keyword)) return { role, confidence: 0.8 };
+      }
+    }
+    return { role: '用户', confidence: 0.5 };
+  },
+
+  extractAction(text: string) {
+    const actionPatterns = [
+      /(?:可以|能够|支持|允许)\s*(.+?)(?:以便|从而|为了|so\s*that|$)/i,
+      /(?:需要|要求|必须)\s*(.+?)(?:，|,|$)/i,
+      /(?:想要|希望|期望)\s*(.+?)(?:，|,|$)/i
+    ];
+    for (const pattern of actionPatterns) {
+      const match = text.match(pattern);
+      if (match) {
+        const action = match[1]?.trim();
+        if (action && action.length >= 5) return { action, confidence: 0.85 };
+      }
+    }
+    return { action: null, confidence: 0 };
+  },
+
+  extractValue(text: string) {
+    const valuePatterns = [/(?:以便|从而|为了|so\s*that)\s*(.+?)(?:。|$)/i];
+    for (const pattern of valuePatterns) {
+      const match = text.match(pattern);
+      if (match) {
+        const value = match[1]?.trim();
+        if (value && value.length >= 3) return { value, confidence: 0.9 };
+      }
+    }
+    return { value: null, confidence: 0.3 };
+  },
+
+  inferPriority(text: string) {
+    const highKeywords = ['必须', '一定', '关键', '核心', '重要', 'P0', '高优先级'];
+    const lowKeywords = ['可选', '未来', '暂缓', 'P2', '低优先级', 'nice to have'];
+    const lowerText = text.toLowerCase();
+    if (highKeywords.some(kw => lowerText.includes(kw))) return 'P0';
+    if (lowKeywords.some(kw => lowerText.includes(kw))) return 'P2';
+    return 'P1';
+  },
+
+  calculateTemplateMatch(text: string) {
+    const patterns = [
+      /As a\s+.+?\s*,?\s*I want(?: to)?\s+.+?\s*,?\s*So that\s+.+?/i,
+      /作为[了一个个名]*\s*.+?\s*[,，]?\s*(?:我)?(?:想|希望|需要|想要|可以|能够)/,
+      /.+?可以.+?以便.+/,
+      /.+?能够.+?从而.+/
+    ];
+    for (const pattern of patterns) {
+      if (pattern.test(text)) return 0.9;
+    }
+    if (/作为|As a/.test(text)) return 0.6;
+    if (/可以|能够|want|need/.test(text)) return 0.4;
+    return 0.2;
+  },
+
+  calculateSourceLength(text: string) {
+    const length = text.length;
+    if (length >= 20 && length <= 200) return 0.9;
+    if (length >= 10 && length < 20) return 0.7;
+    if (length > 200 && length <= 500) return 0.6;
+    if (length < 10) return 0.3;
+    return 0.4;
+  },
+
+  calculateLanguageClarity(text: string) {
+    const ambiguousWords = ['等等', '之类', '相关', '其他', '某些'];
+    let penalty = 0;
+    for (const word of ambiguousWords) {
+      if (text.includes(word)) penalty += 0.1;
+    }
+    return Math.max(0.9 - penalty, 0.3);
+  },
+};
+
+const legacyAnalyze = (text: string) => {
+  const role = legacy.extractRole(text);
+  const action = legacy.extractAction(text);
+  const value = legacy.extractValue(text);
+  return {
+    role: role.role,
+    roleConfidence: role.confidence,
+    action: action.action,
+    actionConfidence: action.confidence,
+    value: value.value,
+    valueConfidence: value.confidence,
+    templateMatch: legacy.calculateTemplateMatch(text),
+    sourceLength: legacy.calculateSourceLength(text),
+    languageClarity: legacy.calculateLanguageClarity(text),
+    priority: legacy.inferPriority(text),
+  };
+};
+
+// ---------------------------------------------------------------
+// 合成语料
+// ---------------------------------------------------------------
+
+const random = (() => {
+  let state = SEED >>> 0;
+  return () => {
+    state = (Math.imul(state, 1664525) + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+})();
+const pick = <T>(items: T[]): T => items[Math.floor(random() * items.length)];
+
+const ROLES = ['用户', '管理员', '普通用户', '系统管理员', '访客', '未登录用户', '运营人员', '财务专员', '客服', 'admin'];
+const ACTIONS = [
+  '上传需求文档并自动解析章节', '批量导出用户故事到 Excel', '按模块筛选故事列表', '查看故事的原文引用',
+  '修改故事的优先级和验收标准', '删除不再需要的历史文档', '配置 LLM 服务的 API Key', '分享当前会话给团队成员',
+  '在故事地图中拖拽调整顺序', '搜索包含关键字的故事',
+];
+const VALUES = [
+  '快速完成需求拆分', '减少重复的手工整理工作', '保证团队对需求理解一致', '及时发现遗漏的功能点',
+  '提升评审效率', '控制调用成本',
+];
+const MODIFIERS = ['', '', '必须', '重要：', '可选', '未来版本中', '核心功能，', 'nice to have:', 'P0 '];
+const NOISE = ['', '', '等等', '及其他相关功能', '之类的操作', '（某些场景下）'];
+const EN_ROLES = ['user', 'admin', 'product manager', 'reviewer', 'guest'];
+const EN_ACTIONS = ['upload a PRD file', 'export stories as CSV', 'filter stories by module', 'edit acceptance criteria'];
+const EN_VALUES = ['I can plan the sprint', 'the team stays aligned', 'reviews take less time'];
+
+const TEMPLATES: Array<() => string> = [
+  () => `作为${pick(ROLES)}，我希望${pick(ACTIONS)}，以便${pick(VALUES)}。`,
+  () => `${pick(MODIFIERS)}${pick(ROLES)}可以${pick(ACTIONS)}${pick(NOISE)}，从而${pick(VALUES)}。`,
+  () => `${pick(ROLES)}能够${pick(ACTIONS)}，从而${pick(VALUES)}。`,
+  () => `系统需要支持${pick(ACTIONS)}${pick(NOISE)}，${pick(MODIFIERS)}并记录操作日志。`,
+  () => `${pick(MODIFIERS)}平台允许${pick(ROLES)}${pick(ACTIONS)}，为了${pick(VALUES)}。`,
+  () => `我们期望${pick(ACTIONS)}，响应时间不超过 2 秒。`,
+  () => `As a ${pick(EN_ROLES)}, I want to ${pick(EN_ACTIONS)}, So that ${pick(EN_VALUES)}.`,
+  () => `The ${pick(EN_ROLES)} needs to ${pick(EN_ACTIONS)} so that ${pick(EN_VALUES)}.`,
+  () => `本章节描述${pick(VALUES)}的背景与${pick(NOISE) || '范围'}。`,
+];
+
+const corpus = Array.from({ length: SENTENCES }, () => pick(TEMPLATES)());
+const totalChars = corpus.reduce((sum, sentence) => sum + sentence.length, 0);
+
+// ---------------------------------------------------------------
+// 校验与计时
+// ---------------------------------------------------------------
+
+let mismatches = 0;
+for (const sentence of corpus) {
+  const expected = JSON.stringify(legacyAnalyze(sentence));
+  const actual = JSON.stringify(storyRuleMatcher.analyze(sentence));
+  if (expected !== actual) {
+    if (mismatches < 5) console.error(`不一致: ${sentence}\n  原实现: ${expected}\n  编译版: ${actual}`);
+    mismatches++;
+  }
+}
+
+const measure = (analyze: (text: string) => unknown) => {
+  let best = Infinity;
+  for (let round = 0; round < ROUNDS; round++) {
+    const start = performance.now();
+    for (const sentence of corpus) analyze(sentence);
+    best = Math.min(best, performance.now() - start);
+  }
+  return best;
+};
+
+// 预热 JIT
+measure(legacyAnalyze);
+measure(text => storyRuleMatcher.analyze(text));
+
+const legacyMs = measure(legacyAnalyze);
+const compiledMs = measure(text => storyRuleMatcher.analyze(text));
+
+const row = (label: string, ms: number) =>
+  console.log(
+    `${label.padEnd(8)} ${ms.toFixed(1).padStart(10)} ms ${Math.round(SENTENCES / (ms / 1000)).toLocaleString().padStart(12)} 句/秒 ${(totalChars / 1024 / 1024 / (ms / 1000)).toFixed(2).padStart(8)} MB/s`
+  );
+
+console.log(`=== ${SENTENCES.toLocaleString()} 句, 平均 ${(totalChars / SENTENCES).toFixed(1)} 字符, 取 ${ROUNDS} 轮最佳 ===`);
+row('多遍', legacyMs);
+row('单遍', compiledMs);
+console.log(`\n加速: ${(legacyMs / compiledMs).toFixed(2)}x  结果不一致: ${mismatches}`);
+
+process.exitCode = mismatches > 0 ? 1 : 0;
@@ -0,0 +1,160 @@
+/**
+ * 故事列表检索基准
+ *
+ * 生成合成故事集，模拟在搜索框中逐字输入查询词：原 StoryList 每次渲染对全部故事做
+ * toLowerCase + includes 过滤再排序，StoryIndex（src/services/StoryIndex.ts）使用增量筛选、二元组倒排表、
+ * 模块分桶与缓存的排序结果。校验两者每一步的结果完全一致，并对比每次按键的耗时（各取多轮最佳），
+ * 以及编辑单个故事后重新同步索引的耗时。
+ *
+ * 用法示例（Node 22+）:
+ *     node --experimental-transform-types --no-warnings skills/requests/bench-story-index.ts --stories 20000 --rounds 5
+ */
+const { StoryIndex } = await import('../../src/services/StoryIndex.ts');
+
+const args = process.argv.slice(2);
+const option = (name: string, fallback: number) => {
+  const index = args.indexOf(`--${name}`);
+  return index >= 0 ? Number(args[index + 1]) : fallback;
+};
+const STORIES = option('stories', 20000);
+const MODULES = option('modules', 24);
+const ROUNDS = option('rounds', 5);
+const SEED = option('seed', 42);
+
+type Story = {
+  id: string;
+  title: string;
+  description: string;
+  module: string;
+  priority: string;
+  confidence: { overall: number };
+};
+
+const random = (() => {
+  let state = SEED >>> 0;
+  return () => {
+    state = (Math.imul(state, 1664525) + 1013904223) >>> 0;
+    return state / 4294967296;
+  };
+})();
+const pick = <T>(items: readonly T[]) => items[Math.floor(random() * items.length)];
+
+const ROLES = ['管理员', '普通用户', '访客', '运营人员', '财务', 'Admin', 'Customer'] as const;
+const ACTIONS = ['导出订单报表', '重置登录密码', '批量导入商品', '查看库存预警', '配置审批流程', 'filter invoices', 'upload avatar', 'share dashboard'] as const;
+const VALUES = ['提高对账效率', '保证账户安全', '减少手工操作', '及时补货', 'save time', 'stay informed'] as const;
+
+const stories: Story[] = Array.from({ length: STORIES }, (_, index) => {
+  const role = pick(ROLES);
+  const action = pick(ACTIONS);
+  return {
+    id: `story-${index}`,
+    title: `${action} ${index}`,
+    description: `作为${role}，我希望${action}，以便${pick(VALUES)}`,
+    module: `模块 ${Math.floor(random() * MODULES)}`,
+    priority: pick(['P0', 'P1', 'P2', 'P3']),
+    confidence: { overall: Math.round(random() * 100) / 100 },
+  };
+});
+
+// ---------------------------------------------------------------
+// 原实现：StoryList 每次渲染时的过滤与排序
+// ---------------------------------------------------------------
+
+const legacyQuery = (input: Story[], filterModule: string, searchQuery: string, sortBy: string) => {
+  const modules = ['all', ...Array.from(new Set(input.map(s => s.module)))];
+  const result = input
+    .filter(story => {
+      const matchesModule = filterModule === 'all' || story.module === filterModule;
+      const matchesSearch = story.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
+                           story.description.toLowerCase().includes(searchQuery.toLowerCase());
+      return matchesModule && matchesSearch;
+    })
+    .sort((a, b) => {
+      switch (sortBy) {
+        case 'confidence':
+          return b.confidence.overall - a.confidence.overall;
+        case 'priority':
+          const priorityOrder: { [key: string]: number } = { 'P0': 4, 'P1': 3, 'P2': 2, 'P3': 1 };
+          return (priorityOrder[b.priority] || 0) - (priorityOrder[a.priority] || 0);
+        case 'module':
+          return a.module.localeCompare(b.module);
+        default:
+          return 0;
+      }
+    });
+  void modules;
+  return result;
+};
+
+// ---------------------------------------------------------------
+// 校验与计时
+// ---------------------------------------------------------------
+
+const time = <R>(fn: () => R, rounds = ROUNDS): [R, number] => {
+  let result!: R;
+  let best = Infinity;
+  for (let round = 0; round < rounds; round++) {
+    const start = performance.now();
+    result = fn();
+    best = Math.min(best, performance.now() - start);
+  }
+  return [result, best];
+};
+
+// 逐字输入的查询词前缀序列，覆盖中文、英文大小写与单字符查询
+const keystrokes = ['导出订单', 'Upload Av', '作为管理员'].flatMap(word =>
+  Array.from({ length: word.length }, (_, i) => word.slice(0, i + 1))
+);
+const scenarios = [
+  { module: 'all', sortBy: 'confidence' },
+  { module: 'all', sortBy: 'priority' },
+  { module: '模块 3', sortBy: 'module' },
+];
+
+const [index, buildMs] = time(() => new StoryIndex<Story>(stories), 1);
+
+// 预热：建立二元组倒排表（首次搜索时建立）并触发 JIT
+const [, gramsMs] = time(() => index.query({ search: '预热' }), 1);
+for (const query of keystrokes) {
+  legacyQuery(stories, 'all', query, 'none');
+  index.query({ search: query });
+}
+
+let mismatches = 0;
+let legacyTotal = 0;
+let indexTotal = 0;
+for (const { module, sortBy } of scenarios) {
+  for (const query of keystrokes) {
+    const [expected, legacyMs] = time(() => legacyQuery(stories, module, query, sortBy));
+    // 索引会缓存上一次查询结果，每次按键只计一轮，与真实输入一致
+    const [actual, indexMs] = time(() => index.query({ module, search: query, sortBy }), 1);
+    legacyTotal += legacyMs;
+    indexTotal += indexMs;
+    if (expected.length !== actual.length || expected.some((story, i) => story !== actual[i])) mismatches++;
+  }
+}
+
+// 编辑单个故事：生成新数组（与 App 中 onUpdateStory 一致），索引按引用比较只重建该故事
+let editTotal = 0;
+let current = stories;
+for (let edit = 0; edit < 50; edit++) {
+  const target = Math.floor(random() * current.length);
+  current = current.map((story, i) =>
+    i === target ? { ...story, title: `${story.title} 已编辑`, confidence: { overall: random() } } : story
+  );
+  const start = performance.now();
+  index.sync(current);
+  editTotal += performance.now() - start;
+}
+const [afterEdit] = time(() => index.query({ sortBy: 'confidence', search: '已编辑' }), 1);
+const expectedAfterEdit = legacyQuery(current, 'all', '已编辑', 'confidence');
+if (afterEdit.length !== expectedAfterEdit.length || expectedAfterEdit.some((story, i) => story !== afterEdit[i])) mismatches++;
+
+const steps = scenarios.length * keystrokes.length;
+console.log(`=== ${STORIES.toLocaleString()} 条故事, ${MODULES} 个模块, ${steps} 次按键 ===`);
+console.log(`索引构建: ${buildMs.toFixed(1)}ms  二元组倒排表: ${gramsMs.toFixed(1)}ms`);
+console.log(`原实现  每次按键平均 ${(legacyTotal / steps).toFixed(2)}ms`);
+console.log(`索引    每次按键平均 ${(indexTotal / steps).toFixed(2)}ms  (${(legacyTotal / indexTotal).toFixed(1)}x)`);
+console.log(`编辑后同步平均 ${(editTotal / 50).toFixed(2)}ms`);
+console.log(`结果不一致: ${mismatches}`);
+process.exitCode = mismatches > 0 ? 1 : 0;
@@ -0,0 +1,312 @@
+"""StoryWeaver 后端并发压测工具
+
+替代逐个阻塞调用的 test-script*.py：使用线程池 + 连接池会话，
+按并发梯度对后端接口施压，输出吞吐量与 p50/p95/p99 延迟直方图。
+
+用法示例:
+    python loadtest.py --base-url http://localhost:8888 --email a@b.com --password xxx
+    python loadtest.py --scenarios health,stories --levels 1,4,16,64 --duration 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "http://localhost:8888"
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32, 64]
+UPLOAD_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "test-files", "test.txt")
+
+# 直方图桶边界（毫秒）
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+# ============================================
+# 连接池会话
+# ============================================
+
+_local = threading.local()
+
+
+def get_session(pool_size):
+    """每个工作线程持有一个 keep-alive 会话，底层连接池大小与并发一致"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def login(base_url, email, password):
+    """通过 /api/auth/login 获取 JWT"""
+    response = requests.post(
+        f"{base_url}/api/auth/login",
+        json={"email": email, "password": password},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()["data"]["token"]
+
+
+# ============================================
+# 压测场景
+# ============================================
+
+def scenario_health(session, ctx):
+    return session.get(f"{ctx['base_url']}/health", timeout=ctx["timeout"])
+
+
+def scenario_stories(session, ctx):
+    return session.get(
+        f"{ctx['base_url']}/api/stories",
+        headers=ctx["headers"],
+        timeout=ctx["timeout"],
+    )
+
+
+def scenario_upload(session, ctx):
+    files = {"file": ("loadtest.txt", ctx["upload_bytes"], "text/plain")}
+    return session.post(
+        f"{ctx['base_url']}/api/files/upload",
+        headers=ctx["headers"],
+        files=files,
+        timeout=ctx["timeout"],
+    )
+
+
+def scenario_llm(session, ctx):
+    body = {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": "作为用户，我可以上传PRD文档，以便自动生成用户故事"}],
+        "max_tokens": 64,
+    }
+    return session.post(
+        f"{ctx['base_url']}/api/llm/{ctx['llm_provider']}/chat/completions",
+        headers=ctx["headers"],
+        json=body,
+        timeout=ctx["timeout"],
+    )
+
+
+SCENARIOS = {
+    "health": scenario_health,
+    "stories": scenario_stories,
+    "upload": scenario_upload,
+    "llm": scenario_llm,
+}
+
+AUTH_REQUIRED = {"stories", "upload", "llm"}
+
+
+# ============================================
+# 统计
+# ============================================
+
+def percentile(sorted_values, pct):
+    """最近秩法计算百分位"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def build_histogram(latencies):
+    counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+    for value in latencies:
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def print_histogram(latencies, width=40):
+    counts = build_histogram(latencies)
+    peak = max(counts) or 1
+    labels = [f"<= {b}ms" for b in HISTOGRAM_BUCKETS] + [f"> {HISTOGRAM_BUCKETS[-1]}ms"]
+    for label, count in zip(labels, counts):
+        if count == 0:
+            continue
+        bar = "#" * max(int(count / peak * width), 1)
+        print(f"     {label:>10} | {bar} {count}")
+
+
+def summarize(latencies, errors, status_counts, elapsed):
+    ordered = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput": total / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+        "status": dict(status_counts),
+    }
+
+
+# ============================================
+# 压测引擎
+# ============================================
+
+def run_stage(scenario, concurrency, duration, ctx):
+    """固定并发下持续施压 duration 秒，返回统计结果与原始延迟"""
+    latencies = []
+    status_counts = {}
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = get_session(concurrency)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = scenario(session, ctx)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                # 只有 2xx/3xx 计为成功；4xx（含 429）与 5xx 均为错误
+                ok = 200 <= response.status_code < 400
+                with lock:
+                    status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+                    if ok:
+                        latencies.append(elapsed_ms)
+                    else:
+                        errors[0] += 1
+            except Exception:
+                # 网络错误与场景内的异常（如响应解析失败）都计为错误，不能让工作线程静默退出
+                with lock:
+                    errors[0] += 1
+                    status_counts["error"] = status_counts.get("error", 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        # 取回结果，使工作线程中未捕获的异常（如创建会话失败）直接抛出
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors[0], status_counts, elapsed), latencies
+
+
+def ramp(name, levels, duration, ctx, max_error_rate, max_p95_ratio):
+    """逐级提升并发，直到错误率或 p95 明显劣化"""
+    scenario = SCENARIOS[name]
+    print(f"\n=== 场景: {name} ===")
+    print(f"{'并发':>6} {'请求数':>8} {'错误率':>8} {'吞吐(req/s)':>12} {'p50':>9} {'p95':>9} {'p99':>9}")
+
+    results = []
+    baseline_p95 = None
+    knee = None
+
+    for concurrency in levels:
+        stats, latencies = run_stage(scenario, concurrency, duration, ctx)
+        stats["concurrency"] = concurrency
+        results.append(stats)
+
+        print(
+            f"{concurrency:>6} {stats['requests']:>8} {stats['error_rate']:>7.1%} "
+            f"{stats['throughput']:>12.1f} {stats['p50']:>7.1f}ms {stats['p95']:>7.1f}ms {stats['p99']:>7.1f}ms"
+        )
+        if ctx["histogram"]:
+            print_histogram(latencies)
+
+        if baseline_p95 is None and stats["p95"] > 0:
+            baseline_p95 = stats["p95"]
+
+        degraded = stats["error_rate"] > max_error_rate or (
+            baseline_p95 and stats["p95"] > baseline_p95 * max_p95_ratio
+        )
+        if degraded:
+            knee = concurrency
+            print(f"⚠️  并发 {concurrency} 时服务出现劣化，停止加压")
+            break
+
+    best = max(results, key=lambda r: r["throughput"]) if results else None
+    if best:
+        print(f"✅ 峰值吞吐: {best['throughput']:.1f} req/s (并发 {best['concurrency']})")
+    if knee is None:
+        print("✅ 在测试的并发范围内未观察到劣化")
+
+    return {"scenario": name, "stages": results, "knee": knee}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="StoryWeaver 后端并发压测")
+    parser.add_argument("--base-url", default=os.environ.get("STORYWEAVER_API", DEFAULT_BASE_URL))
+    parser.add_argument("--token", default=os.environ.get("STORYWEAVER_TOKEN"))
+    parser.add_argument("--email", default=os.environ.get("STORYWEAVER_EMAIL"))
+    parser.add_argument("--password", default=os.environ.get("STORYWEAVER_PASSWORD"))
+    parser.add_argument("--scenarios", default="health,stories,upload,llm",
+                        help=f"逗号分隔，可选: {','.join(SCENARIOS)}")
+    parser.add_argument("--levels", default=",".join(str(l) for l in DEFAULT_LEVELS),
+                        help="并发梯度，逗号分隔")
+    parser.add_argument("--duration", type=float, default=5.0, help="每个并发梯度持续秒数")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--llm-provider", default="openai", choices=["openai", "claude"])
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--max-p95-ratio", type=float, default=5.0,
+                        help="p95 超过首级 p95 的倍数即视为劣化")
+    parser.add_argument("--no-histogram", action="store_true")
+    return parser.parse_args(argv)
+
+
+def build_context(args):
+    base_url = args.base_url.rstrip("/")
+    token = args.token
+    if not token and args.email and args.password:
+        token = login(base_url, args.email, args.password)
+
+    with open(UPLOAD_FILE, "rb") as f:
+        upload_bytes = f.read()
+
+    return {
+        "base_url": base_url,
+        "headers": {"Authorization": f"Bearer {token}"} if token else {},
+        "timeout": args.timeout,
+        "upload_bytes": upload_bytes,
+        "llm_provider": args.llm_provider,
+        "histogram": not args.no_histogram,
+        "authenticated": bool(token),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"❌ 未知场景: {', '.join(unknown)}")
+        return 1
+
+    levels = [int(l) for l in args.levels.split(",") if l.strip()]
+    ctx = build_context(args)
+
+    print(f"目标: {ctx['base_url']}  并发梯度: {levels}  每级 {args.duration}s")
+    reports = []
+    for name in names:
+        if name in AUTH_REQUIRED and not ctx["authenticated"]:
+            print(f"\n⚠️  跳过场景 {name}: 需要 --token 或 --email/--password")
+            continue
+        reports.append(ramp(name, levels, args.duration, ctx, args.max_error_rate, args.max_p95_ratio))
+
+    print("\n=== 汇总 ===")
+    for report in reports:
+        knee = report["knee"]
+        print(f"{report['scenario']:>8}: " + (f"并发 {knee} 出现劣化" if knee else "未劣化"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
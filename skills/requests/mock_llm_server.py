@@ -0,0 +1,389 @@
+"""本地 LLM 模拟服务
+
+同时兼容 OpenAI chat-completions 与 Anthropic messages 协议，
+用于在无网络环境下对 /api/llm 代理和 LLMOptimizer 做可复现的延迟基准测试。
+
+- 可配置延迟分布（fixed / uniform / normal / lognormal），固定随机种子保证可复现
+- stream=true 时按 token 速率输出 SSE 流
+- 按概率注入 429 / 5xx 错误
+- 返回与 createOptimizationPrompt 输出格式一致的故事 JSON；
+  批量提示（含 "### 故事 N" 分段）返回带 index 的 JSON 数组，可按概率丢弃条目以验证逐条回退
+- --simulate-generation 时非流式响应也按 token 速率计入生成耗时
+
+用法示例:
+    python mock_llm_server.py --port 9100 --latency lognormal --latency-ms 800 --jitter-ms 300
+    # 后端: OPENAI_BASE_URL=http://localhost:9100/v1 CLAUDE_BASE_URL=http://localhost:9100/v1
+    # 前端: LLMConfig.baseUrl = 'http://localhost:9100/v1'
+"""
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CJK_RE = re.compile(r"[一-龥]")
+TOKEN_RE = re.compile(r"[一-龥]|[A-Za-z0-9]{1,4}|\s+|[^\sA-Za-z0-9一-龥]")
+FIELD_RE = {
+    "role": re.compile(r"- 角色：(.*)"),
+    "action": re.compile(r"- 功能：(.*)"),
+    "value": re.compile(r"- 价值：(.*)"),
+    "module": re.compile(r"- 模块：(.*)"),
+    "priority": re.compile(r"- 优先级：(.*)"),
+}
+BATCH_ITEM_RE = re.compile(r"^### 故事 (\d+)\s*$", re.MULTILINE)
+
+
+# ============================================
+# 配置与统计
+# ============================================
+
+class MockConfig:
+    def __init__(self, args):
+        self.latency = args.latency
+        self.latency_ms = args.latency_ms
+        self.jitter_ms = args.jitter_ms
+        self.tokens_per_sec = args.tokens_per_sec
+        self.rate_429 = args.rate_429
+        self.rate_5xx = args.rate_5xx
+        self.retry_after = args.retry_after
+        self.drop_rate = args.drop_rate
+        self.simulate_generation = args.simulate_generation
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+
+    def sample_latency(self):
+        """按配置的分布采样首包延迟（秒）"""
+        with self.lock:
+            base, jitter = self.latency_ms, self.jitter_ms
+            if self.latency == "uniform":
+                value = self.rng.uniform(base - jitter, base + jitter)
+            elif self.latency == "normal":
+                value = self.rng.gauss(base, jitter)
+            elif self.latency == "lognormal":
+                # 以 base 为中位数、jitter 控制长尾
+                sigma = math.log(1 + jitter / base) if base > 0 else 0
+                value = base * math.exp(self.rng.gauss(0, sigma))
+            else:
+                value = base
+        return max(value, 0) / 1000.0
+
+    def sample_fault(self):
+        """返回需要注入的 HTTP 状态码，无故障时返回 None"""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return 503
+        return None
+
+    def should_drop(self):
+        with self.lock:
+            return self.rng.random() < self.drop_rate
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.streamed = 0
+        self.faults = {}
+        self.by_protocol = {"openai": 0, "anthropic": 0}
+
+    def record(self, protocol, stream, fault):
+        with self.lock:
+            self.requests += 1
+            self.by_protocol[protocol] += 1
+            if stream:
+                self.streamed += 1
+            if fault:
+                self.faults[str(fault)] = self.faults.get(str(fault), 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "streamed": self.streamed,
+                "faults": dict(self.faults),
+                "byProtocol": dict(self.by_protocol),
+            }
+
+
+# ============================================
+# 响应内容
+# ============================================
+
+def estimate_tokens(text):
+    cjk = len(CJK_RE.findall(text))
+    return int(round(cjk * 2 + (len(text) - cjk) * 1.2 / 4))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def extract_prompt(messages):
+    parts = []
+    for message in messages or []:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def story_fields(prompt):
+    """根据提示中的原始故事字段生成确定性的优化结果"""
+    fields = {}
+    for name, pattern in FIELD_RE.items():
+        match = pattern.search(prompt)
+        fields[name] = match.group(1).strip() if match else ""
+
+    role = fields["role"] or "用户"
+    action = fields["action"] or "上传需求文档"
+    value = fields["value"]
+    if not value or "待补充" in value:
+        value = "提升需求拆解效率"
+
+    return {
+        "title": action[:15],
+        "description": f"作为{role}，我希望{action}，以便{value}",
+        "role": role,
+        "action": action,
+        "value": value,
+        "module": fields["module"] or "默认模块",
+        "priority": fields["priority"] or "P1",
+        "changes": ["补充了业务价值", "规范了描述格式"],
+        "confidence": 0.92,
+    }
+
+
+def canned_story(prompt, config=None):
+    """单条提示返回故事对象，批量提示返回按 index 对位的故事数组"""
+    parts = BATCH_ITEM_RE.split(prompt)
+    if len(parts) < 3:
+        return json.dumps(story_fields(prompt), ensure_ascii=False)
+
+    items = []
+    for number, block in zip(parts[1::2], parts[2::2]):
+        if config and config.should_drop():
+            continue
+        items.append({"index": int(number), **story_fields(block)})
+    return json.dumps(items, ensure_ascii=False)
+
+
+# ============================================
+# HTTP 处理
+# ============================================
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            return self.send_json(200, self.stats.snapshot())
+        if self.path == "/health":
+            return self.send_json(200, {"success": True})
+        return self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if self.path == "/__reset":
+            self.stats.reset()
+            return self.send_json(200, {"success": True})
+
+        if self.path.endswith("/chat/completions"):
+            protocol = "openai"
+        elif self.path.endswith("/messages"):
+            protocol = "anthropic"
+        else:
+            return self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.send_json(400, {"error": {"message": "Invalid JSON"}})
+
+        stream = bool(body.get("stream"))
+        fault = self.config.sample_fault()
+        self.stats.record(protocol, stream, fault)
+
+        time.sleep(self.config.sample_latency())
+
+        if fault == 429:
+            return self.send_json(
+                429,
+                {"error": {"type": "rate_limit_error", "code": "rate_limit_exceeded", "message": "Rate limit exceeded"}},
+                {"Retry-After": str(self.config.retry_after)},
+            )
+        if fault:
+            return self.send_json(
+                fault,
+                {"error": {"type": "overloaded_error", "code": "server_error", "message": "Upstream overloaded"}},
+            )
+
+        model = body.get("model", "mock-model")
+        messages = list(body.get("messages") or [])
+        if protocol == "anthropic" and body.get("system"):
+            messages.insert(0, {"role": "system", "content": body["system"]})
+        prompt = extract_prompt(messages)
+        content = canned_story(prompt, self.config)
+        usage = (estimate_tokens(prompt), estimate_tokens(content))
+
+        if stream:
+            return self.stream_response(protocol, model, content, usage)
+        if self.config.simulate_generation and self.config.tokens_per_sec > 0:
+            time.sleep(usage[1] / self.config.tokens_per_sec)
+        if protocol == "anthropic":
+            return self.send_json(200, anthropic_message(model, content, usage))
+        return self.send_json(200, openai_completion(model, content, usage))
+
+    def stream_response(self, protocol, model, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        interval = 1.0 / self.config.tokens_per_sec if self.config.tokens_per_sec > 0 else 0
+        events = anthropic_stream_events if protocol == "anthropic" else openai_stream_events
+        try:
+            for index, chunk in enumerate(events(model, content, usage)):
+                if index > 0 and interval:
+                    time.sleep(interval)
+                data = chunk.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前取消（如对冲请求的落败方）
+            pass
+
+
+def openai_completion(model, content, usage):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1], "total_tokens": sum(usage)},
+    }
+
+
+def anthropic_message(model, content, usage):
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": content}],
+        "stop_reason": "end_turn",
+        "usage": {"input_tokens": usage[0], "output_tokens": usage[1]},
+    }
+
+
+def openai_stream_events(model, content, usage):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+
+    def chunk(delta, finish_reason=None):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for token in tokenize(content):
+        yield chunk({"content": token})
+    yield chunk({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+def anthropic_stream_events(model, content, usage):
+    def event(name, payload):
+        return f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    message = anthropic_message(model, "", (usage[0], 0))
+    message["content"] = []
+    yield event("message_start", {"type": "message_start", "message": message})
+    yield event("content_block_start", {"type": "content_block_start", "index": 0,
+                                        "content_block": {"type": "text", "text": ""}})
+    for token in tokenize(content):
+        yield event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                            "delta": {"type": "text_delta", "text": token}})
+    yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                  "usage": {"output_tokens": usage[1]}})
+    yield event("message_stop", {"type": "message_stop"})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="StoryWeaver 本地 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="首包延迟中位数/均值（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="延迟离散程度（毫秒）")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="流式输出速率")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 注入概率")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="503 注入概率")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 响应的 Retry-After 秒数")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="批量响应中丢弃单个条目的概率")
+    parser.add_argument("--simulate-generation", action="store_true", help="非流式响应同样按流速计入生成耗时")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def create_server(args):
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {
+        "config": MockConfig(args),
+        "stats": MockStats(),
+    })
+    return ThreadingHTTPServer((args.host, args.port), handler)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = create_server(args)
+    print(f"✅ 模拟 LLM 服务已启动: http://{args.host}:{args.port}/v1")
+    print(f"   延迟: {args.latency} {args.latency_ms}ms ±{args.jitter_ms}ms  流速: {args.tokens_per_sec} token/s")
+    print(f"   故障注入: 429={args.rate_429:.0%} 5xx={args.rate_5xx:.0%}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
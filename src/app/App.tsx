@@ -10,12 +10,14 @@ import { Card } from '@/app/components/ui/card';
 import { Sparkles, FileText, BarChart3, Upload, Map, Search, Code2, Settings } from 'lucide-react';
 import { Toaster } from '@/app/components/ui/sonner';
 
-import { Priority, StoryStatus } from '@/types/storyweaver';
+import { Priority, StoryStatus, type ParsedDocument } from '@/types/storyweaver';
 import { Story } from '@/types/storyweaver';
 import { LLMConfig, LLMModel } from '@/services/LLMService';
 
 export default function App() {
   const [stories, setStories] = useState<Story[]>([]);
+  // 按文件名保存的最近一次解析结果，重新上传修订版时用于按章节增量处理
+  const [documentVersions, setDocumentVersions] = useState<Record<string, ParsedDocument>>({});
   const [activeTab, setActiveTab] = useState('upload');
   const [llmConfig, setLLMConfig] = useState<LLMConfig>({
     model: LLMModel.GPT4oMini,
@@ -73,6 +75,8 @@ export default function App() {
         throw new Error('连接超时，请检查网络或 API 地址');
       } else if (error.message?.includes('LLM_004')) {
         throw new Error('API 响应无效');
+      } else if (error.message?.includes('LLM_007')) {
+        throw new Error('服务提供方持续故障，已暂停请求，请稍后重试');
       } else if (error.message?.includes('fetch') || error.message?.includes('Failed to fetch')) {
         throw new Error('网络错误：无法连接到 API 服务器。如果是浏览器环境，可能是 CORS 跨域限制，请使用代理服务器或后端中转');
       } else {
@@ -82,8 +86,14 @@ export default function App() {
     }
   };
 
-  const handleFileProcessed = (newStories: Story[]) => {
-    setStories(newStories);
+  // 新文档的故事追加到列表；同名文件重新上传时替换其上一版本的故事
+  const handleFileProcessed = (newStories: Story[], document: ParsedDocument) => {
+    const previousId = documentVersions[document.fileName]?.id;
+    setDocumentVersions(prev => ({ ...prev, [document.fileName]: document }));
+    setStories(prev => [
+      ...prev.filter(story => !previousId || story.documentId !== previousId),
+      ...newStories,
+    ]);
     setActiveTab('stories');
   };
 
@@ -196,6 +206,8 @@ export default function App() {
             <FileUpload 
               onFileProcessed={handleFileProcessed} 
               llmConfig={llmConfig}
+              stories={stories}
+              previousVersions={documentVersions}
             />
 
             <div className="mt-12 grid grid-cols-1 md:grid-cols-3 gap-6 max-w-5xl mx-auto">
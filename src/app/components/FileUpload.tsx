@@ -1,22 +1,59 @@
 import { Upload, FileText, X, CheckCircle, AlertCircle } from 'lucide-react';
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useRef } from 'react';
 import { Button } from '@/app/components/ui/button';
 import { Progress } from '@/app/components/ui/progress';
 import { DocumentParser } from '@/services/DocumentParser';
-import { Priority } from '@/types/storyweaver';
+import { Priority, type ParsedDocument } from '@/types/storyweaver';
 import { LLMConfig } from '@/services/LLMService';
 
 interface FileUploadProps {
-  onFileProcessed: (stories: any[]) => void;
+  onFileProcessed: (stories: any[], document: ParsedDocument) => void;
   llmConfig?: LLMConfig;
+  // 当前故事列表（含用户编辑），新文档中与其重复的故事不再加入
+  stories?: any[];
+  // 按文件名保存的上一次解析结果（由 App 持有，切换标签页卸载本组件后仍然保留）
+  previousVersions?: Record<string, ParsedDocument>;
 }
 
-export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
+const formatPriority = (priority: Priority) =>
+  priority === Priority.P0 ? '高' : priority === Priority.P1 ? '中' : '低';
+
+const PRIORITY_BY_LABEL: Record<string, Priority> = { '高': Priority.P0, '中': Priority.P1, '低': Priority.P2 };
+
+// 上一版本的故事以当前列表中的版本为准：合入用户对标题、描述、模块与优先级的编辑，
+// 用户已删除的故事不再沿用
+function withEdits(previous: ParsedDocument, stories: any[]): ParsedDocument {
+  const current = new Map(stories.map(story => [story.id, story]));
+  return {
+    ...previous,
+    stories: (previous.stories || []).flatMap(story => {
+      const edited = current.get(story.id);
+      if (!edited) return [];
+      return [{
+        ...story,
+        title: edited.title,
+        description: edited.description,
+        module: edited.module,
+        priority: edited.priority === formatPriority(story.priority)
+          ? story.priority
+          : PRIORITY_BY_LABEL[edited.priority] ?? story.priority,
+      }];
+    }),
+  };
+}
+
+export function FileUpload({ onFileProcessed, llmConfig, stories = [], previousVersions = {} }: FileUploadProps) {
   const [isDragging, setIsDragging] = useState(false);
   const [uploadedFile, setUploadedFile] = useState<File | null>(null);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [uploadStatus, setUploadStatus] = useState<'idle' | 'uploading' | 'processing' | 'success' | 'error'>('idle');
   const [errorMessage, setErrorMessage] = useState('');
+  const [generationProgress, setGenerationProgress] = useState({ completed: 0, total: 0 });
+  const [streamingStory, setStreamingStory] = useState<{ title?: string; description?: string }>({});
+  const [reusedSections, setReusedSections] = useState(0);
+  const [scanProgress, setScanProgress] = useState({ sections: 0, scannedChars: 0, totalChars: 0 });
+  // 当前解析任务的取消控制器
+  const parseController = useRef<AbortController | null>(null);
 
   const validateFile = (file: File): { valid: boolean; error?: string } => {
     const maxSize = 20 * 1024 * 1024; // 20MB
@@ -55,11 +92,46 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
     }
 
     setUploadStatus('processing');
+    setGenerationProgress({ completed: 0, total: 0 });
+    setScanProgress({ sections: 0, scannedChars: 0, totalChars: 0 });
+    setStreamingStory({});
     await new Promise(resolve => setTimeout(resolve, 500));
 
-    // Parse file using DocumentParser
+    // Parse file using DocumentParser（扫描与规则生成在文档 Worker 中执行）
+    parseController.current?.abort();
+    const controller = new AbortController();
+    parseController.current = controller;
+
+    // 再次上传同名文件（修订版）时只重新处理变化的章节
+    const previous = previousVersions[file.name];
+    // 同名文件上一版本的故事会被本次结果取代，不参与重复比较
+    const existingStories = stories.filter(story => !previous || story.documentId !== previous.id);
     const parser = new DocumentParser(llmConfig);
-    const parsedDoc = await parser.parseFile(file);
+    let parsedDoc: ParsedDocument;
+    try {
+      parsedDoc = await parser.parseFile(file, {
+        signal: controller.signal,
+        previous: previous && withEdits(previous, stories),
+        existingStories,
+        onSection: ({ order, scannedChars, totalChars }) =>
+          setScanProgress({ sections: order + 1, scannedChars, totalChars }),
+        onProgress: (completed, total) => setGenerationProgress({ completed, total }),
+        // 流式优化中的故事逐字段展示
+        onStoryField: (_index, field, value) => {
+          if (typeof value !== 'string') return;
+          if (field === 'title') setStreamingStory({ title: value });
+          if (field === 'description') setStreamingStory(prev => ({ ...prev, description: value }));
+        },
+      });
+    } catch (error) {
+      // 用户取消时界面已由 resetUpload 复位
+      if (controller.signal.aborted) return;
+      setUploadStatus('error');
+      setErrorMessage(error instanceof Error ? error.message : '文档解析失败');
+      return;
+    } finally {
+      if (parseController.current === controller) parseController.current = null;
+    }
 
     if (parsedDoc.status === 'failed') {
       setUploadStatus('error');
@@ -67,19 +139,25 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
       return;
     }
 
+    setReusedSections(parsedDoc.reusedSectionCount || 0);
+
     // Convert parsed stories to the format expected by the app
     const formattedStories = (parsedDoc.stories || []).map(story => ({
       id: story.id,
+      documentId: story.documentId,
       title: story.title,
+      role: story.role,
+      action: story.action,
+      value: story.value,
       description: story.description,
       module: story.module,
-      priority: story.priority === Priority.P0 ? '高' : story.priority === Priority.P1 ? '中' : '低',
+      priority: formatPriority(story.priority),
       sourceReference: story.sourceReference.text,
       confidence: story.confidence.overall
     }));
 
     setUploadStatus('success');
-    onFileProcessed(formattedStories);
+    onFileProcessed(formattedStories, parsedDoc);
   };
 
   const handleFile = async (file: File) => {
@@ -96,7 +174,8 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
     await simulateProcessing(file);
   };
 
-  const handleDrop = useCallback((e: React.DragEvent) => {
+  // 不做缓存：handleFile 需要读取最新的 props（上一版本与当前故事）
+  const handleDrop = (e: React.DragEvent) => {
     e.preventDefault();
     setIsDragging(false);
 
@@ -104,7 +183,7 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
     if (file) {
       handleFile(file);
     }
-  }, []);
+  };
 
   const handleDragOver = useCallback((e: React.DragEvent) => {
     e.preventDefault();
@@ -124,8 +203,14 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
   };
 
   const resetUpload = () => {
+    parseController.current?.abort();
+    parseController.current = null;
     setUploadedFile(null);
     setUploadProgress(0);
+    setGenerationProgress({ completed: 0, total: 0 });
+    setStreamingStory({});
+    setScanProgress({ sections: 0, scannedChars: 0, totalChars: 0 });
+    setReusedSections(0);
     setUploadStatus('idle');
     setErrorMessage('');
   };
@@ -180,6 +265,30 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
             </div>
             <h3 className="text-xl">智能解析中...</h3>
             <p className="text-gray-500">正在识别章节、提取功能点、生成用户故事</p>
+            {scanProgress.totalChars > 0 && (
+              <p className="text-sm text-gray-500">
+                已扫描 {scanProgress.sections} 个章节（{Math.round((scanProgress.scannedChars / scanProgress.totalChars) * 100)}%）
+              </p>
+            )}
+            {generationProgress.total > 0 && (
+              <div className="max-w-md mx-auto">
+                <Progress value={(generationProgress.completed / generationProgress.total) * 100} className="h-2" />
+                <p className="text-sm text-gray-500 mt-2">
+                  {generationProgress.completed} / {generationProgress.total} 句
+                </p>
+              </div>
+            )}
+            {streamingStory.title && (
+              <div className="max-w-md mx-auto text-left bg-gray-50 rounded-lg p-3">
+                <p className="text-sm font-medium text-gray-700">{streamingStory.title}</p>
+                {streamingStory.description && (
+                  <p className="text-xs text-gray-500 mt-1">{streamingStory.description}</p>
+                )}
+              </div>
+            )}
+            <Button onClick={resetUpload} variant="outline">
+              取消解析
+            </Button>
           </div>
         )}
 
@@ -188,6 +297,9 @@ export function FileUpload({ onFileProcessed, llmConfig }: FileUploadProps) {
             <CheckCircle className="w-16 h-16 mx-auto text-green-500" />
             <h3 className="text-xl text-green-600">解析成功！</h3>
             <p className="text-gray-600">文件：{uploadedFile.name}</p>
+            {reusedSections > 0 && (
+              <p className="text-sm text-gray-500">与上一版本相比，{reusedSections} 个章节未变化，已沿用原有故事</p>
+            )}
             <Button onClick={resetUpload} variant="outline">
               上传新文件
             </Button>
@@ -6,13 +6,15 @@ import { Input } from '@/app/components/ui/input';
 import { Label } from '@/app/components/ui/label';
 import { Slider } from '@/app/components/ui/slider';
 import { Select } from '@/app/components/ui/select';
+import { Checkbox } from '@/app/components/ui/checkbox';
+import { Switch } from '@/app/components/ui/switch';
 import {
   SelectContent,
   SelectItem,
   SelectTrigger,
   SelectValue,
 } from '@/app/components/ui/select';
-import { LLMModel, LLMConfig } from '@/services/LLMService';
+import { LLMModel, LLMConfig, LLMServiceType, getServiceType } from '@/services/LLMService';
 
 interface LLMConfigPanelProps {
   config: LLMConfig;
@@ -31,6 +33,9 @@ export function LLMConfigPanel({
   const [model, setModel] = useState(config.model);
   const [temperature, setTemperature] = useState(config.temperature);
   const [maxTokens, setMaxTokens] = useState(config.maxTokens);
+  const [routeModels, setRouteModels] = useState<LLMModel[]>(config.routeModels ?? []);
+  const [providerKeys, setProviderKeys] = useState<Partial<Record<LLMServiceType, string>>>(config.providerKeys ?? {});
+  const [hedge, setHedge] = useState(config.hedge !== false);
   const [showKey, setShowKey] = useState(false);
   const [testResult, setTestResult] = useState<'success' | 'error' | ''>('');
   const [testMessage, setTestMessage] = useState('');
@@ -43,6 +48,9 @@ export function LLMConfigPanel({
       model,
       temperature,
       maxTokens,
+      routeModels: routeModels.filter(value => value !== model),
+      providerKeys,
+      hedge,
     });
   };
 
@@ -63,6 +71,9 @@ export function LLMConfigPanel({
       model,
       temperature,
       maxTokens,
+      routeModels: routeModels.filter(value => value !== model),
+      providerKeys,
+      hedge,
     };
     onConfigChange(currentConfig);
 
@@ -104,6 +115,15 @@ export function LLMConfigPanel({
     { value: LLMModel.Doubao, label: '豆包', price: '$0.18/1K tokens' },
   ];
 
+  // 备选模型所属、且与主模型不同的服务提供方，需分别填写 API Key
+  const routeProviders = Array.from(
+    new Set(routeModels.filter(value => value !== model).map(getServiceType))
+  ).filter(type => type !== getServiceType(model));
+
+  const toggleRouteModel = (value: LLMModel, checked: boolean) => {
+    setRouteModels(checked ? [...routeModels, value] : routeModels.filter(item => item !== value));
+  };
+
   return (
     <div className="space-y-6">
       <div className="flex items-center justify-between">
@@ -187,6 +207,48 @@ export function LLMConfigPanel({
               </p>
             </div>
 
+            <div className="space-y-2">
+              <Label>备选模型（按延迟自动路由）</Label>
+              <div className="grid grid-cols-2 gap-2">
+                {modelOptions
+                  .filter(option => option.value !== model)
+                  .map(option => (
+                    <label key={option.value} className="flex items-center gap-2 text-sm">
+                      <Checkbox
+                        checked={routeModels.includes(option.value)}
+                        onCheckedChange={(checked) => toggleRouteModel(option.value, checked === true)}
+                      />
+                      {option.label}
+                    </label>
+                  ))}
+              </div>
+              {routeProviders.map(type => (
+                <div key={type} className="flex items-center gap-2">
+                  <Label htmlFor={`provider-key-${type}`} className="w-24 shrink-0">{type}</Label>
+                  <Input
+                    id={`provider-key-${type}`}
+                    type={showKey ? 'text' : 'password'}
+                    value={providerKeys[type] ?? ''}
+                    onChange={(e) => setProviderKeys({ ...providerKeys, [type]: e.target.value })}
+                    placeholder="该服务提供方的 API Key"
+                  />
+                </div>
+              ))}
+              <div className="flex items-center gap-2">
+                <Switch
+                  id="hedge"
+                  checked={hedge}
+                  onCheckedChange={setHedge}
+                  disabled={routeModels.filter(value => value !== model).length === 0}
+                />
+                <Label htmlFor="hedge">对冲请求</Label>
+              </div>
+              <p className="text-xs text-gray-500">
+                请求发往近期响应最快且未熔断的模型；开启对冲后，响应慢于该模型 p95 延迟时向次优模型重复请求，先响应者胜出。
+                上方 API Key 只用于与主模型同一服务提供方的模型，其他服务提供方的备选模型需填写各自的 API Key，未填写时不参与路由
+              </p>
+            </div>
+
             <div className="space-y-2">
               <Label htmlFor="temperature">温度 ({temperature.toFixed(1)})</Label>
               <Slider
@@ -231,6 +293,9 @@ export function LLMConfigPanel({
                 setModel(LLMModel.GPT4oMini);
                 setTemperature(0.3);
                 setMaxTokens(2000);
+                setRouteModels([]);
+                setProviderKeys({});
+                setHedge(true);
               }}
             >
               重置默认
@@ -254,6 +319,7 @@ export function LLMConfigPanel({
                   <li>• 国内模型：DeepSeek 和豆包具有较好的价格优势</li>
                 </ul>
               </li>
+              <li>• <strong>备选模型</strong>：勾选后按近期延迟与错误率自动选择模型，持续故障的服务提供方会被暂时绕开</li>
               <li>• <strong>温度参数</strong>：0.3 提供平衡的输出质量</li>
               <li>• <strong>Token 限制</strong>：2000 足够处理大多数优化任务</li>
               <li>• <strong>成本控制</strong>：优化只会处理置信度 &lt;70% 的故事</li>
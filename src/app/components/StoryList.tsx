@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useCallback, useDeferredValue, useMemo, useState } from 'react';
 import { Button } from '@/app/components/ui/button';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '@/app/components/ui/dialog';
 import { Input } from '@/app/components/ui/input';
@@ -11,6 +11,8 @@ import { toast } from 'sonner';
 import { Priority, StoryStatus, generateUUID } from '@/types/storyweaver';
 
 import { StoryCard } from './StoryCard';
+import { VirtualList } from './VirtualList';
+import { StoryIndex } from '@/services/StoryIndex';
 
 import { Story } from '@/types/storyweaver';
 
@@ -63,28 +65,19 @@ export function StoryList({ stories, onUpdateStory, onDeleteStory, onAddStory }:
     sortOrder: 0,
   });
 
-  const modules = ['all', ...Array.from(new Set(stories.map(s => s.module)))];
+  // 索引随 stories 增量同步；搜索词延后生效，输入时不阻塞
+  const index = useMemo(() => new StoryIndex<Story>(), []);
+  const indexVersion = useMemo(() => index.sync(stories), [index, stories]);
+  const deferredQuery = useDeferredValue(searchQuery);
 
-  const filteredAndSortedStories = stories
-    .filter(story => {
-      const matchesModule = filterModule === 'all' || story.module === filterModule;
-      const matchesSearch = story.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-                           story.description.toLowerCase().includes(searchQuery.toLowerCase());
-      return matchesModule && matchesSearch;
-    })
-    .sort((a, b) => {
-      switch (sortBy) {
-        case 'confidence':
-          return b.confidence.overall - a.confidence.overall;
-        case 'priority':
-          const priorityOrder: { [key: string]: number } = { 'P0': 4, 'P1': 3, 'P2': 2, 'P3': 1 };
-          return (priorityOrder[b.priority] || 0) - (priorityOrder[a.priority] || 0);
-        case 'module':
-          return a.module.localeCompare(b.module);
-        default:
-          return 0;
-      }
-    });
+  const modules = useMemo(() => index.getModules(), [index, indexVersion]);
+
+  const filteredAndSortedStories = useMemo(
+    () => index.query({ module: filterModule, search: deferredQuery, sortBy }),
+    [index, indexVersion, filterModule, deferredQuery, sortBy]
+  );
+
+  const getStoryKey = useCallback((story: Story) => story.id, []);
 
   const exportToCSV = () => {
     const headers = ['Title', 'Description', 'Module', 'Priority', 'Source Reference', 'Confidence'];
@@ -285,7 +278,7 @@ ${story.description}
           </SelectTrigger>
           <SelectContent>
             <SelectItem value="all">全部模块</SelectItem>
-            {modules.filter(m => m !== 'all').map(module => (
+            {modules.map(module => (
               <SelectItem key={module} value={module}>{module}</SelectItem>
             ))}
           </SelectContent>
@@ -310,16 +303,19 @@ ${story.description}
           <p className="text-gray-500 text-sm mt-2">尝试调整筛选条件或添加新故事</p>
         </div>
       ) : (
-        <div className="grid gap-4">
-          {filteredAndSortedStories.map(story => (
+        <VirtualList
+          items={filteredAndSortedStories}
+          getKey={getStoryKey}
+          estimateHeight={280}
+          gap={16}
+          renderItem={story => (
             <StoryCard
-              key={story.id}
               story={story}
               onUpdate={onUpdateStory}
               onDelete={onDeleteStory}
             />
-          ))}
-        </div>
+          )}
+        />
       )}
     </div>
   );
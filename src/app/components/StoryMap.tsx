@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { memo, useCallback, useEffect, useMemo, useState } from 'react';
 import { Card } from '@/app/components/ui/card';
 import { Button } from '@/app/components/ui/button';
 import { Badge } from '@/app/components/ui/badge';
@@ -9,6 +9,8 @@ import { GripVertical, Download, Calendar } from 'lucide-react';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/app/components/ui/select';
 import { Input } from '@/app/components/ui/input';
 import { Label } from '@/app/components/ui/label';
+import { groupByRelease, scheduleSprints, type ReleaseGroup } from '@/services/SprintScheduler';
+import { VirtualList } from './VirtualList';
 
 // 内部接口定义，用于 StoryMap 组件
 interface StoryMapStory {
@@ -25,11 +27,36 @@ interface StoryMapStory {
   confidence?: number;
 }
 
+// 未分配故事每行的卡片数，与 grid-cols-1 md:grid-cols-2 lg:grid-cols-3 的断点一致
+const COLUMN_BREAKPOINTS = [
+  { query: '(min-width: 1024px)', columns: 3 },
+  { query: '(min-width: 768px)', columns: 2 },
+];
+
+const currentColumns = () =>
+  typeof window === 'undefined'
+    ? 1
+    : COLUMN_BREAKPOINTS.find(({ query }) => window.matchMedia(query).matches)?.columns ?? 1;
+
+function useResponsiveColumns(): number {
+  const [columns, setColumns] = useState(currentColumns);
+
+  useEffect(() => {
+    const queries = COLUMN_BREAKPOINTS.map(({ query }) => window.matchMedia(query));
+    const update = () => setColumns(currentColumns());
+    queries.forEach(query => query.addEventListener('change', update));
+    return () => queries.forEach(query => query.removeEventListener('change', update));
+  }, []);
+
+  return columns;
+}
+
 interface StoryMapProps {
   stories: any[];
 }
 
-function SortableStoryItem({ story }: { story: StoryMapStory }) {
+// 拖拽排序的每一项都需要挂载（dnd-kit 依赖各项的位置计算落点），因此不做窗口化，只避免无关的重复渲染
+const SortableStoryItem = memo(function SortableStoryItem({ story }: { story: StoryMapStory }) {
   const {
     attributes,
     listeners,
@@ -95,7 +122,7 @@ function SortableStoryItem({ story }: { story: StoryMapStory }) {
       </Card>
     </div>
   );
-}
+});
 
 export function StoryMap({ stories: initialStories }: StoryMapProps) {
   const [stories, setStories] = useState<StoryMapStory[]>(
@@ -110,6 +137,7 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
 
   const [teamVelocity, setTeamVelocity] = useState(10);
   const [autoAssigned, setAutoAssigned] = useState(false);
+  const [scheduleIssues, setScheduleIssues] = useState<{ cycles: string[][]; blocked: number } | null>(null);
 
   const sensors = useSensors(
     useSensor(PointerSensor),
@@ -131,69 +159,26 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
   };
 
   const autoAssignSprints = () => {
-    let currentSprint = 1;
-    let currentPoints = 0;
-    let currentRelease = 1;
-    let sprintsInRelease = 0;
-
-    const sortedStories = [...stories].sort((a, b) => {
-      const priorityOrder: { [key: string]: number } = { '高': 3, '中': 2, '低': 1 };
-      return (priorityOrder[b.priority] || 0) - (priorityOrder[a.priority] || 0);
-    });
-
-    const updatedStories = sortedStories.map((story) => {
-      // Check dependencies
-      const dependencyMet = story.dependencies.every((depId) => {
-        const dep = updatedStories.find((s) => s.id === depId);
-        return dep && dep.sprint && dep.sprint < currentSprint;
-      });
+    const schedule = scheduleSprints(stories, { velocity: teamVelocity });
 
-      if (!dependencyMet && story.dependencies.length > 0) {
-        currentSprint++;
-        currentPoints = 0;
-        sprintsInRelease++;
-      }
-
-      if (currentPoints + story.storyPoints > teamVelocity) {
-        currentSprint++;
-        currentPoints = 0;
-        sprintsInRelease++;
-
-        if (sprintsInRelease >= 3) {
-          currentRelease++;
-          sprintsInRelease = 0;
-        }
-      }
-
-      currentPoints += story.storyPoints;
-
-      return {
-        ...story,
-        sprint: currentSprint,
-        release: `R${currentRelease}`,
-      };
-    });
-
-    setStories(updatedStories);
+    setStories(schedule.stories);
+    setScheduleIssues(
+      schedule.cycles.length > 0 ? { cycles: schedule.cycles, blocked: schedule.blocked.length } : null
+    );
     setAutoAssigned(true);
   };
 
+  const releaseGroups = useMemo(() => groupByRelease(stories), [stories]);
+
   const exportStoryMap = () => {
-    const releases = Array.from(new Set(stories.map((s) => s.release).filter(Boolean)));
-    
     let exportContent = '# User Story Map\n\n';
     exportContent += `Team Velocity: ${teamVelocity} points per sprint\n\n`;
 
-    releases.forEach((release) => {
+    releaseGroups.forEach(({ release, sprints }) => {
       exportContent += `## ${release}\n\n`;
-      const releaseStories = stories.filter((s) => s.release === release);
-      const sprints = Array.from(new Set(releaseStories.map((s) => s.sprint).filter(Boolean)));
 
-      sprints.forEach((sprint) => {
-        const sprintStories = releaseStories.filter((s) => s.sprint === sprint);
-        const totalPoints = sprintStories.reduce((sum, s) => sum + s.storyPoints, 0);
-
-        exportContent += `### Sprint ${sprint} (${totalPoints} points)\n\n`;
+      sprints.forEach(({ sprint, points, stories: sprintStories }) => {
+        exportContent += `### Sprint ${sprint} (${points} points)\n\n`;
         sprintStories.forEach((story) => {
           exportContent += `- **${story.title}** (${story.storyPoints} pts, ${story.priority})\n`;
           exportContent += `  ${story.description}\n`;
@@ -213,9 +198,23 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
     link.click();
   };
 
-  const unassignedStories = stories.filter((s) => !s.sprint);
-  const assignedStories = stories.filter((s) => s.sprint);
-  const releases = Array.from(new Set(assignedStories.map((s) => s.release).filter(Boolean)));
+  const storyIds = useMemo(() => stories.map((s) => s.id), [stories]);
+  const totalPoints = useMemo(() => stories.reduce((sum, s) => sum + s.storyPoints, 0), [stories]);
+  const sprintCount = releaseGroups.reduce((sum, group) => sum + group.sprints.length, 0);
+
+  // 未分配故事按当前屏幕宽度下的列数分组，整行窗口化渲染
+  const unassignedColumns = useResponsiveColumns();
+  const unassignedRows = useMemo(() => {
+    const unassigned = stories.filter((s) => !s.sprint);
+    const rows: StoryMapStory[][] = [];
+    for (let i = 0; i < unassigned.length; i += unassignedColumns) {
+      rows.push(unassigned.slice(i, i + unassignedColumns));
+    }
+    return { count: unassigned.length, rows };
+  }, [stories, unassignedColumns]);
+
+  const getReleaseKey = useCallback((group: ReleaseGroup<StoryMapStory>) => group.release, []);
+  const getRowKey = useCallback((row: StoryMapStory[]) => row[0].id, []);
 
   return (
     <div className="space-y-6">
@@ -263,15 +262,15 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
                 总故事数: <span className="font-medium">{stories.length}</span>
               </p>
               <p className="text-sm">
-                总点数: <span className="font-medium">{stories.reduce((sum, s) => sum + s.storyPoints, 0)}</span>
+                总点数: <span className="font-medium">{totalPoints}</span>
               </p>
               {autoAssigned && (
                 <>
                   <p className="text-sm">
-                    预计 Sprint 数: <span className="font-medium">{Math.max(...assignedStories.map(s => s.sprint || 0))}</span>
+                    预计 Sprint 数: <span className="font-medium">{sprintCount}</span>
                   </p>
                   <p className="text-sm">
-                    预计 Release 数: <span className="font-medium">{releases.length}</span>
+                    预计 Release 数: <span className="font-medium">{releaseGroups.length}</span>
                   </p>
                 </>
               )}
@@ -284,7 +283,7 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
         <div>
           <h3 className="text-lg font-semibold mb-4">待排期故事 (拖拽调整优先级)</h3>
           <DndContext sensors={sensors} collisionDetection={closestCenter} onDragEnd={handleDragEnd}>
-            <SortableContext items={stories.map((s) => s.id)} strategy={verticalListSortingStrategy}>
+            <SortableContext items={storyIds} strategy={verticalListSortingStrategy}>
               <div className="space-y-2">
                 {stories.map((story) => (
                   <SortableStoryItem key={story.id} story={story} />
@@ -295,16 +294,28 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
         </div>
       ) : (
         <div className="space-y-8">
-          {releases.map((release) => {
-            const releaseStories = assignedStories.filter((s) => s.release === release);
-            const sprints = Array.from(new Set(releaseStories.map((s) => s.sprint).filter(Boolean))).sort();
+          {scheduleIssues && (
+            <Card className="p-4 border-orange-200 bg-orange-50 text-sm text-orange-800">
+              <p className="font-medium mb-1">
+                检测到 {scheduleIssues.cycles.length} 个循环依赖，相关故事及其下游 {scheduleIssues.blocked} 个故事无法排期
+              </p>
+              {scheduleIssues.cycles.slice(0, 5).map((cycle, index) => (
+                <p key={index} className="text-xs">{cycle.join(' → ')}</p>
+              ))}
+            </Card>
+          )}
 
-            return (
-              <div key={release}>
+          <VirtualList
+            items={releaseGroups}
+            getKey={getReleaseKey}
+            estimateHeight={320}
+            gap={32}
+            renderItem={({ release, points, sprints }) => (
+              <div>
                 <div className="flex items-center gap-3 mb-4">
                   <h3 className="text-xl font-bold">{release}</h3>
                   <Badge variant="outline" className="bg-green-50 text-green-700">
-                    {releaseStories.reduce((sum, s) => sum + s.storyPoints, 0)} points
+                    {points} points
                   </Badge>
                   <Badge variant="outline" className="bg-blue-50 text-blue-700">
                     {sprints.length} sprints
@@ -312,10 +323,7 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
                 </div>
 
                 <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
-                  {sprints.map((sprint) => {
-                    const sprintStories = releaseStories.filter((s) => s.sprint === sprint);
-                    const totalPoints = sprintStories.reduce((sum, s) => sum + s.storyPoints, 0);
-
+                  {sprints.map(({ sprint, points: totalPoints, stories: sprintStories }) => {
                     return (
                       <Card key={sprint} className="p-4">
                         <div className="flex items-center justify-between mb-3">
@@ -354,25 +362,34 @@ export function StoryMap({ stories: initialStories }: StoryMapProps) {
                   })}
                 </div>
               </div>
-            );
-          })}
+            )}
+          />
 
-          {unassignedStories.length > 0 && (
+          {unassignedRows.count > 0 && (
             <div>
               <h3 className="text-lg font-semibold mb-4 text-orange-600">
-                未分配故事 ({unassignedStories.length})
+                未分配故事 ({unassignedRows.count})
               </h3>
-              <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
-                {unassignedStories.map((story) => (
-                  <Card key={story.id} className="p-4 border-orange-200">
-                    <div className="font-medium mb-2">{story.title}</div>
-                    <div className="flex gap-2">
-                      <Badge variant="outline">{story.storyPoints} pts</Badge>
-                      <Badge variant="outline">{story.priority}</Badge>
-                    </div>
-                  </Card>
-                ))}
-              </div>
+              <VirtualList
+                items={unassignedRows.rows}
+                getKey={getRowKey}
+                estimateHeight={96}
+                gap={16}
+                maxHeight="50vh"
+                renderItem={(row) => (
+                  <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
+                    {row.map((story) => (
+                      <Card key={story.id} className="p-4 border-orange-200">
+                        <div className="font-medium mb-2">{story.title}</div>
+                        <div className="flex gap-2">
+                          <Badge variant="outline">{story.storyPoints} pts</Badge>
+                          <Badge variant="outline">{story.priority}</Badge>
+                        </div>
+                      </Card>
+                    ))}
+                  </div>
+                )}
+              />
             </div>
           )}
         </div>
@@ -0,0 +1,139 @@
+import { useCallback, useEffect, useLayoutEffect, useMemo, useRef, useState, type ReactNode } from 'react';
+
+// 窗口化列表：只渲染滚动容器可视区域（上下各留 overscan 像素）内的条目
+// 条目高度可变，渲染后由 ResizeObserver 测量并缓存，未测量的条目按 estimateHeight 估算；
+// 各条目的纵向偏移由前缀和得到，可视区域的起止条目用二分查找定位
+
+interface VirtualListProps<T> {
+  items: T[];
+  getKey: (item: T, index: number) => string;
+  renderItem: (item: T, index: number) => ReactNode;
+  estimateHeight: number;
+  gap?: number;
+  overscan?: number;
+  maxHeight?: string;
+  className?: string;
+}
+
+// offsets 为单调递增的前缀和，返回最后一个 offsets[i] <= value 的 i
+const findIndex = (offsets: Float64Array, value: number): number => {
+  let low = 0;
+  let high = offsets.length - 1;
+  while (low < high) {
+    const middle = (low + high + 1) >> 1;
+    if (offsets[middle] <= value) low = middle;
+    else high = middle - 1;
+  }
+  return low;
+};
+
+export function VirtualList<T>({
+  items,
+  getKey,
+  renderItem,
+  estimateHeight,
+  gap = 0,
+  overscan = 600,
+  maxHeight = '75vh',
+  className,
+}: VirtualListProps<T>) {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const heights = useRef(new Map<string, number>());
+  const [measureVersion, setMeasureVersion] = useState(0);
+  const [viewport, setViewport] = useState({ top: 0, height: 0 });
+  const frame = useRef<number | null>(null);
+
+  // 同一帧内的多次测量合并为一次重新布局
+  const scheduleLayout = useCallback(() => {
+    if (frame.current !== null) return;
+    frame.current = requestAnimationFrame(() => {
+      frame.current = null;
+      setMeasureVersion(version => version + 1);
+    });
+  }, []);
+
+  const observer = useMemo(() => {
+    if (typeof ResizeObserver === 'undefined') return null;
+    const observer: ResizeObserver = new ResizeObserver(entries => {
+      let changed = false;
+      for (const entry of entries) {
+        const element = entry.target as HTMLElement;
+        // 滚出窗口被卸载的条目停止观察，保留已测得的高度
+        if (!element.isConnected) {
+          observer.unobserve(element);
+          continue;
+        }
+        const key = element.dataset.virtualKey;
+        if (key === undefined) continue;
+        const height = element.offsetHeight;
+        if (heights.current.get(key) !== height) {
+          heights.current.set(key, height);
+          changed = true;
+        }
+      }
+      if (changed) scheduleLayout();
+    });
+    return observer;
+  }, [scheduleLayout]);
+
+  useEffect(() => () => {
+    observer?.disconnect();
+    if (frame.current !== null) cancelAnimationFrame(frame.current);
+  }, [observer]);
+
+  useLayoutEffect(() => {
+    const container = containerRef.current;
+    if (!container) return;
+
+    const update = () => setViewport({ top: container.scrollTop, height: container.clientHeight });
+    update();
+
+    const resize = typeof ResizeObserver === 'undefined' ? null : new ResizeObserver(update);
+    resize?.observe(container);
+    return () => resize?.disconnect();
+  }, []);
+
+  const keys = useMemo(() => items.map(getKey), [items, getKey]);
+
+  const offsets = useMemo(() => {
+    const result = new Float64Array(keys.length + 1);
+    for (let i = 0; i < keys.length; i++) {
+      result[i + 1] = result[i] + (heights.current.get(keys[i]) ?? estimateHeight) + gap;
+    }
+    return result;
+  }, [keys, estimateHeight, gap, measureVersion]);
+
+  const start = Math.max(findIndex(offsets, viewport.top - overscan), 0);
+  const end = Math.min(findIndex(offsets, viewport.top + viewport.height + overscan) + 1, items.length);
+
+  const measure = useCallback((element: HTMLDivElement | null) => {
+    if (element) observer?.observe(element);
+  }, [observer]);
+
+  const onScroll = () => {
+    const container = containerRef.current;
+    if (container) setViewport({ top: container.scrollTop, height: container.clientHeight });
+  };
+
+  const rendered: ReactNode[] = [];
+  for (let index = start; index < end; index++) {
+    rendered.push(
+      <div
+        key={keys[index]}
+        ref={measure}
+        data-virtual-key={keys[index]}
+        style={{ position: 'absolute', top: offsets[index], left: 0, right: 0 }}
+      >
+        {renderItem(items[index], index)}
+      </div>
+    );
+  }
+
+  return (
+    <div ref={containerRef} onScroll={onScroll} className={className} style={{ maxHeight, overflowY: 'auto' }}>
+      <div style={{ position: 'relative', height: offsets[items.length] }}>
+        {rendered}
+      </div>
+    </div>
+  );
+}
@@ -0,0 +1,150 @@
+import {
+  SectionType,
+  type DocumentSection,
+  type Story
+} from '@/types/storyweaver';
+import { StoryGenerator } from './StoryGenerator';
+import { StoryDeduplicator } from './StoryDeduplicator';
+import { createSectionDiff, iterateSections, iterateSentences } from './DocumentScanner';
+import { abortError } from './WorkerPool';
+
+// 文档 Worker 执行的任务：解析（解码、章节扫描、句子切分、规则生成故事草稿）与去重排序
+// 两类任务都是纯计算，既可在 DocumentWorker 中执行，也可在没有 Worker 的环境中直接调用
+
+export interface SectionProgress {
+  order: number;
+  title: string;
+  type: SectionType;
+  // 本章节切出的候选句数（非功能章节与沿用的章节为 0）
+  sentenceCount: number;
+  reused: boolean;
+  scannedChars: number;
+  totalChars: number;
+}
+
+// 规则生成的故事草稿，story 为 null 表示该句未识别出功能点
+export interface StoryDraft {
+  sentence: string;
+  section: { id: string; title: string };
+  story: Story | null;
+}
+
+export type DocumentJobRequest =
+  | {
+      type: 'parse';
+      documentId: string;
+      // 文本文件的原始字节（转移所有权）；无法在前端解析的格式直接给出 text
+      buffer?: ArrayBuffer;
+      text?: string;
+      previousSections?: Array<Pick<DocumentSection, 'id' | 'fingerprint'>>;
+      // 累计到该句数时（在章节边界）回传一批草稿
+      dispatchSize: number;
+    }
+  | {
+      type: 'dedup';
+      stories: Story[];
+      existingStories: Story[];
+      threshold?: number;
+    };
+
+export type DocumentJobMessage =
+  | { type: 'section'; section: SectionProgress }
+  | { type: 'stories'; drafts: StoryDraft[] };
+
+export interface ParseJobResult {
+  content: string;
+  sections: DocumentSection[];
+  reusedSectionIds: string[];
+}
+
+// 去重后保留的故事下标，已按置信度从高到低排序
+export type DedupJobResult = number[];
+
+export interface DocumentJobOptions {
+  // 在主线程直接执行时，扫描累计超过该字符数就让出一次并检查取消
+  yieldChars?: number;
+  signal?: AbortSignal;
+}
+
+const storyGenerator = new StoryGenerator();
+
+export async function runDocumentJob(
+  request: DocumentJobRequest,
+  post: (message: DocumentJobMessage) => void,
+  options: DocumentJobOptions = {}
+): Promise<ParseJobResult | DedupJobResult> {
+  return request.type === 'parse' ? parse(request, post, options) : deduplicate(request);
+}
+
+async function parse(
+  request: Extract<DocumentJobRequest, { type: 'parse' }>,
+  post: (message: DocumentJobMessage) => void,
+  { yieldChars, signal }: DocumentJobOptions
+): Promise<ParseJobResult> {
+  const content = request.text ?? new TextDecoder().decode(request.buffer);
+  const sections: DocumentSection[] = [];
+  const diff = createSectionDiff(request.previousSections);
+  let drafts: StoryDraft[] = [];
+  let scannedChars = 0;
+  let sinceYield = 0;
+
+  for (const section of iterateSections(content)) {
+    section.documentId = request.documentId;
+    sections.push(section);
+
+    const reused = diff.match(section);
+    let sentenceCount = 0;
+    if (!reused && section.type === SectionType.FUNCTIONAL) {
+      const ref = { id: section.id, title: section.title };
+      for (const sentence of iterateSentences(section.content)) {
+        const story = storyGenerator.buildStory(sentence, ref);
+        if (story) story.documentId = request.documentId;
+        drafts.push({ sentence, section: ref, story });
+        sentenceCount++;
+      }
+    }
+
+    scannedChars += section.charCount;
+    post({
+      type: 'section',
+      section: {
+        order: section.order,
+        title: section.title,
+        type: section.type,
+        sentenceCount,
+        reused,
+        scannedChars,
+        totalChars: content.length,
+      },
+    });
+
+    if (drafts.length >= request.dispatchSize) {
+      post({ type: 'stories', drafts });
+      drafts = [];
+    }
+
+    sinceYield += section.charCount;
+    if (yieldChars && sinceYield >= yieldChars) {
+      sinceYield = 0;
+      await new Promise(resolve => setTimeout(resolve, 0));
+      if (signal?.aborted) throw abortError();
+    }
+  }
+
+  if (drafts.length > 0) post({ type: 'stories', drafts });
+
+  return { content, sections, reusedSectionIds: Array.from(diff.reused) };
+}
+
+// 近似重复去重（保留先出现的故事），再按置信度排序
+function deduplicate({ stories, existingStories, threshold }: Extract<DocumentJobRequest, { type: 'dedup' }>): DedupJobResult {
+  const deduplicator = new StoryDeduplicator({ threshold });
+  const ownIds = new Set(stories.map(story => story.id));
+  deduplicator.index(existingStories.filter(story => !ownIds.has(story.id)));
+
+  const positions = new Map(stories.map((story, index) => [story, index]));
+  return deduplicator
+    .filter(stories)
+    .sort((a, b) => b.confidence.overall - a.confidence.overall)
+    .map(story => positions.get(story)!);
+}
@@ -1,14 +1,77 @@
 import { marked } from 'marked';
 import {
   DocumentStatus,
-  SectionType,
   type ParsedDocument,
-  type DocumentSection,
+  type Story,
   generateUUID,
   generateTraceId
 } from '@/types/storyweaver';
 import { StoryGenerator } from './StoryGenerator';
 import { LLMConfig, LLMModel } from './LLMService';
+import { WorkerPool, abortError, type WorkerJobOptions } from './WorkerPool';
+import {
+  runDocumentJob,
+  type DedupJobResult,
+  type DocumentJobMessage,
+  type DocumentJobRequest,
+  type ParseJobResult,
+  type SectionProgress,
+  type StoryDraft
+} from './DocumentJobs';
+
+// 故事生成进度回调，按句子顺序逐条交付
+export type ParseProgressCallback = (completed: number, total: number, story: Story | null) => void;
+
+// 流式优化中故事字段逐个到达时回调，index 为句子序号（与 onProgress 的交付顺序一致）
+export type StoryFieldProgressCallback = (index: number, field: string, value: unknown) => void;
+
+// 章节扫描进度回调，每个章节扫描完成时触发
+export type SectionProgressCallback = (progress: SectionProgress) => void;
+
+export interface ParseOptions {
+  onProgress?: ParseProgressCallback;
+  onStoryField?: StoryFieldProgressCallback;
+  onSection?: SectionProgressCallback;
+  // 取消解析：终止文档 Worker 中的扫描，取消进行中的LLM请求并跳过尚未发出的优化，parseFile 立即以 AbortError 拒绝
+  signal?: AbortSignal;
+  // 同一文档的上一版本解析结果：指纹未变的章节沿用其故事（调用方应先合入用户的编辑、去掉已删除的故事），
+  // 只重新生成新增或修改的章节
+  previous?: ParsedDocument;
+  // 近似重复判定阈值（Jaccard 相似度，0~1），默认 0.7
+  dedupThreshold?: number;
+  // 用户已有的故事：与其重复的新故事不再加入
+  existingStories?: Story[];
+}
+
+// 累计到该句数时发起一次批量生成
+const STORY_DISPATCH_SIZE = 64;
+// 没有 Worker 时在主线程扫描，累计超过该字符数时让出一次主线程
+const SCAN_YIELD_CHARS = 64 * 1024;
+// 文档 Worker 数上限（另留一个核给主线程）
+const MAX_DOCUMENT_WORKERS = 4;
+
+let documentWorkers: WorkerPool<DocumentJobRequest, DocumentJobMessage> | null | undefined;
+
+// 文档解析与去重在 Worker 池中执行；不支持 Worker 的环境退回主线程分段执行
+function runDocumentTask<R>(request: DocumentJobRequest, options: WorkerJobOptions<DocumentJobMessage>): Promise<R> {
+  if (documentWorkers === undefined) {
+    const cores = typeof navigator !== 'undefined' ? navigator.hardwareConcurrency || 2 : 2;
+    documentWorkers = typeof Worker === 'undefined'
+      ? null
+      : new WorkerPool(
+          () => new Worker(new URL('./DocumentWorker.ts', import.meta.url), { type: 'module' }),
+          Math.min(Math.max(cores - 1, 1), MAX_DOCUMENT_WORKERS)
+        );
+  }
+
+  if (documentWorkers) return documentWorkers.run<R>(request, options);
+
+  if (options.signal?.aborted) return Promise.reject(abortError());
+  return runDocumentJob(request, message => options.onMessage?.(message), {
+    yieldChars: SCAN_YIELD_CHARS,
+    signal: options.signal,
+  }) as Promise<R>;
+}
 
 export class DocumentParser {
   private storyGenerator: StoryGenerator;
@@ -33,21 +96,23 @@ export class DocumentParser {
     return !!this.llmConfig?.apiKey?.trim() && this.storyGenerator.isLLMEnabled();
   }
   
-  async parseFile(file: File): Promise<ParsedDocument> {
+  async parseFile(file: File, options: ParseOptions = {}): Promise<ParsedDocument> {
     const fileType = this.detectFileType(file);
+    const { signal } = options;
     
-    let content: string;
+    // 文本文件的字节直接转移给 Worker 解码，其余格式在前端只有占位文本
+    let source: { buffer?: ArrayBuffer; text?: string };
     try {
       switch (fileType) {
         case 'md':
         case 'txt':
-          content = await this.parseText(file);
+          source = { buffer: await file.arrayBuffer() };
           break;
         case 'docx':
-          content = await this.parseDOCX(file);
+          source = { text: await this.parseDOCX(file) };
           break;
         case 'pdf':
-          content = await this.parsePDF(file);
+          source = { text: await this.parsePDF(file) };
           break;
         default:
           throw new Error('不支持的文件格式');
@@ -67,8 +132,28 @@ export class DocumentParser {
       };
     }
     
-    const sections = this.extractSections(content);
+    // Worker 逐章节扫描并用规则生成故事草稿，分批回传；主线程只对草稿做LLM优化
+    // 未变化的章节沿用上一版本，不再生成
     const documentId = generateUUID();
+    const generation = this.createStoryStream(options);
+    const scan = await runDocumentTask<ParseJobResult>(
+      {
+        type: 'parse',
+        documentId,
+        ...source,
+        previousSections: (options.previous?.sections || []).map(({ id, fingerprint }) => ({ id, fingerprint })),
+        dispatchSize: STORY_DISPATCH_SIZE,
+      },
+      {
+        transfer: source.buffer ? [source.buffer] : [],
+        signal,
+        onMessage: (message) => {
+          if (message.type === 'section') options.onSection?.(message.section);
+          else generation.add(message.drafts);
+        },
+      }
+    );
+    const reused = new Set(scan.reusedSectionIds);
     
     const doc: ParsedDocument = {
       id: documentId,
@@ -78,18 +163,28 @@ export class DocumentParser {
       mimeType: file.type,
       status: DocumentStatus.COMPLETED,
       progress: 100,
-      rawContent: content,
-      totalChars: content.length,
-      sections,
-      sectionCount: sections.length,
+      rawContent: scan.content,
+      totalChars: scan.content.length,
+      sections: scan.sections,
+      sectionCount: scan.sections.length,
       storyCount: 0,
+      previousVersionId: options.previous?.id,
+      reusedSectionCount: reused.size,
       createdAt: new Date(),
       updatedAt: new Date(),
       sessionId: ''
     };
     
-    const stories = await this.generateStories(sections, documentId);
+    // 未变化章节的故事直接沿用（保留LLM优化结果，以及调用方合入 previous.stories 的人工编辑），仅新增或修改的章节重新生成
+    const carried = (options.previous?.stories || [])
+      .filter(story => reused.has(story.sourceReference.sectionId))
+      .map(story => ({ ...story, documentId }));
+    const generated = await generation.finish();
+    
+    const candidates = [...carried, ...generated];
+    const stories = await this.deduplicateAndSort(candidates, options);
     doc.stories = stories;
+    doc.duplicateCount = candidates.length - stories.length;
     doc.storyCount = stories.length;
     doc.averageConfidence = stories.length > 0
       ? stories.reduce((sum, s) => sum + s.confidence.overall, 0) / stories.length
@@ -109,17 +204,6 @@ export class DocumentParser {
     return 'txt';
   }
   
-  private async parseText(file: File): Promise<string> {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader();
-      reader.onload = (e) => {
-        resolve(e.target?.result as string);
-      };
-      reader.onerror = reject;
-      reader.readAsText(file);
-    });
-  }
-  
   private async parseDOCX(file: File): Promise<string> {
     try {
       const arrayBuffer = await file.arrayBuffer();
@@ -148,123 +232,80 @@ export class DocumentParser {
     return Promise.resolve('PDF文档内容（前端仅支持预览，完整解析需要后端）');
   }
   
-  private extractSections(text: string): DocumentSection[] {
-    const sectionRegex = /^(#{1,6}\s+|\d+\.\s+)(.+)$/gm;
-    const sections: DocumentSection[] = [];
-    let match;
-    let lastIndex = 0;
-    
-    const lines = text.split('\n');
-    let currentSection: DocumentSection | null = null;
-    let order = 0;
+  // 增量故事生成：Worker 每回传一批草稿（在章节边界切分）就发起一次批量优化
+  // LLM批量优化仍按章节分组；跨批次按句子顺序交付进度，total 为已回传的句子数，扫描结束后即为最终总数
+  private createStoryStream({ onProgress, onStoryField, signal }: ParseOptions) {
+    const batches: Array<Promise<Array<Story | null>>> = [];
+    const queues: Array<{ stories: Array<Story | null>; remaining: number }> = [];
+    let cursor = 0;
+    let completed = 0;
+    let total = 0;
     
-    for (let i = 0; i < lines.length; i++) {
-      const line = lines[i];
-      const headerMatch = line.match(/^(#{1,6})\s+(.+)$/);
-      
-      if (headerMatch) {
-        if (currentSection) {
-          sections.push(currentSection);
+    const flush = () => {
+      while (cursor < queues.length) {
+        const queue = queues[cursor];
+        while (queue.stories.length > 0) {
+          const story = queue.stories.shift()!;
+          queue.remaining--;
+          completed++;
+          onProgress?.(completed, total, story);
         }
-        
-        const level = headerMatch[1].length;
-        const title = headerMatch[2].trim();
-        
-        currentSection = {
-          id: generateUUID(),
-          documentId: '',
-          title,
-          content: title,
-          type: this.classifySection(title),
-          level,
-          order: order++,
-          charCount: title.length
-        };
-      } else if (currentSection && line.trim()) {
-        currentSection.content += '\n' + line;
-        currentSection.charCount += line.length + 1;
+        if (queue.remaining > 0) return;
+        cursor++;
       }
-    }
-    
-    if (currentSection) {
-      sections.push(currentSection);
-    }
-    
-    if (sections.length === 0) {
-      sections.push({
-        id: generateUUID(),
-        documentId: '',
-        title: '文档内容',
-        content: text,
-        type: SectionType.FUNCTIONAL,
-        level: 1,
-        order: 0,
-        charCount: text.length
-      });
-    }
-    
-    return sections;
-  }
-  
-  private classifySection(title: string): SectionType {
-    const titleLower = title.toLowerCase();
-    
-    const functionalKeywords = ['功能', '需求', 'feature', 'functionality', 'user story', 'requirement'];
-    const nonFunctionalKeywords = ['非功能', '性能', '安全', 'security', 'performance', 'constraint'];
-    const backgroundKeywords = ['背景', '概述', 'background', 'overview', 'introduction'];
-    
-    if (functionalKeywords.some(kw => titleLower.includes(kw))) return SectionType.FUNCTIONAL;
-    if (nonFunctionalKeywords.some(kw => titleLower.includes(kw))) return SectionType.NON_FUNCTIONAL;
-    if (backgroundKeywords.some(kw => titleLower.includes(kw))) return SectionType.BACKGROUND;
-    
-    return SectionType.FUNCTIONAL;
-  }
-  
-  private async generateStories(
-    sections: DocumentSection[],
-    documentId: string
-  ): Promise<any[]> {
-    const stories: any[] = [];
+    };
     
-    for (const section of sections) {
-      if (section.type !== SectionType.FUNCTIONAL) continue;
-      
-      const sentences = this.splitSentences(section.content);
+    return {
+      add: (drafts: StoryDraft[]) => {
+        if (drafts.length === 0 || signal?.aborted) return;
+        
+        const offset = total;
+        const queue = { stories: [] as Array<Story | null>, remaining: drafts.length };
+        total += drafts.length;
+        queues.push(queue);
+        
+        batches.push(this.storyGenerator.optimizeDrafts(
+          drafts.map(draft => draft.story),
+          drafts,
+          (story) => {
+            if (signal?.aborted) return;
+            queue.stories.push(story);
+            flush();
+          },
+          onStoryField && ((index, field, value) => onStoryField(offset + index, field, value)),
+          signal
+        ));
+      },
       
-      for (const sentence of sentences) {
-        const story = await this.storyGenerator.generateFromSentence(sentence, {
-          id: section.id,
-          title: section.title
-        });
+      // 取消时立即以 AbortError 拒绝，不等待进行中的请求收尾
+      finish: (): Promise<Story[]> => {
+        const results = Promise.all(batches).then(results =>
+          results.flat().filter((story): story is Story => !!story)
+        );
+        if (!signal) return results;
+        if (signal.aborted) return Promise.reject(abortError());
         
-        if (story) {
-          story.documentId = documentId;
-          stories.push(story);
-        }
-      }
-    }
-    
-    return this.deduplicateAndSort(stories);
-  }
-  
-  private splitSentences(text: string): string[] {
-    return text
-      .replace(/([。！？；\n]+)/g, '$1|')
-      .split('|')
-      .map(s => s.trim())
-      .filter(s => s.length >= 10);
+        return new Promise<Story[]>((resolve, reject) => {
+          const onAbort = () => reject(abortError());
+          signal.addEventListener('abort', onAbort, { once: true });
+          results.then(resolve, reject).finally(() => signal.removeEventListener('abort', onAbort));
+        });
+      },
+    };
   }
   
-  private deduplicateAndSort(stories: any[]): any[] {
-    const seen = new Set<string>();
-    const unique = stories.filter(story => {
-      const key = story.action.toLowerCase().trim();
-      if (seen.has(key)) return false;
-      seen.add(key);
-      return true;
-    });
+  // 近似重复去重（保留先出现的故事），再按置信度排序；在文档 Worker 中执行
+  private async deduplicateAndSort(
+    stories: Story[],
+    { dedupThreshold, existingStories = [], signal }: ParseOptions = {}
+  ): Promise<Story[]> {
+    if (stories.length === 0) return [];
     
-    return unique.sort((a, b) => b.confidence.overall - a.confidence.overall);
+    const kept = await runDocumentTask<DedupJobResult>(
+      { type: 'dedup', stories, existingStories, threshold: dedupThreshold },
+      { signal }
+    );
+    return kept.map(index => stories[index]);
   }
 }
 
@@ -0,0 +1,146 @@
+import {
+  SectionType,
+  type DocumentSection,
+  generateUUID
+} from '@/types/storyweaver';
+
+// 文档扫描：章节切分、章节指纹与句子切分均为纯计算，主线程与文档 Worker 共用
+
+const HEADER_PATTERN = /^(#{1,6})\s+(.+)$/;
+const SENTENCE_BOUNDARY = /[。！？；\n]+|\|/g;
+
+// cyrb53 字符串哈希（53 位），同步计算；章节指纹与响应缓存键的回退共用
+export function cyrb53(text: string): number {
+  let h1 = 0xdeadbeef;
+  let h2 = 0x41c6ce57;
+  for (let i = 0; i < text.length; i++) {
+    const ch = text.charCodeAt(i);
+    h1 = Math.imul(h1 ^ ch, 2654435761);
+    h2 = Math.imul(h2 ^ ch, 1597334677);
+  }
+  h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+  h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+  return 4294967296 * (2097151 & h2) + (h1 >>> 0);
+}
+
+// 章节指纹：足以区分同一文档内的章节修改
+export function fingerprint(text: string): string {
+  return cyrb53(text).toString(36);
+}
+
+export function classifySection(title: string): SectionType {
+  const titleLower = title.toLowerCase();
+
+  const functionalKeywords = ['功能', '需求', 'feature', 'functionality', 'user story', 'requirement'];
+  const nonFunctionalKeywords = ['非功能', '性能', '安全', 'security', 'performance', 'constraint'];
+  const backgroundKeywords = ['背景', '概述', 'background', 'overview', 'introduction'];
+
+  if (functionalKeywords.some(kw => titleLower.includes(kw))) return SectionType.FUNCTIONAL;
+  if (nonFunctionalKeywords.some(kw => titleLower.includes(kw))) return SectionType.NON_FUNCTIONAL;
+  if (backgroundKeywords.some(kw => titleLower.includes(kw))) return SectionType.BACKGROUND;
+
+  return SectionType.FUNCTIONAL;
+}
+
+// 逐行扫描，遇到下一个标题时交付上一章节；章节正文只在交付时拼接一次
+export function* iterateSections(text: string): Generator<DocumentSection> {
+  let currentSection: DocumentSection | null = null;
+  let lines: string[] = [];
+  let order = 0;
+
+  const complete = (section: DocumentSection): DocumentSection => {
+    section.content = lines.join('\n');
+    section.charCount = section.content.length;
+    section.fingerprint = fingerprint(`${section.type}\u0000${section.title}\u0000${section.content}`);
+    return section;
+  };
+
+  for (let start = 0; start <= text.length; ) {
+    let end = text.indexOf('\n', start);
+    if (end < 0) end = text.length;
+    const line = text.slice(start, end);
+    start = end + 1;
+
+    const headerMatch = line.match(HEADER_PATTERN);
+
+    if (headerMatch) {
+      if (currentSection) {
+        yield complete(currentSection);
+      }
+
+      const level = headerMatch[1].length;
+      const title = headerMatch[2].trim();
+
+      currentSection = {
+        id: generateUUID(),
+        documentId: '',
+        title,
+        content: title,
+        type: classifySection(title),
+        level,
+        order: order++,
+        charCount: title.length
+      };
+      lines = [title];
+    } else if (currentSection && line.trim()) {
+      lines.push(line);
+    }
+  }
+
+  if (currentSection) {
+    yield complete(currentSection);
+  }
+
+  if (order === 0) {
+    lines = [text];
+    yield complete({
+      id: generateUUID(),
+      documentId: '',
+      title: '文档内容',
+      content: text,
+      type: SectionType.FUNCTIONAL,
+      level: 1,
+      order: 0,
+      charCount: text.length
+    });
+  }
+}
+
+// 句子切分：在连续的句末标点/换行之后以及 "|" 处断开，去除首尾空白后保留不少于 10 个字符的句子
+export function* iterateSentences(text: string): Generator<string> {
+  let start = 0;
+
+  for (const match of text.matchAll(SENTENCE_BOUNDARY)) {
+    const boundaryEnd = match.index! + match[0].length;
+    const sentence = text.slice(start, match[0] === '|' ? match.index : boundaryEnd).trim();
+    if (sentence.length >= 10) yield sentence;
+    start = boundaryEnd;
+  }
+
+  const sentence = text.slice(start).trim();
+  if (sentence.length >= 10) yield sentence;
+}
+
+// 按指纹与上一版本对比：匹配的章节沿用上一版本的章节ID（故事的 sectionId 随之保持有效）
+// match 返回 true 表示章节未变化；reused 为沿用的章节ID集合
+export function createSectionDiff(previous: Array<Pick<DocumentSection, 'id' | 'fingerprint'>> = []) {
+  const reused = new Set<string>();
+  const candidates = new Map<string, Array<Pick<DocumentSection, 'id' | 'fingerprint'>>>();
+
+  for (const section of previous) {
+    if (!section.fingerprint) continue;
+    candidates.set(section.fingerprint, [...(candidates.get(section.fingerprint) || []), section]);
+  }
+
+  return {
+    reused,
+    match(section: DocumentSection): boolean {
+      const previousSection = candidates.get(section.fingerprint!)?.shift();
+      if (!previousSection) return false;
+
+      section.id = previousSection.id;
+      reused.add(previousSection.id);
+      return true;
+    },
+  };
+}
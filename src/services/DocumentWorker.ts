@@ -0,0 +1,5 @@
+import { serveWorkerJobs } from './WorkerPool';
+import { runDocumentJob, type DocumentJobMessage, type DocumentJobRequest } from './DocumentJobs';
+
+// 文档 Worker 入口，由 DocumentParser 的 Worker 池创建
+serveWorkerJobs<DocumentJobRequest, DocumentJobMessage>(runDocumentJob);
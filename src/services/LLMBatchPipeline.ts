@@ -0,0 +1,160 @@
+import { LLMModel, LLMServiceType, getServiceType } from './LLMService';
+
+// 单个服务提供方的并发与速率限制
+export interface ProviderLimits {
+  maxConcurrency: number;
+  requestsPerSecond: number;
+  burst: number;
+}
+
+export const DEFAULT_PROVIDER_LIMITS: Record<LLMServiceType, ProviderLimits> = {
+  [LLMServiceType.OpenAI]: { maxConcurrency: 8, requestsPerSecond: 8, burst: 8 },
+  [LLMServiceType.Claude]: { maxConcurrency: 4, requestsPerSecond: 4, burst: 4 },
+  [LLMServiceType.Google]: { maxConcurrency: 6, requestsPerSecond: 6, burst: 6 },
+  [LLMServiceType.Minimax]: { maxConcurrency: 4, requestsPerSecond: 3, burst: 4 },
+  [LLMServiceType.Kimi]: { maxConcurrency: 3, requestsPerSecond: 3, burst: 3 },
+  [LLMServiceType.GLM]: { maxConcurrency: 4, requestsPerSecond: 3, burst: 4 },
+  [LLMServiceType.Volcano]: { maxConcurrency: 4, requestsPerSecond: 4, burst: 4 },
+  [LLMServiceType.DeepSeek]: { maxConcurrency: 6, requestsPerSecond: 5, burst: 6 },
+  [LLMServiceType.Doubao]: { maxConcurrency: 4, requestsPerSecond: 4, burst: 4 },
+};
+
+const sleep = (ms: number) => new Promise<void>(resolve => setTimeout(resolve, ms));
+
+// 令牌桶：平滑请求速率，收到 RATE_LIMIT 后整体暂停
+export class TokenBucket {
+  private tokens: number;
+  private lastRefill: number;
+  private pausedUntil = 0;
+
+  constructor(private capacity: number, private refillPerSecond: number) {
+    this.tokens = capacity;
+    this.lastRefill = Date.now();
+  }
+
+  private refill() {
+    const now = Date.now();
+    const elapsed = (now - this.lastRefill) / 1000;
+    this.tokens = Math.min(this.capacity, this.tokens + elapsed * this.refillPerSecond);
+    this.lastRefill = now;
+  }
+
+  async acquire(): Promise<void> {
+    while (true) {
+      const now = Date.now();
+      if (now < this.pausedUntil) {
+        await sleep(this.pausedUntil - now);
+        continue;
+      }
+
+      this.refill();
+      if (this.tokens >= 1) {
+        this.tokens -= 1;
+        return;
+      }
+
+      await sleep(Math.ceil(((1 - this.tokens) / this.refillPerSecond) * 1000));
+    }
+  }
+
+  penalize(pauseMs: number) {
+    this.tokens = 0;
+    this.lastRefill = Date.now();
+    this.pausedUntil = Math.max(this.pausedUntil, Date.now() + pauseMs);
+  }
+}
+
+// 并发信号量
+export class Semaphore {
+  private active = 0;
+  private waiters: Array<() => void> = [];
+
+  constructor(private limit: number) {}
+
+  async acquire(): Promise<void> {
+    if (this.active < this.limit) {
+      this.active++;
+      return;
+    }
+    await new Promise<void>(resolve => this.waiters.push(resolve));
+  }
+
+  release() {
+    const next = this.waiters.shift();
+    if (next) {
+      // 名额直接移交给下一个等待者
+      next();
+    } else {
+      this.active--;
+    }
+  }
+
+  get pending(): number {
+    return this.waiters.length;
+  }
+}
+
+export class ProviderLimiter {
+  private semaphore: Semaphore;
+  private bucket: TokenBucket;
+
+  constructor(limits: ProviderLimits) {
+    this.semaphore = new Semaphore(limits.maxConcurrency);
+    this.bucket = new TokenBucket(limits.burst, limits.requestsPerSecond);
+  }
+
+  // 在并发与速率限制内执行单次请求（重试由 LLMProvider 负责，每次尝试各自经过限流）
+  async run<T>(task: () => Promise<T>): Promise<T> {
+    await this.bucket.acquire();
+    await this.semaphore.acquire();
+
+    try {
+      return await task();
+    } finally {
+      this.semaphore.release();
+    }
+  }
+
+  // 收到 RATE_LIMIT 后暂停该提供方的所有请求
+  penalize(pauseMs: number) {
+    this.bucket.penalize(pauseMs);
+  }
+}
+
+const limiters = new Map<LLMServiceType, ProviderLimiter>();
+
+// 同一服务提供方的所有优化请求共享一个限流器
+export function getProviderLimiter(model: LLMModel): ProviderLimiter {
+  const type = getServiceType(model);
+  let limiter = limiters.get(type);
+
+  if (!limiter) {
+    limiter = new ProviderLimiter(DEFAULT_PROVIDER_LIMITS[type]);
+    limiters.set(type, limiter);
+  }
+
+  return limiter;
+}
+
+// 并行执行任务，按输入顺序逐个交付已完成的连续前缀结果
+export async function runOrdered<T, R>(
+  items: T[],
+  task: (item: T, index: number) => Promise<R>,
+  onResult?: (result: R, index: number) => void
+): Promise<R[]> {
+  const results: R[] = new Array(items.length);
+  const completed: boolean[] = new Array(items.length).fill(false);
+  let nextToDeliver = 0;
+
+  await Promise.all(items.map(async (item, index) => {
+    results[index] = await task(item, index);
+    completed[index] = true;
+
+    while (nextToDeliver < items.length && completed[nextToDeliver]) {
+      onResult?.(results[nextToDeliver], nextToDeliver);
+      nextToDeliver++;
+    }
+  }));
+
+  return results;
+}
@@ -1,734 +1,47 @@
-import { LLMModel, LLMConfig, LLMAPIResponse, LLMStoryOptimizationRequest, LLMStoryOptimizationResponse, LLMErrorCode, LLMServiceType } from './LLMService';
+import { LLMModel, LLMConfig, getContextWindow, LLMStoryOptimizationRequest, LLMStoryOptimizationResponse, LLMErrorCode, LLMTokenUsage } from './LLMService';
 import { generateUUID } from '@/types/storyweaver';
+import { LLMResponseCache } from './LLMResponseCache';
+import { IncrementalJSONParser, type StreamFieldCallback } from './LLMStream';
+import { getBudgetTokenizer, getTokenizer, type Tokenizer } from './Tokenizer';
+import { SYSTEM_PROMPT, calculateCost, getLLMService, type LLMService } from './LLMProvider';
+import { LLMRouter } from './LLMRouter';
 
-// LLM服务接口
-export interface LLMService {
-  callAPI(prompt: string): Promise<string>;
-  calculateCost(promptTokens: number, completionTokens: number): number;
-  getModel(): LLMModel;
-}
-
-// OpenAI服务实现
-export class OpenAIService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://api.openai.com/v1';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: this.model,
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-          frequency_penalty: 0.5,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<LLMModel, number> = {
-      [LLMModel.GPT4oMini]: 0.15,  // $0.15 per 1K tokens
-      [LLMModel.GPT4o]: 2.5,       // $2.5 per 1K tokens
-      [LLMModel.Claude3Haiku]: 0.25, // $0.25 per 1K tokens
-      [LLMModel.Claude3Sonnet]: 3,  // $3 per 1K tokens
-      [LLMModel.Claude3Opus]: 15,  // $15 per 1K tokens
-      [LLMModel.Gemini15Flash]: 0.075, // $0.075 per 1K tokens
-      [LLMModel.Gemini15Pro]: 1.25,  // $1.25 per 1K tokens
-      // 国内大模型成本（假设值，实际需要根据官方定价调整）
-      [LLMModel.MinimaxCodingPlan]: 0.3,
-      [LLMModel.Kimi]: 0.25,
-      [LLMModel.GLMCodingPlan]: 0.4,
-      [LLMModel.VolcanoCodingPlan]: 0.35,
-      [LLMModel.DeepSeek]: 0.2,
-      [LLMModel.Doubao]: 0.18
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.15;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// Minimax服务实现
-export class MinimaxService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://api.minimax.chat/v1';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'codellama-34b', // Minimax Coding Plan模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.MinimaxCodingPlan]: 0.3,  // $0.3 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.3;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// Kimi服务实现
-export class KimiService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://api.moonshot.cn/v1';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'moonshot-v1-8k', // Kimi模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.Kimi]: 0.25,  // $0.25 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.25;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// GLM服务实现
-export class GLMService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://open.bigmodel.cn/api/paas/v4';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'glm-4', // GLM模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.GLMCodingPlan]: 0.4,  // $0.4 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.4;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// 火山引擎服务实现
-export class VolcanoService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://ark.cn-beijing.volces.com/api/v3';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'volcano-coding-plan', // 火山Coding Plan模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.VolcanoCodingPlan]: 0.35,  // $0.35 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.35;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// DeepSeek服务实现
-export class DeepSeekService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://api.deepseek.com';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/v1/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'deepseek-coder', // DeepSeek模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.DeepSeek]: 0.2,  // $0.2 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.2;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
-
-// 豆包服务实现
-export class DoubaoService implements LLMService {
-  private apiKey: string;
-  private model: LLMModel;
-  private temperature: number;
-  private maxTokens: number;
-  private requestTimeout: number;
-  private baseUrl: string;
-
-  constructor(config: LLMConfig) {
-    this.apiKey = config.apiKey;
-    this.model = config.model;
-    this.temperature = config.temperature;
-    this.maxTokens = config.maxTokens;
-    this.requestTimeout = config.requestTimeout;
-    this.baseUrl = 'https://ark.cn-beijing.volces.com/api/v3';
-  }
-
-  getModel(): LLMModel {
-    return this.model;
-  }
-
-  async callAPI(prompt: string): Promise<string> {
-    if (!this.apiKey || this.apiKey.trim() === '') {
-      throw new Error(LLMErrorCode.API_KEY_MISSING);
-    }
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), this.requestTimeout);
-
-    try {
-      const response = await fetch(`${this.baseUrl}/chat/completions`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${this.apiKey}`,
-        },
-        body: JSON.stringify({
-          model: 'ep-20240115121258-i7x27', // 豆包模型
-          messages: [
-            {
-              role: 'system',
-              content: '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。',
-            },
-            {
-              role: 'user',
-              content: prompt,
-            },
-          ],
-          temperature: this.temperature,
-          max_tokens: this.maxTokens,
-          top_p: 0.95,
-        }),
-        signal: controller.signal,
-      });
-
-      clearTimeout(timeoutId);
-
-      if (!response.ok) {
-        if (response.status === 429) {
-          throw new Error(LLMErrorCode.RATE_LIMIT);
-        } else if (response.status === 403) {
-          throw new Error(LLMErrorCode.QUOTA_EXCEEDED);
-        } else {
-          throw new Error(LLMErrorCode.API_CALL_FAILED);
-        }
-      }
-
-      const data: LLMAPIResponse = await response.json();
-
-      if (!data.choices || data.choices.length === 0) {
-        throw new Error(LLMErrorCode.INVALID_RESPONSE);
-      }
-
-      return data.choices[0].message.content;
-    } catch (error: any) {
-      clearTimeout(timeoutId);
-
-      if (error.name === 'AbortError') {
-        throw new Error(LLMErrorCode.TIMEOUT);
-      }
-
-      throw error;
-    }
-  }
-
-  calculateCost(promptTokens: number, completionTokens: number): number {
-    const costs: Record<string, number> = {
-      [LLMModel.Doubao]: 0.18,  // $0.18 per 1K tokens
-    };
-
-    const costPer1KTokens = costs[this.model] || 0.18;
-    const totalTokens = promptTokens + completionTokens;
-    return (totalTokens / 1000) * costPer1KTokens;
-  }
-}
+export { SYSTEM_PROMPT, type LLMService };
 
 // LLM服务工厂
 export class LLMServiceFactory {
+  // 相同配置返回同一个缓存的服务实例
   static createService(config: LLMConfig): LLMService {
-    // 根据模型类型选择对应的服务
-    switch (config.model) {
-      case LLMModel.MinimaxCodingPlan:
-        return new MinimaxService(config);
-      case LLMModel.Kimi:
-        return new KimiService(config);
-      case LLMModel.GLMCodingPlan:
-        return new GLMService(config);
-      case LLMModel.VolcanoCodingPlan:
-        return new VolcanoService(config);
-      case LLMModel.DeepSeek:
-        return new DeepSeekService(config);
-      case LLMModel.Doubao:
-        return new DoubaoService(config);
-      default:
-        return new OpenAIService(config);
-    }
+    return getLLMService(config);
   }
 }
 
-export class LLMOptimizer {
-  private service: LLMService;
+// 批量优化时每条故事预留的输出 token 数
+const BATCH_COMPLETION_TOKENS_PER_STORY = 400;
+const MAX_BATCH_SIZE = 8;
+// 每条故事上下文的默认 token 上限
+const DEFAULT_CONTEXT_TOKENS = 1024;
+// 对话格式开销：每条消息的角色与分隔标记，以及回复起始标记
+const CHAT_OVERHEAD_TOKENS = 11;
+const TRUNCATION_MARK = '……';
+// 首字段耗时统计保留的样本数（与 usageHistory 的上限一致）
+const FIRST_FIELD_WINDOW = 100;
 
-  constructor(config: LLMConfig) {
-    this.service = LLMServiceFactory.createService(config);
+export class LLMOptimizer {
+  private router: LLMRouter;
+  private config: LLMConfig;
+  private cache: LLMResponseCache;
+  // 请求前的上下文预算按所有候选模型中最保守的分词器与最小的上下文窗口计算；
+  // 成本按实际响应的模型的分词器计算
+  private tokenizer: Tokenizer;
+  private contextWindow: number;
+
+  constructor(config: LLMConfig, cache: LLMResponseCache = LLMResponseCache.getInstance()) {
+    this.config = config;
+    this.router = new LLMRouter(config);
+    this.cache = cache;
+    this.tokenizer = getBudgetTokenizer(this.router.getModels());
+    this.contextWindow = Math.min(...this.router.getModels().map(getContextWindow));
   }
 
   // 判断是否需要LLM优化
@@ -756,28 +69,33 @@ export class LLMOptimizer {
     return complexPatterns.some(pattern => pattern.test(text));
   }
 
-  // 优化用户故事
-  async optimizeStory(request: LLMStoryOptimizationRequest): Promise<LLMStoryOptimizationResponse> {
+  // 优化用户故事；signal 中止时取消进行中的请求
+  async optimizeStory(request: LLMStoryOptimizationRequest, signal?: AbortSignal): Promise<LLMStoryOptimizationResponse> {
     const startTime = Date.now();
 
     try {
-      const prompt = this.createOptimizationPrompt(request);
+      const prompt = this.prepareOptimizationPrompt(request);
+      const hit = await this.lookupCache(request, prompt, startTime);
+      if (hit) return hit;
+
       const apiStartTime = Date.now();
-      const response = await this.service.callAPI(prompt);
+      const { response, firstField, model, usage } = await this.requestCompletion(prompt, (field, value) => request.onField?.(field, value), signal);
       const apiCallTime = Date.now() - apiStartTime;
 
       const optimizedStory = this.parseLLMResponse(response, request.story);
+      this.cache.set(await this.cacheKey(model, prompt), response);
       const processingTime = Date.now() - startTime - apiCallTime;
       const totalTime = Date.now() - startTime;
 
+      // 成本优先按提供方报告的用量计算，响应中没有 usage 时才用分词器估算
+      const tokenizer = getTokenizer(model);
+      const promptTokens = usage?.promptTokens ?? this.countPromptTokens(prompt, tokenizer);
+      const completionTokens = usage?.completionTokens ?? tokenizer.count(response);
       const cost = {
-        promptTokens: this.estimateTokens(prompt),
-        completionTokens: this.estimateTokens(response),
-        totalTokens: this.estimateTokens(prompt) + this.estimateTokens(response),
-        costUSD: this.service.calculateCost(
-          this.estimateTokens(prompt),
-          this.estimateTokens(response)
-        ),
+        promptTokens,
+        completionTokens,
+        totalTokens: promptTokens + completionTokens,
+        costUSD: calculateCost(model, promptTokens, completionTokens),
       };
 
       return {
@@ -789,18 +107,226 @@ export class LLMOptimizer {
           apiCall: apiCallTime,
           processing: processingTime,
           total: totalTime,
+          firstField,
         },
-        model: this.service.getModel(),
+        model,
       };
     } catch (error: any) {
-      console.warn('LLM优化失败:', error.message);
+      if (!signal?.aborted) console.warn('LLM优化失败:', error.message);
       throw error;
     }
   }
 
+  // 单次批量请求可容纳的故事数：按 maxTokens 为每条故事预留输出空间
+  getBatchSize(): number {
+    const byTokens = Math.floor(this.config.maxTokens / BATCH_COMPLETION_TOKENS_PER_STORY);
+    const limit = this.config.batchSize ?? MAX_BATCH_SIZE;
+    return Math.max(1, Math.min(byTokens, limit, MAX_BATCH_SIZE));
+  }
+
+  // 批量优化：多条故事共用一份指令与输出格式说明，一次请求返回数组
+  // 返回值与 requests 一一对应，解析失败的条目为 null，由调用方逐条回退
+  async optimizeBatch(
+    requests: LLMStoryOptimizationRequest[],
+    signal?: AbortSignal
+  ): Promise<Array<LLMStoryOptimizationResponse | null>> {
+    const startTime = Date.now();
+    const results: Array<LLMStoryOptimizationResponse | null> = new Array(requests.length).fill(null);
+    const pending: Array<{ index: number; prompt: string }> = [];
+
+    // 与逐条模式共用缓存键，已缓存的故事不进入批量请求
+    for (let index = 0; index < requests.length; index++) {
+      const prompt = this.prepareOptimizationPrompt(requests[index]);
+      const hit = await this.lookupCache(requests[index], prompt, startTime);
+      if (hit) {
+        results[index] = hit;
+      } else {
+        pending.push({ index, prompt });
+      }
+    }
+
+    if (pending.length === 0) return results;
+
+    const { prompt, blocks } = this.prepareBatchOptimizationPrompt(pending.map(item => requests[item.index]));
+    const apiStartTime = Date.now();
+    const { response, firstField, model, usage } = await this.requestCompletion(prompt, (field, value, itemIndex) => {
+      const item = itemIndex !== undefined ? pending[itemIndex] : undefined;
+      if (item) requests[item.index].onField?.(field, value);
+    }, signal);
+    const apiCallTime = Date.now() - apiStartTime;
+
+    const items = this.parseBatchResponse(response, pending.length);
+    const totalTime = Date.now() - startTime;
+
+    const { promptTokens, completionTokens } = this.splitBatchTokens(prompt, blocks, response, items, getTokenizer(model), usage);
+    const cacheKeys = await Promise.all(pending.map(item => this.cacheKey(model, item.prompt)));
+
+    pending.forEach(({ index }, position) => {
+      const parsed = items[position];
+      if (!parsed) return;
+
+      const { story } = requests[index];
+      const optimizedStory = this.mergeOptimization(parsed, story);
+      this.cache.set(cacheKeys[position], JSON.stringify(parsed));
+
+      results[index] = {
+        optimizedStory,
+        changes: this.detectChanges(story, optimizedStory),
+        confidence: optimizedStory.confidence?.overall || 0.9,
+        cost: {
+          promptTokens: promptTokens[position],
+          completionTokens: completionTokens[position],
+          totalTokens: promptTokens[position] + completionTokens[position],
+          costUSD: calculateCost(model, promptTokens[position], completionTokens[position]),
+        },
+        timing: {
+          apiCall: apiCallTime,
+          processing: totalTime - apiCallTime,
+          total: totalTime,
+          firstField,
+        },
+        model,
+      };
+    });
+
+    return results;
+  }
+
+  // 批量请求的成本按条目分摊：各故事段落按实际 token 数计入，共用的指令与格式说明平均分摊；
+  // 输出按各条目 JSON 的 token 数占比分摊，未解析出的条目按已解析条目的平均值计。
+  // 有提供方报告的用量时以其为总数，分词器只用于确定各条目的占比
+  private splitBatchTokens(
+    prompt: string,
+    blocks: string[],
+    response: string,
+    items: Array<any | null>,
+    tokenizer: Tokenizer,
+    usage?: LLMTokenUsage
+  ): { promptTokens: number[]; completionTokens: number[] } {
+    const blockTokens = tokenizer.countBatch(blocks);
+    const estimatedPrompt = this.countPromptTokens(prompt, tokenizer);
+    const shared = Math.max(estimatedPrompt - blockTokens.reduce((sum, count) => sum + count, 0), 0);
+    const promptScale = usage && estimatedPrompt > 0 ? usage.promptTokens / estimatedPrompt : 1;
+
+    const itemTokens = tokenizer.countBatch(items.map(item => (item ? JSON.stringify(item) : '')));
+    const parsedTokens = itemTokens.filter((_, position) => items[position]);
+    const average = parsedTokens.length > 0
+      ? parsedTokens.reduce((sum, count) => sum + count, 0) / parsedTokens.length
+      : 1;
+    const weights = itemTokens.map((count, position) => (items[position] ? count : average));
+    const totalWeight = weights.reduce((sum, weight) => sum + weight, 0) || 1;
+    const responseTokens = usage?.completionTokens ?? tokenizer.count(response);
+
+    return {
+      promptTokens: blockTokens.map(count => Math.round((count + shared / blocks.length) * promptScale)),
+      completionTokens: weights.map(weight => Math.round(responseTokens * weight / totalWeight)),
+    };
+  }
+
+  // 调用模型（经多模型路由）：默认以流式接收，边接收边解析字段并记录首字段耗时；返回实际响应的模型
+  private async requestCompletion(
+    prompt: string,
+    onField: StreamFieldCallback,
+    signal?: AbortSignal
+  ): Promise<{ response: string; firstField?: number; model: LLMModel; usage?: LLMTokenUsage }> {
+    if (this.config.stream === false) {
+      const { content, model, usage } = await this.router.complete(prompt, undefined, signal);
+      return { response: content, model, usage };
+    }
+
+    const startTime = Date.now();
+    let firstField: number | undefined;
+    const parser = new IncrementalJSONParser((field, value, itemIndex) => {
+      if (firstField === undefined) {
+        firstField = Date.now() - startTime;
+        CostMonitor.getInstance().trackFirstField(firstField);
+      }
+      onField(field, value, itemIndex);
+    });
+
+    const { content, model, usage } = await this.router.complete(prompt, chunk => parser.feed(chunk), signal);
+    return { response: content, firstField, model, usage };
+  }
+
+  // 响应缓存以实际响应的模型为键；依次查询各候选模型的缓存，命中时直接构造优化结果
+  private async lookupCache(
+    request: LLMStoryOptimizationRequest,
+    prompt: string,
+    startTime: number
+  ): Promise<LLMStoryOptimizationResponse | null> {
+    for (const model of this.router.getModels()) {
+      const cachedResponse = this.cache.get(await this.cacheKey(model, prompt));
+      if (!cachedResponse) continue;
+
+      try {
+        const optimizedStory = this.parseLLMResponse(cachedResponse, request.story);
+        const tokenizer = getTokenizer(model);
+        CostMonitor.getInstance().trackCacheHit(
+          model,
+          this.countPromptTokens(prompt, tokenizer),
+          tokenizer.count(cachedResponse)
+        );
+
+        return {
+          optimizedStory,
+          changes: this.detectChanges(request.story, optimizedStory),
+          confidence: optimizedStory.confidence?.overall || 0.9,
+          cost: { promptTokens: 0, completionTokens: 0, totalTokens: 0, costUSD: 0 },
+          timing: { apiCall: 0, processing: Date.now() - startTime, total: Date.now() - startTime },
+          model,
+          cached: true,
+        };
+      } catch {
+        // 缓存内容无法解析时按未命中处理
+      }
+    }
+
+    CostMonitor.getInstance().trackCacheMiss();
+    return null;
+  }
+
+  private cacheKey(model: LLMModel, prompt: string): Promise<string> {
+    return this.cache.buildKey(model, this.config.temperature, prompt);
+  }
+
+  // 请求实际消耗的输入 token：系统提示、用户提示与对话格式开销
+  private countPromptTokens(prompt: string, tokenizer: Tokenizer = this.tokenizer): number {
+    return tokenizer.count(SYSTEM_PROMPT) + tokenizer.count(prompt) + CHAT_OVERHEAD_TOKENS;
+  }
+
+  // 请求前的上下文预算：每条上下文不超过 contextTokens，且提示加上预留的输出不超过候选模型中最小的上下文窗口
+  // skeleton 为上下文留空时的提示，超出预算的上下文截断后追加省略号
+  private fitContexts(contexts: string[], skeleton: string): string[] {
+    const available = this.contextWindow - this.config.maxTokens - this.countPromptTokens(skeleton);
+    const budget = Math.min(
+      this.config.contextTokens ?? DEFAULT_CONTEXT_TOKENS,
+      Math.floor(available / contexts.length)
+    );
+
+    return contexts.map(context => {
+      if (this.tokenizer.count(context) <= budget) return context;
+      const truncated = this.tokenizer.truncate(context, budget - this.tokenizer.count(TRUNCATION_MARK));
+      return truncated ? truncated + TRUNCATION_MARK : '';
+    });
+  }
+
+  private prepareOptimizationPrompt(request: LLMStoryOptimizationRequest): string {
+    const [context] = this.fitContexts([request.sourceContext], this.createOptimizationPrompt(request, ''));
+    return this.createOptimizationPrompt(request, context);
+  }
+
+  private prepareBatchOptimizationPrompt(requests: LLMStoryOptimizationRequest[]): { prompt: string; blocks: string[] } {
+    const skeleton = this.createBatchOptimizationPrompt(requests, requests.map(() => ''));
+    const contexts = this.fitContexts(requests.map(request => request.sourceContext), skeleton);
+    return {
+      prompt: this.createBatchOptimizationPrompt(requests, contexts),
+      blocks: requests.map((request, index) => this.formatBatchStory(request, index, contexts[index])),
+    };
+  }
+
   // 创建优化提示
-  private createOptimizationPrompt(request: LLMStoryOptimizationRequest): string {
-    const { story, sourceContext, optimizationGoals } = request;
+  private createOptimizationPrompt(request: LLMStoryOptimizationRequest, sourceContext: string): string {
+    const { story, optimizationGoals } = request;
 
     return `# 用户故事优化任务
 
@@ -842,6 +368,57 @@ ${sourceContext}
 `;
   }
 
+  private formatBatchStory({ story }: LLMStoryOptimizationRequest, index: number, sourceContext: string): string {
+    return `### 故事 ${index + 1}
+- 角色：${story.role}
+- 功能：${story.action}
+- 价值：${story.value}
+- 模块：${story.module}
+- 优先级：${story.priority}
+- 置信度：${(story.confidence?.overall * 100 || 0).toFixed(0)}%
+- 原始描述：${story.description}
+- 上下文：${sourceContext}`;
+  }
+
+  // 创建批量优化提示：指令与输出格式只出现一次
+  private createBatchOptimizationPrompt(requests: LLMStoryOptimizationRequest[], contexts: string[]): string {
+    const goals = Array.from(new Set(requests.flatMap(request => request.optimizationGoals)));
+    const stories = requests.map((request, index) => this.formatBatchStory(request, index, contexts[index])).join('\n\n');
+
+    return `# 用户故事批量优化任务
+
+## 原始故事列表
+${stories}
+
+## 优化目标
+${goals.map(goal => `- ${goal}`).join('\n')}
+
+## 优化要求
+1. 逐条优化，保持每条故事角色、功能、价值的核心含义不变
+2. 提升描述的清晰度和准确性
+3. 优化语言表达，符合用户故事标准格式
+4. 补充缺失的信息（如发现"待补充"）
+5. 提供详细的优化说明
+
+## 输出格式
+严格返回JSON数组，每条故事对应一个元素，index 为故事序号，不要包含其他内容：
+[
+  {
+    "index": 1,
+    "title": "优化后的标题",
+    "description": "优化后的详细描述",
+    "role": "优化后的角色",
+    "action": "优化后的功能",
+    "value": "优化后的价值",
+    "module": "优化后的模块",
+    "priority": "优化后的优先级",
+    "changes": ["优化项1", "优化项2"],
+    "confidence": 0.95
+  }
+]
+`;
+  }
+
   // 解析LLM响应
   private parseLLMResponse(response: string, originalStory: any): any {
     try {
@@ -851,33 +428,67 @@ ${sourceContext}
         throw new Error(LLMErrorCode.INVALID_RESPONSE);
       }
 
+      return this.mergeOptimization(JSON.parse(jsonMatch[0]), originalStory);
+    } catch (error) {
+      console.warn('LLM响应解析失败:', error);
+      throw new Error(LLMErrorCode.INVALID_RESPONSE);
+    }
+  }
+
+  // 解析批量响应：按 index 字段对位，缺失或格式错误的条目为 null
+  private parseBatchResponse(response: string, count: number): Array<any | null> {
+    const items: Array<any | null> = new Array(count).fill(null);
+
+    try {
+      const jsonMatch = response.match(/\[[\s\S]*\]/);
+      if (!jsonMatch) {
+        throw new Error(LLMErrorCode.INVALID_RESPONSE);
+      }
+
       const parsed = JSON.parse(jsonMatch[0]);
+      if (!Array.isArray(parsed)) {
+        throw new Error(LLMErrorCode.INVALID_RESPONSE);
+      }
 
-      // 合并优化结果到原始故事
-      const optimizedStory = {
-        ...originalStory,
-        title: parsed.title || originalStory.title,
-        description: parsed.description || originalStory.description,
-        role: parsed.role || originalStory.role,
-        action: parsed.action || originalStory.action,
-        value: parsed.value || originalStory.value,
-        module: parsed.module || originalStory.module,
-        priority: parsed.priority || originalStory.priority,
-        confidence: {
-          ...originalStory.confidence,
-          overall: parsed.confidence || originalStory.confidence.overall,
-          reasons: [
-            ...(originalStory.confidence?.reasons || []),
-            'LLM优化提升',
-          ],
-        },
-      };
+      parsed.forEach((item, position) => {
+        if (!item || typeof item !== 'object' || Array.isArray(item)) return;
 
-      return optimizedStory;
+        // 优先使用模型回填的序号（从 1 开始），缺失时仅在条目数一致时按位置对应
+        const index = Number.isInteger(item.index)
+          ? item.index - 1
+          : parsed.length === count ? position : -1;
+
+        if (index >= 0 && index < count && items[index] === null) {
+          items[index] = item;
+        }
+      });
     } catch (error) {
-      console.warn('LLM响应解析失败:', error);
-      throw new Error(LLMErrorCode.INVALID_RESPONSE);
+      console.warn('LLM批量响应解析失败:', error);
     }
+
+    return items;
+  }
+
+  // 合并优化结果到原始故事
+  private mergeOptimization(parsed: any, originalStory: any): any {
+    return {
+      ...originalStory,
+      title: parsed.title || originalStory.title,
+      description: parsed.description || originalStory.description,
+      role: parsed.role || originalStory.role,
+      action: parsed.action || originalStory.action,
+      value: parsed.value || originalStory.value,
+      module: parsed.module || originalStory.module,
+      priority: parsed.priority || originalStory.priority,
+      confidence: {
+        ...originalStory.confidence,
+        overall: parsed.confidence || originalStory.confidence.overall,
+        reasons: [
+          ...(originalStory.confidence?.reasons || []),
+          'LLM优化提升',
+        ],
+      },
+    };
   }
 
   // 检测变化
@@ -914,23 +525,19 @@ ${sourceContext}
 
     return changes.length > 0 ? changes : ['优化了语言表达'];
   }
-
-  // 估算token数量
-  private estimateTokens(text: string): number {
-    if (!text) return 0;
-
-    // 简单估算：每个中文字符约2个token，其他字符约1个token
-    const chineseChars = text.match(/[\u4e00-\u9fa5]/g)?.length || 0;
-    const otherChars = text.length - chineseChars;
-
-    return Math.round(chineseChars * 2 + otherChars * 1.2);
-  }
 }
 
 export class CostMonitor {
   private static instance: CostMonitor;
   private totalTokens: number = 0;
   private totalCost: number = 0;
+  private cacheHits: number = 0;
+  private cacheMisses: number = 0;
+  private savedTokens: number = 0;
+  private savedCost: number = 0;
+  // 首字段耗时的环形缓冲区，只保留最近 FIRST_FIELD_WINDOW 个样本
+  private firstFieldSamples = new Float64Array(FIRST_FIELD_WINDOW);
+  private firstFieldCount = 0;
   private usageHistory: Array<{
     timestamp: number;
     model: LLMModel;
@@ -948,16 +555,22 @@ export class CostMonitor {
     return CostMonitor.instance;
   }
 
-  trackUsage(model: LLMModel, promptTokens: number, completionTokens: number, requestTime: number) {
-    const service = LLMServiceFactory.createService({
-      model,
-      apiKey: '',
-      temperature: 0.3,
-      maxTokens: 2000,
-      requestTimeout: 30000,
-    });
+  trackCacheHit(model: LLMModel, promptTokens: number, completionTokens: number) {
+    this.cacheHits++;
+    this.savedTokens += promptTokens + completionTokens;
+    this.savedCost += calculateCost(model, promptTokens, completionTokens);
+  }
 
-    const costUSD = service.calculateCost(promptTokens, completionTokens);
+  trackCacheMiss() {
+    this.cacheMisses++;
+  }
+
+  trackFirstField(elapsedMs: number) {
+    this.firstFieldSamples[this.firstFieldCount++ % FIRST_FIELD_WINDOW] = elapsedMs;
+  }
+
+  trackUsage(model: LLMModel, promptTokens: number, completionTokens: number, requestTime: number) {
+    const costUSD = calculateCost(model, promptTokens, completionTokens);
     const totalTokens = promptTokens + completionTokens;
 
     this.totalTokens += totalTokens;
@@ -980,6 +593,8 @@ export class CostMonitor {
   }
 
   getUsageStats() {
+    const firstFields = this.firstFieldSamples.slice(0, Math.min(this.firstFieldCount, FIRST_FIELD_WINDOW)).sort();
+
     return {
       requestCount: this.usageHistory.length,
       totalTokens: this.totalTokens,
@@ -990,6 +605,24 @@ export class CostMonitor {
       averageResponseTime: this.usageHistory.length > 0
         ? this.usageHistory.reduce((sum, entry) => sum + entry.requestTime, 0) / this.usageHistory.length
         : 0,
+      cache: {
+        hits: this.cacheHits,
+        misses: this.cacheMisses,
+        hitRate: this.cacheHits + this.cacheMisses > 0
+          ? this.cacheHits / (this.cacheHits + this.cacheMisses)
+          : 0,
+        savedTokens: this.savedTokens,
+        savedCost: this.savedCost,
+      },
+      streaming: {
+        requests: this.firstFieldCount,
+        averageTimeToFirstField: firstFields.length > 0
+          ? firstFields.reduce((sum, value) => sum + value, 0) / firstFields.length
+          : 0,
+        p95TimeToFirstField: firstFields.length > 0
+          ? firstFields[Math.min(firstFields.length - 1, Math.floor(firstFields.length * 0.95))]
+          : 0,
+      },
       history: this.usageHistory,
     };
   }
@@ -997,6 +630,11 @@ export class CostMonitor {
   clearHistory() {
     this.totalTokens = 0;
     this.totalCost = 0;
+    this.cacheHits = 0;
+    this.cacheMisses = 0;
+    this.savedTokens = 0;
+    this.savedCost = 0;
+    this.firstFieldCount = 0;
     this.usageHistory = [];
   }
 }
\ No newline at end of file
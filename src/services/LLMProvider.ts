@@ -0,0 +1,425 @@
+import { LLMModel, LLMErrorCode, LLMServiceType, getServiceType, type LLMAPIResponse, type LLMConfig, type LLMTokenUsage } from './LLMService';
+import { getProviderLimiter } from './LLMBatchPipeline';
+import { readChatCompletionStream, type StreamDeltaCallback } from './LLMStream';
+
+// 统一的服务提供方运行时：各提供方均为 OpenAI 兼容的 chat/completions 接口，差异只在端点与请求参数，
+// 由一个服务类按端点表发起请求。服务实例按配置缓存复用；429/5xx/超时/网络错误按带抖动的指数退避重试，
+// 每个提供方一个熔断器，持续失败时熔断、快速失败，冷却后放行单个探测请求
+
+export const SYSTEM_PROMPT = '你是一个专业的用户故事优化助手。你的任务是优化和完善用户故事，提升其清晰度、准确性和可读性，同时保持核心含义不变。';
+
+// LLM服务接口
+export interface LLMService {
+  // 提供 onDelta 时以 SSE 流式返回；signal 中止时放弃请求（不计入熔断统计）；
+  // onUsage 回调提供方报告的 token 用量（响应中没有 usage 时不回调）
+  callAPI(
+    prompt: string,
+    onDelta?: StreamDeltaCallback,
+    signal?: AbortSignal,
+    onUsage?: (usage: LLMTokenUsage) => void
+  ): Promise<string>;
+  calculateCost(promptTokens: number, completionTokens: number): number;
+  getModel(): LLMModel;
+}
+
+interface ProviderEndpoint {
+  baseUrl: string;
+  path: string;
+  // 请求体中的模型名，缺省为 LLMModel 的值
+  requestModel?: string;
+  extraBody?: Record<string, unknown>;
+}
+
+// Claude 与 Gemini 模型经 OpenAI 兼容端点调用（可通过 baseUrl 指向代理）
+const OPENAI_ENDPOINT: ProviderEndpoint = {
+  baseUrl: 'https://api.openai.com/v1',
+  path: '/chat/completions',
+  extraBody: { frequency_penalty: 0.5 },
+};
+
+export const PROVIDER_ENDPOINTS: Record<LLMServiceType, ProviderEndpoint> = {
+  [LLMServiceType.OpenAI]: OPENAI_ENDPOINT,
+  [LLMServiceType.Claude]: OPENAI_ENDPOINT,
+  [LLMServiceType.Google]: OPENAI_ENDPOINT,
+  [LLMServiceType.Minimax]: { baseUrl: 'https://api.minimax.chat/v1', path: '/chat/completions', requestModel: 'codellama-34b' },
+  [LLMServiceType.Kimi]: { baseUrl: 'https://api.moonshot.cn/v1', path: '/chat/completions', requestModel: 'moonshot-v1-8k' },
+  [LLMServiceType.GLM]: { baseUrl: 'https://open.bigmodel.cn/api/paas/v4', path: '/chat/completions', requestModel: 'glm-4' },
+  [LLMServiceType.Volcano]: { baseUrl: 'https://ark.cn-beijing.volces.com/api/v3', path: '/chat/completions', requestModel: 'volcano-coding-plan' },
+  [LLMServiceType.DeepSeek]: { baseUrl: 'https://api.deepseek.com', path: '/v1/chat/completions', requestModel: 'deepseek-coder' },
+  [LLMServiceType.Doubao]: { baseUrl: 'https://ark.cn-beijing.volces.com/api/v3', path: '/chat/completions', requestModel: 'ep-20240115121258-i7x27' },
+};
+
+// 每 1K token 的美元价格（国内大模型为假设值，实际需要根据官方定价调整）
+export const MODEL_PRICES: Record<LLMModel, number> = {
+  [LLMModel.GPT4oMini]: 0.15,
+  [LLMModel.GPT4o]: 2.5,
+  [LLMModel.Claude3Haiku]: 0.25,
+  [LLMModel.Claude3Sonnet]: 3,
+  [LLMModel.Claude3Opus]: 15,
+  [LLMModel.Gemini15Flash]: 0.075,
+  [LLMModel.Gemini15Pro]: 1.25,
+  [LLMModel.MinimaxCodingPlan]: 0.3,
+  [LLMModel.Kimi]: 0.25,
+  [LLMModel.GLMCodingPlan]: 0.4,
+  [LLMModel.VolcanoCodingPlan]: 0.35,
+  [LLMModel.DeepSeek]: 0.2,
+  [LLMModel.Doubao]: 0.18,
+};
+const DEFAULT_PRICE = 0.15;
+
+export function calculateCost(model: LLMModel, promptTokens: number, completionTokens: number): number {
+  return ((promptTokens + completionTokens) / 1000) * (MODEL_PRICES[model] ?? DEFAULT_PRICE);
+}
+
+// 携带 HTTP 状态的调用错误；message 仍为 LLMErrorCode，与按错误码判断的调用方兼容
+export class LLMRequestError extends Error {
+  constructor(code: LLMErrorCode, readonly status?: number, readonly retryAfterMs?: number) {
+    super(code);
+    this.name = 'LLMRequestError';
+  }
+}
+
+export interface RetryPolicy {
+  maxRetries: number;
+  baseDelayMs: number;
+  maxDelayMs: number;
+}
+
+export const DEFAULT_RETRY_POLICY: RetryPolicy = { maxRetries: 3, baseDelayMs: 500, maxDelayMs: 8000 };
+
+// 全抖动指数退避：在 [0, min(上限, 基数 * 2^attempt)) 内均匀取值，避免大量请求同时重试
+export function backoffDelay(attempt: number, policy: RetryPolicy = DEFAULT_RETRY_POLICY): number {
+  return Math.random() * Math.min(policy.maxDelayMs, policy.baseDelayMs * 2 ** attempt);
+}
+
+type Failure = 'transient' | 'throttled' | 'fatal';
+
+// 5xx、超时与网络错误为提供方故障，可重试并计入熔断；429 为限流，可重试但不计入熔断；其余错误不重试
+function classifyFailure(error: any): Failure {
+  if (error instanceof LLMRequestError) {
+    if (error.status === 429) return 'throttled';
+    if (error.message === LLMErrorCode.TIMEOUT || (error.status ?? 0) >= 500) return 'transient';
+    return 'fatal';
+  }
+  // fetch 的网络错误（DNS、连接被拒、CORS 等）为 TypeError
+  return error?.name === 'TypeError' ? 'transient' : 'fatal';
+}
+
+export interface CircuitBreakerOptions {
+  // 连续失败达到该次数即熔断
+  failureThreshold: number;
+  // 统计窗口内请求数不少于 minimumRequests 且失败率达到该值即熔断
+  failureRate: number;
+  minimumRequests: number;
+  windowMs: number;
+  // 熔断时长，半开探测失败后加倍，不超过 maxOpenMs
+  openMs: number;
+  maxOpenMs: number;
+}
+
+export const DEFAULT_CIRCUIT_BREAKER_OPTIONS: CircuitBreakerOptions = {
+  failureThreshold: 5,
+  failureRate: 0.5,
+  minimumRequests: 10,
+  windowMs: 30000,
+  openMs: 15000,
+  maxOpenMs: 120000,
+};
+
+export type CircuitState = 'closed' | 'open' | 'half-open';
+
+export class CircuitBreaker {
+  private state: CircuitState = 'closed';
+  private outcomes: Array<{ at: number; ok: boolean }> = [];
+  private consecutiveFailures = 0;
+  private openedAt = 0;
+  private openMs: number;
+  private probing = false;
+
+  constructor(
+    private options: CircuitBreakerOptions = DEFAULT_CIRCUIT_BREAKER_OPTIONS,
+    private now: () => number = Date.now
+  ) {
+    this.openMs = options.openMs;
+  }
+
+  getState(): CircuitState {
+    if (this.state === 'open' && this.now() - this.openedAt >= this.openMs) return 'half-open';
+    return this.state;
+  }
+
+  // 是否放行请求；熔断冷却结束后进入半开状态，只放行一个探测请求
+  tryAcquire(): boolean {
+    if (this.state === 'open') {
+      if (this.now() - this.openedAt < this.openMs) return false;
+      this.state = 'half-open';
+      this.probing = false;
+    }
+    if (this.state === 'half-open') {
+      if (this.probing) return false;
+      this.probing = true;
+    }
+    return true;
+  }
+
+  onSuccess() {
+    if (this.state === 'half-open') {
+      this.state = 'closed';
+      this.openMs = this.options.openMs;
+      this.outcomes = [];
+    }
+    this.probing = false;
+    this.consecutiveFailures = 0;
+    this.record(true);
+  }
+
+  onFailure() {
+    if (this.state === 'half-open') {
+      this.open(Math.min(this.openMs * 2, this.options.maxOpenMs));
+      return;
+    }
+
+    this.consecutiveFailures++;
+    this.record(false);
+
+    const failures = this.outcomes.filter(outcome => !outcome.ok).length;
+    if (
+      this.consecutiveFailures >= this.options.failureThreshold ||
+      (this.outcomes.length >= this.options.minimumRequests && failures / this.outcomes.length >= this.options.failureRate)
+    ) {
+      this.open(this.openMs);
+    }
+  }
+
+  // 请求未得出提供方健康与否的结论（被取消、被限流）：归还半开探测名额
+  release() {
+    this.probing = false;
+  }
+
+  private open(openMs: number) {
+    this.state = 'open';
+    this.openedAt = this.now();
+    this.openMs = openMs;
+    this.probing = false;
+    this.consecutiveFailures = 0;
+  }
+
+  private record(ok: boolean) {
+    const now = this.now();
+    this.outcomes.push({ at: now, ok });
+    while (this.outcomes.length > 0 && now - this.outcomes[0].at > this.options.windowMs) this.outcomes.shift();
+  }
+}
+
+const breakers = new Map<LLMServiceType, CircuitBreaker>();
+
+// 同一服务提供方的所有请求共享一个熔断器
+export function getCircuitBreaker(type: LLMServiceType): CircuitBreaker {
+  let breaker = breakers.get(type);
+  if (!breaker) {
+    breaker = new CircuitBreaker();
+    breakers.set(type, breaker);
+  }
+  return breaker;
+}
+
+// 流式响应相邻两次收到数据的最长间隔；超过即视为提供方中途停滞，按超时处理
+const STREAM_IDLE_TIMEOUT_MS = 15000;
+
+const sleep = (ms: number) => new Promise<void>(resolve => setTimeout(resolve, ms));
+
+function parseRetryAfter(header: string | null): number | undefined {
+  if (!header) return undefined;
+  const seconds = Number(header);
+  if (Number.isFinite(seconds)) return Math.max(seconds, 0) * 1000;
+  const date = Date.parse(header);
+  return Number.isNaN(date) ? undefined : Math.max(date - Date.now(), 0);
+}
+
+// OpenAI 兼容的 chat/completions 服务
+class ChatCompletionService implements LLMService {
+  private type: LLMServiceType;
+  private endpoint: ProviderEndpoint;
+
+  constructor(private config: LLMConfig, private retry: RetryPolicy = DEFAULT_RETRY_POLICY) {
+    this.type = getServiceType(config.model);
+    this.endpoint = PROVIDER_ENDPOINTS[this.type];
+  }
+
+  getModel(): LLMModel {
+    return this.config.model;
+  }
+
+  calculateCost(promptTokens: number, completionTokens: number): number {
+    return calculateCost(this.config.model, promptTokens, completionTokens);
+  }
+
+  // 每次尝试都经过提供方限流器与熔断器；流式响应已开始交付后不再重试
+  async callAPI(
+    prompt: string,
+    onDelta?: StreamDeltaCallback,
+    signal?: AbortSignal,
+    onUsage?: (usage: LLMTokenUsage) => void
+  ): Promise<string> {
+    if (!this.config.apiKey || this.config.apiKey.trim() === '') {
+      throw new Error(LLMErrorCode.API_KEY_MISSING);
+    }
+
+    const breaker = getCircuitBreaker(this.type);
+    const limiter = getProviderLimiter(this.config.model);
+
+    for (let attempt = 0; ; attempt++) {
+      if (!breaker.tryAcquire()) {
+        throw new LLMRequestError(LLMErrorCode.CIRCUIT_OPEN);
+      }
+
+      let streamed = false;
+      const delta = onDelta && ((chunk: string) => {
+        streamed = true;
+        onDelta(chunk);
+      });
+
+      try {
+        const response = await limiter.run(() => this.request(prompt, delta, signal, onUsage));
+        breaker.onSuccess();
+        return response;
+      } catch (error: any) {
+        if (signal?.aborted) {
+          breaker.release();
+          throw error;
+        }
+
+        const failure = classifyFailure(error);
+        if (failure === 'fatal') {
+          // 提供方正常响应了请求（如 400/401/403），不影响熔断判断
+          breaker.onSuccess();
+          throw error;
+        }
+
+        if (failure === 'transient') breaker.onFailure();
+        else breaker.release();
+
+        if (streamed || attempt >= this.retry.maxRetries) throw error;
+
+        const delay = error.retryAfterMs ?? backoffDelay(attempt, this.retry);
+        if (failure === 'throttled') {
+          // 限流时暂停该提供方的所有请求
+          limiter.penalize(delay);
+        } else {
+          await sleep(delay);
+        }
+      }
+    }
+  }
+
+  private async request(
+    prompt: string,
+    onDelta?: StreamDeltaCallback,
+    signal?: AbortSignal,
+    onUsage?: (usage: LLMTokenUsage) => void
+  ): Promise<string> {
+    if (signal?.aborted) throw signal.reason ?? new DOMException('Aborted', 'AbortError');
+
+    // 请求超时覆盖到响应体读取完毕；流式响应收到响应头后改为空闲超时，每收到一段数据重新计时
+    const controller = new AbortController();
+    let timeoutId = setTimeout(() => controller.abort(), this.config.requestTimeout);
+    const idleTimeout = Math.min(STREAM_IDLE_TIMEOUT_MS, this.config.requestTimeout);
+    const resetIdleTimer = () => {
+      clearTimeout(timeoutId);
+      timeoutId = setTimeout(() => controller.abort(), idleTimeout);
+    };
+    const onAbort = () => controller.abort();
+    signal?.addEventListener('abort', onAbort, { once: true });
+
+    try {
+      const response = await fetch(`${this.config.baseUrl || this.endpoint.baseUrl}${this.endpoint.path}`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${this.config.apiKey}`,
+        },
+        body: JSON.stringify({
+          model: this.endpoint.requestModel ?? this.config.model,
+          messages: [
+            {
+              role: 'system',
+              content: SYSTEM_PROMPT,
+            },
+            {
+              role: 'user',
+              content: prompt,
+            },
+          ],
+          temperature: this.config.temperature,
+          max_tokens: this.config.maxTokens,
+          stream: !!onDelta,
+          // 流式响应默认不含 usage，需显式请求在最后一个事件中返回
+          ...(onDelta ? { stream_options: { include_usage: true } } : {}),
+          top_p: 0.95,
+          ...this.endpoint.extraBody,
+        }),
+        signal: controller.signal,
+      });
+
+      if (!response.ok) {
+        if (response.status === 429) {
+          throw new LLMRequestError(LLMErrorCode.RATE_LIMIT, 429, parseRetryAfter(response.headers.get('Retry-After')));
+        } else if (response.status === 403) {
+          throw new LLMRequestError(LLMErrorCode.QUOTA_EXCEEDED, 403);
+        } else {
+          throw new LLMRequestError(LLMErrorCode.API_CALL_FAILED, response.status);
+        }
+      }
+
+      if (onDelta) {
+        resetIdleTimer();
+        return await readChatCompletionStream(response, onDelta, resetIdleTimer, onUsage);
+      }
+
+      const data: LLMAPIResponse = await response.json();
+
+      if (!data.choices || data.choices.length === 0) {
+        throw new LLMRequestError(LLMErrorCode.INVALID_RESPONSE, response.status);
+      }
+
+      if (data.usage) {
+        onUsage?.({ promptTokens: data.usage.prompt_tokens, completionTokens: data.usage.completion_tokens });
+      }
+      return data.choices[0].message.content;
+    } catch (error: any) {
+      if (error.name === 'AbortError' && !signal?.aborted) {
+        throw new LLMRequestError(LLMErrorCode.TIMEOUT);
+      }
+
+      throw error;
+    } finally {
+      clearTimeout(timeoutId);
+      signal?.removeEventListener('abort', onAbort);
+    }
+  }
+}
+
+// 按配置缓存的服务实例（LRU），相同配置的优化器与连接测试共用同一实例
+const MAX_CACHED_SERVICES = 16;
+const services = new Map<string, LLMService>();
+
+export function getLLMService(config: LLMConfig): LLMService {
+  const key = JSON.stringify([
+    config.model,
+    config.baseUrl ?? '',
+    config.apiKey,
+    config.temperature,
+    config.maxTokens,
+    config.requestTimeout,
+  ]);
+
+  let service = services.get(key);
+  if (service) {
+    services.delete(key);
+  } else {
+    service = new ChatCompletionService({ ...config });
+    if (services.size >= MAX_CACHED_SERVICES) services.delete(services.keys().next().value!);
+  }
+  services.set(key, service);
+  return service;
+}
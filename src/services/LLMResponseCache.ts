@@ -0,0 +1,234 @@
+import { LLMModel } from './LLMService';
+import { cyrb53 } from './DocumentScanner';
+
+// LLM响应缓存：以 (模型, 温度, 归一化提示) 的哈希为键
+// 内存 LRU 为一级缓存，localStorage 为持久化二级缓存，重新上传修订版 PRD 时只有变化的句子需要调用 API
+
+export interface LLMResponseCacheOptions {
+  maxEntries: number;
+  maxBytes: number;
+  maxPersistentEntries: number;
+  ttlMs: number;
+}
+
+export interface LLMResponseCacheStats {
+  memoryEntries: number;
+  memoryBytes: number;
+  persistentEntries: number;
+  hits: number;
+  persistentHits: number;
+  misses: number;
+  evictions: number;
+  hitRate: number;
+}
+
+interface CacheEntry {
+  value: string;
+  expiresAt: number;
+  bytes: number;
+}
+
+const DEFAULT_OPTIONS: LLMResponseCacheOptions = {
+  maxEntries: 500,
+  maxBytes: 5 * 1024 * 1024,
+  maxPersistentEntries: 2000,
+  ttlMs: 7 * 24 * 60 * 60 * 1000,
+};
+
+const STORAGE_PREFIX = 'sw_llm_cache:';
+const STORAGE_INDEX_KEY = 'sw_llm_cache_index';
+
+// 归一化提示：统一全半角、合并空白，避免无意义的格式差异导致缓存未命中
+export function normalizePrompt(prompt: string): string {
+  return prompt.normalize('NFKC').replace(/\s+/g, ' ').trim();
+}
+
+async function sha256(text: string): Promise<string> {
+  if (typeof crypto !== 'undefined' && crypto.subtle) {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+  }
+
+  // 非安全上下文下的回退：cyrb53
+  return cyrb53(text).toString(16) + text.length.toString(16);
+}
+
+function getStorage(): Storage | null {
+  try {
+    return typeof localStorage !== 'undefined' ? localStorage : null;
+  } catch {
+    return null;
+  }
+}
+
+export class LLMResponseCache {
+  private static instance: LLMResponseCache;
+  private options: LLMResponseCacheOptions;
+  private memory = new Map<string, CacheEntry>();
+  private memoryBytes = 0;
+  private hits = 0;
+  private persistentHits = 0;
+  private misses = 0;
+  private evictions = 0;
+
+  constructor(options: Partial<LLMResponseCacheOptions> = {}, private storage: Storage | null = getStorage()) {
+    this.options = { ...DEFAULT_OPTIONS, ...options };
+  }
+
+  static getInstance(): LLMResponseCache {
+    if (!LLMResponseCache.instance) {
+      LLMResponseCache.instance = new LLMResponseCache();
+    }
+    return LLMResponseCache.instance;
+  }
+
+  async buildKey(model: LLMModel, temperature: number, prompt: string): Promise<string> {
+    return sha256(`${model}|${temperature}|${normalizePrompt(prompt)}`);
+  }
+
+  get(key: string): string | null {
+    const entry = this.memory.get(key);
+
+    if (entry) {
+      if (entry.expiresAt > Date.now()) {
+        // 重新插入以更新 LRU 顺序
+        this.memory.delete(key);
+        this.memory.set(key, entry);
+        this.hits++;
+        return entry.value;
+      }
+      this.removeFromMemory(key);
+    }
+
+    const persisted = this.readPersistent(key);
+    if (persisted) {
+      this.writeMemory(key, persisted);
+      this.hits++;
+      this.persistentHits++;
+      return persisted.value;
+    }
+
+    this.misses++;
+    return null;
+  }
+
+  set(key: string, value: string) {
+    const entry: CacheEntry = {
+      value,
+      expiresAt: Date.now() + this.options.ttlMs,
+      bytes: value.length * 2,
+    };
+    this.writeMemory(key, entry);
+    this.writePersistent(key, entry);
+  }
+
+  clear() {
+    this.memory.clear();
+    this.memoryBytes = 0;
+
+    if (this.storage) {
+      for (const key of this.readIndex()) {
+        this.storage.removeItem(STORAGE_PREFIX + key);
+      }
+      this.storage.removeItem(STORAGE_INDEX_KEY);
+    }
+  }
+
+  getStats(): LLMResponseCacheStats {
+    const lookups = this.hits + this.misses;
+    return {
+      memoryEntries: this.memory.size,
+      memoryBytes: this.memoryBytes,
+      persistentEntries: this.readIndex().length,
+      hits: this.hits,
+      persistentHits: this.persistentHits,
+      misses: this.misses,
+      evictions: this.evictions,
+      hitRate: lookups > 0 ? this.hits / lookups : 0,
+    };
+  }
+
+  private writeMemory(key: string, entry: CacheEntry) {
+    this.removeFromMemory(key);
+    this.memory.set(key, entry);
+    this.memoryBytes += entry.bytes;
+
+    // 按条数与字节数淘汰最久未使用的条目
+    while (
+      this.memory.size > this.options.maxEntries ||
+      (this.memoryBytes > this.options.maxBytes && this.memory.size > 1)
+    ) {
+      const oldest = this.memory.keys().next().value as string;
+      this.removeFromMemory(oldest);
+      this.evictions++;
+    }
+  }
+
+  private removeFromMemory(key: string) {
+    const entry = this.memory.get(key);
+    if (entry) {
+      this.memoryBytes -= entry.bytes;
+      this.memory.delete(key);
+    }
+  }
+
+  private readIndex(): string[] {
+    if (!this.storage) return [];
+    try {
+      return JSON.parse(this.storage.getItem(STORAGE_INDEX_KEY) || '[]');
+    } catch {
+      return [];
+    }
+  }
+
+  private writeIndex(index: string[]) {
+    this.storage?.setItem(STORAGE_INDEX_KEY, JSON.stringify(index));
+  }
+
+  private readPersistent(key: string): CacheEntry | null {
+    if (!this.storage) return null;
+
+    try {
+      const raw = this.storage.getItem(STORAGE_PREFIX + key);
+      if (!raw) return null;
+
+      const entry = JSON.parse(raw) as CacheEntry;
+      if (entry.expiresAt <= Date.now()) {
+        this.storage.removeItem(STORAGE_PREFIX + key);
+        this.writeIndex(this.readIndex().filter(k => k !== key));
+        return null;
+      }
+      return entry;
+    } catch {
+      return null;
+    }
+  }
+
+  private writePersistent(key: string, entry: CacheEntry) {
+    if (!this.storage) return;
+
+    // 索引按写入顺序排列，超出上限时从最旧的开始淘汰
+    const index = this.readIndex().filter(k => k !== key);
+    index.push(key);
+
+    while (index.length > this.options.maxPersistentEntries) {
+      this.storage.removeItem(STORAGE_PREFIX + index.shift()!);
+      this.evictions++;
+    }
+
+    for (let attempt = 0; attempt < 2; attempt++) {
+      try {
+        this.storage.setItem(STORAGE_PREFIX + key, JSON.stringify(entry));
+        this.writeIndex(index);
+        return;
+      } catch {
+        // 存储配额不足时淘汰最旧的一半后重试
+        const evicted = index.splice(0, Math.ceil((index.length - 1) / 2));
+        evicted.forEach(k => this.storage!.removeItem(STORAGE_PREFIX + k));
+        this.evictions += evicted.length;
+      }
+    }
+
+    this.writeIndex(index.filter(k => k !== key));
+  }
+}
@@ -0,0 +1,257 @@
+import { LLMModel, getServiceType, type LLMConfig, type LLMTokenUsage } from './LLMService';
+import { getCircuitBreaker, getLLMService } from './LLMProvider';
+import type { StreamDeltaCallback } from './LLMStream';
+
+// 多模型路由：按各模型近期的响应延迟与错误率，把请求发往预计最快的健康模型（用户允许的 model + routeModels）。
+// 响应延迟为流式请求收到首个片段、非流式请求收到完整响应的耗时。
+// 当前模型超过其 p95 延迟仍未响应时，向次优模型发出一次对冲请求，先响应者胜出，另一个请求随即取消；
+// 某个模型在开始交付前失败时立即切换到下一个候选
+
+// 每个模型保留的延迟样本数与请求结果数
+const LATENCY_WINDOW = 64;
+const OUTCOME_WINDOW = 20;
+const EWMA_ALPHA = 0.2;
+// 样本不足时的对冲等待时间
+const MIN_HEDGE_SAMPLES = 5;
+const DEFAULT_HEDGE_DELAY_MS = 5000;
+const MIN_HEDGE_DELAY_MS = 100;
+// 对冲预算：对冲请求数不超过请求总数的 10%（外加少量突发），避免提供方整体变慢时请求量翻倍
+const MAX_HEDGE_RATIO = 0.1;
+const HEDGE_BURST = 2;
+
+export class RouteStats {
+  private latencies = new Float64Array(LATENCY_WINDOW);
+  private latencyCount = 0;
+  private outcomes = new Uint8Array(OUTCOME_WINDOW);
+  private outcomeCount = 0;
+  private failures = 0;
+  private ewma: number | null = null;
+
+  get sampleCount(): number {
+    return Math.min(this.latencyCount, LATENCY_WINDOW);
+  }
+
+  recordLatency(ms: number) {
+    this.latencies[this.latencyCount++ % LATENCY_WINDOW] = ms;
+    this.ewma = this.ewma === null ? ms : this.ewma + EWMA_ALPHA * (ms - this.ewma);
+  }
+
+  // 对冲中被取消的请求：只知道延迟不低于已等待的时间，超过当前估计时才计入
+  recordLowerBound(ms: number) {
+    if (this.ewma !== null && ms > this.ewma) this.recordLatency(ms);
+  }
+
+  recordOutcome(ok: boolean) {
+    const slot = this.outcomeCount++ % OUTCOME_WINDOW;
+    if (this.outcomeCount > OUTCOME_WINDOW) this.failures -= this.outcomes[slot];
+    this.outcomes[slot] = ok ? 0 : 1;
+    this.failures += this.outcomes[slot];
+  }
+
+  errorRate(): number {
+    const count = Math.min(this.outcomeCount, OUTCOME_WINDOW);
+    return count === 0 ? 0 : this.failures / count;
+  }
+
+  percentile(p: number): number | undefined {
+    const count = this.sampleCount;
+    if (count === 0) return undefined;
+    const sorted = this.latencies.slice(0, count).sort();
+    return sorted[Math.min(count - 1, Math.max(Math.ceil(p * count) - 1, 0))];
+  }
+
+  // 预计得到成功响应的耗时：失败按需再请求一次计，即平均延迟 / 成功率
+  expectedLatency(): number | undefined {
+    if (this.ewma === null) return undefined;
+    return this.ewma / Math.max(1 - this.errorRate(), 0.1);
+  }
+}
+
+const routeStats = new Map<LLMModel, RouteStats>();
+
+// 同一模型的所有路由器共享一份统计
+export function getRouteStats(model: LLMModel): RouteStats {
+  let stats = routeStats.get(model);
+  if (!stats) {
+    stats = new RouteStats();
+    routeStats.set(model, stats);
+  }
+  return stats;
+}
+
+export interface RoutedCompletion {
+  content: string;
+  // 实际给出响应的模型，成本按该模型计算
+  model: LLMModel;
+  hedged: boolean;
+  // 提供方报告的 token 用量，响应中没有时为 undefined
+  usage?: LLMTokenUsage;
+}
+
+interface Attempt {
+  model: LLMModel;
+  controller: AbortController;
+  startedAt: number;
+  done: boolean;
+  usage?: LLMTokenUsage;
+}
+
+export class LLMRouter {
+  private models: LLMModel[];
+  // 各候选模型的请求配置；其他服务提供方未配置 API Key 的备选模型不参与路由
+  private configs = new Map<LLMModel, LLMConfig>();
+  private requests = 0;
+  private hedges = 0;
+
+  constructor(private config: LLMConfig) {
+    this.configs.set(config.model, config);
+    for (const model of config.routeModels ?? []) {
+      const routeConfig = this.routeConfig(model);
+      if (routeConfig && !this.configs.has(model)) this.configs.set(model, routeConfig);
+    }
+    this.models = Array.from(this.configs.keys());
+  }
+
+  getModels(): LLMModel[] {
+    return this.models;
+  }
+
+  // 候选模型按预计延迟排序；熔断中的提供方排在最后，尚无样本的模型保持配置顺序排在有样本的之后
+  rank(): LLMModel[] {
+    if (this.models.length === 1) return this.models;
+
+    return this.models
+      .map((model, order) => ({
+        model,
+        order,
+        open: getCircuitBreaker(getServiceType(model)).getState() === 'open',
+        latency: getRouteStats(model).expectedLatency() ?? Infinity,
+      }))
+      .sort((a, b) => Number(a.open) - Number(b.open) || a.latency - b.latency || a.order - b.order)
+      .map(candidate => candidate.model);
+  }
+
+  complete(prompt: string, onDelta?: StreamDeltaCallback, signal?: AbortSignal): Promise<RoutedCompletion> {
+    const candidates = this.rank();
+    this.requests++;
+
+    return new Promise<RoutedCompletion>((resolve, reject) => {
+      if (signal?.aborted) {
+        reject(signal.reason ?? new DOMException('Aborted', 'AbortError'));
+        return;
+      }
+
+      const attempts: Attempt[] = [];
+      let winner: Attempt | null = null;
+      let settled = false;
+      let firstError: unknown;
+      let hedgeTimer: ReturnType<typeof setTimeout> | undefined;
+
+      const finish = (settle: () => void) => {
+        if (settled) return;
+        settled = true;
+        clearTimeout(hedgeTimer);
+        signal?.removeEventListener('abort', onAbort);
+        for (const attempt of attempts) {
+          if (attempt !== winner && !attempt.done) attempt.controller.abort();
+        }
+        settle();
+      };
+
+      const onAbort = () => finish(() => reject(signal!.reason ?? new DOMException('Aborted', 'AbortError')));
+      signal?.addEventListener('abort', onAbort, { once: true });
+
+      // 首个交付片段（或完整响应）的请求胜出，其余请求取消
+      const claim = (attempt: Attempt): boolean => {
+        if (winner) return winner === attempt;
+        winner = attempt;
+        clearTimeout(hedgeTimer);
+
+        const now = Date.now();
+        getRouteStats(attempt.model).recordLatency(now - attempt.startedAt);
+        for (const other of attempts) {
+          if (other === attempt || other.done) continue;
+          getRouteStats(other.model).recordLowerBound(now - other.startedAt);
+          other.done = true;
+          other.controller.abort();
+        }
+        return true;
+      };
+
+      const launch = (): boolean => {
+        const model = candidates[attempts.length];
+        if (!model || settled) return false;
+
+        const attempt: Attempt = { model, controller: new AbortController(), startedAt: Date.now(), done: false };
+        attempts.push(attempt);
+        const stats = getRouteStats(model);
+        const delta = onDelta && ((chunk: string) => {
+          if (claim(attempt)) onDelta(chunk);
+        });
+
+        this.serviceFor(model)
+          .callAPI(prompt, delta, attempt.controller.signal, usage => { attempt.usage = usage; })
+          .then(content => {
+            attempt.done = true;
+            if (!claim(attempt)) return;
+            stats.recordOutcome(true);
+            finish(() => resolve({ content, model, hedged: attempts.length > 1, usage: attempt.usage }));
+          })
+          .catch(error => {
+            if (attempt.done || settled) return;
+            attempt.done = true;
+            stats.recordOutcome(false);
+
+            // 已开始交付的响应中途失败，无法再换模型
+            if (winner === attempt) {
+              finish(() => reject(error));
+              return;
+            }
+
+            firstError ??= error;
+            if (attempts.some(other => !other.done)) return;
+            if (!launch()) finish(() => reject(firstError));
+          });
+        return true;
+      };
+
+      launch();
+
+      const next = candidates[1];
+      if (
+        next &&
+        this.config.hedge !== false &&
+        this.hedges < this.requests * MAX_HEDGE_RATIO + HEDGE_BURST &&
+        getCircuitBreaker(getServiceType(next)).getState() !== 'open'
+      ) {
+        hedgeTimer = setTimeout(() => {
+          if (winner || attempts.length !== 1 || attempts[0].done) return;
+          this.hedges++;
+          launch();
+        }, this.hedgeDelay(candidates[0]));
+      }
+    });
+  }
+
+  // 在当前模型的 p95 延迟后对冲：约 5% 的请求会多发一次，换取尾部延迟接近次优模型的典型延迟
+  private hedgeDelay(model: LLMModel): number {
+    const stats = getRouteStats(model);
+    const p95 = stats.sampleCount >= MIN_HEDGE_SAMPLES ? stats.percentile(0.95)! : DEFAULT_HEDGE_DELAY_MS;
+    return Math.min(Math.max(p95, MIN_HEDGE_DELAY_MS), this.config.requestTimeout);
+  }
+
+  private serviceFor(model: LLMModel) {
+    return getLLMService(this.configs.get(model)!);
+  }
+
+  // 备选模型的请求配置：与主模型同一服务提供方时沿用主模型的 API Key 与 baseUrl；
+  // 其他服务提供方必须单独配置 API Key（主 Key 不发给其他厂商），并使用该提供方的默认端点
+  private routeConfig(model: LLMModel): LLMConfig | null {
+    const type = getServiceType(model);
+    if (type === getServiceType(this.config.model)) return { ...this.config, model };
+
+    const apiKey = this.config.providerKeys?.[type]?.trim();
+    if (!apiKey) return null;
+    return { ...this.config, model, apiKey, baseUrl: undefined };
+  }
+}
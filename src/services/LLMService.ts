@@ -34,6 +34,55 @@ export enum LLMServiceType {
   Doubao = 'doubao'
 }
 
+// 模型所属的服务提供方
+export function getServiceType(model: LLMModel): LLMServiceType {
+  switch (model) {
+    case LLMModel.Claude3Haiku:
+    case LLMModel.Claude3Sonnet:
+    case LLMModel.Claude3Opus:
+      return LLMServiceType.Claude;
+    case LLMModel.Gemini15Flash:
+    case LLMModel.Gemini15Pro:
+      return LLMServiceType.Google;
+    case LLMModel.MinimaxCodingPlan:
+      return LLMServiceType.Minimax;
+    case LLMModel.Kimi:
+      return LLMServiceType.Kimi;
+    case LLMModel.GLMCodingPlan:
+      return LLMServiceType.GLM;
+    case LLMModel.VolcanoCodingPlan:
+      return LLMServiceType.Volcano;
+    case LLMModel.DeepSeek:
+      return LLMServiceType.DeepSeek;
+    case LLMModel.Doubao:
+      return LLMServiceType.Doubao;
+    default:
+      return LLMServiceType.OpenAI;
+  }
+}
+
+// 模型上下文窗口（token），用于请求前的提示预算
+export function getContextWindow(model: LLMModel): number {
+  switch (model) {
+    case LLMModel.Claude3Haiku:
+    case LLMModel.Claude3Sonnet:
+    case LLMModel.Claude3Opus:
+      return 200000;
+    case LLMModel.Gemini15Flash:
+    case LLMModel.Gemini15Pro:
+      return 1000000;
+    case LLMModel.MinimaxCodingPlan:
+      return 245000;
+    case LLMModel.DeepSeek:
+      return 64000;
+    case LLMModel.VolcanoCodingPlan:
+    case LLMModel.Doubao:
+      return 32000;
+    default:
+      return 128000;
+  }
+}
+
 // LLM服务配置
 export interface LLMServiceConfig {
   type: LLMServiceType;
@@ -49,6 +98,19 @@ export interface LLMConfig {
   temperature: number;
   maxTokens: number;
   requestTimeout: number;
+  baseUrl?: string;  // 自定义API基础路径（如本地模拟服务）
+  batchSize?: number;  // 批量优化单次请求的故事数上限（1 表示逐条优化，缺省按 maxTokens 推算）
+  stream?: boolean;  // 以 SSE 流式接收响应并增量解析字段（默认开启）
+  contextTokens?: number;  // 每条故事上下文（sourceContext）的 token 上限，超出部分在请求前截断
+  routeModels?: LLMModel[];  // 允许路由到的其他模型，与 model 一起按近期延迟与错误率选择
+  providerKeys?: Partial<Record<LLMServiceType, string>>;  // 各服务提供方的 API Key，缺省使用 apiKey
+  hedge?: boolean;  // 超过当前模型 p95 延迟仍未响应时向次优模型发出对冲请求（默认开启，配置了 routeModels 时生效）
+}
+
+// 服务提供方报告的 token 用量
+export interface LLMTokenUsage {
+  promptTokens: number;
+  completionTokens: number;
 }
 
 // LLM优化请求
@@ -57,6 +119,7 @@ export interface LLMStoryOptimizationRequest {
   sourceContext: string;
   optimizationGoals: string[];
   requirements?: string;
+  onField?: (field: string, value: unknown) => void;  // 流式响应中某个字段解析完成时回调
 }
 
 // LLM优化响应
@@ -74,8 +137,10 @@ export interface LLMStoryOptimizationResponse {
     apiCall: number;
     processing: number;
     total: number;
+    firstField?: number;  // 流式响应中首个字段解析完成的耗时
   };
   model: LLMModel;
+  cached?: boolean;  // 命中响应缓存，未产生API调用
 }
 
 // LLM错误类型
@@ -85,7 +150,8 @@ export enum LLMErrorCode {
   TIMEOUT = 'LLM_003',
   INVALID_RESPONSE = 'LLM_004',
   RATE_LIMIT = 'LLM_005',
-  QUOTA_EXCEEDED = 'LLM_006'
+  QUOTA_EXCEEDED = 'LLM_006',
+  CIRCUIT_OPEN = 'LLM_007'  // 服务提供方持续故障，已熔断
 }
 
 // LLM使用统计
@@ -0,0 +1,218 @@
+import { LLMErrorCode, type LLMTokenUsage } from './LLMService';
+
+// LLM流式响应处理：SSE 解析与增量 JSON 字段提取
+
+export type StreamDeltaCallback = (text: string) => void;
+
+// itemIndex 仅在响应为数组（批量优化）时提供，为元素在数组中的位置
+export type StreamFieldCallback = (field: string, value: unknown, itemIndex?: number) => void;
+
+// 解析单行 SSE 数据，非数据行或无法解析时返回 null
+function parseEvent(line: string): any {
+  if (!line.startsWith('data:')) return null;
+
+  const data = line.slice(5).trim();
+  if (!data || data === '[DONE]') return null;
+
+  try {
+    return JSON.parse(data);
+  } catch {
+    return null;
+  }
+}
+
+// 提取增量文本，兼容 OpenAI chat-completions 与 Anthropic messages 事件
+function extractDelta(event: any): string {
+  if (event.type === 'content_block_delta') {
+    return event.delta?.text || '';
+  }
+  return event.choices?.[0]?.delta?.content || '';
+}
+
+// 读取 SSE 流，逐段回调增量文本，返回完整文本
+// onChunk 在每次从响应体读到数据时调用（含心跳注释行），供调用方重置空闲超时；
+// onUsage 在流结束时回调提供方报告的 token 用量（OpenAI 兼容接口需请求 stream_options.include_usage）
+export async function readChatCompletionStream(
+  response: Response,
+  onDelta: StreamDeltaCallback,
+  onChunk?: () => void,
+  onUsage?: (usage: LLMTokenUsage) => void
+): Promise<string> {
+  if (!response.body) {
+    throw new Error(LLMErrorCode.INVALID_RESPONSE);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let content = '';
+  let promptTokens: number | undefined;
+  let completionTokens: number | undefined;
+
+  const consume = (line: string) => {
+    const event = parseEvent(line.trim());
+    if (!event) return;
+
+    const delta = extractDelta(event);
+    if (delta) {
+      content += delta;
+      onDelta(delta);
+    }
+
+    // OpenAI 在最后一个事件中给出 usage；Anthropic 在 message_start 给出输入、message_delta 给出输出
+    const usage = event.usage ?? event.message?.usage;
+    if (usage) {
+      promptTokens = usage.prompt_tokens ?? usage.input_tokens ?? promptTokens;
+      completionTokens = usage.completion_tokens ?? usage.output_tokens ?? completionTokens;
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    onChunk?.();
+
+    buffer += decoder.decode(value, { stream: true });
+    let newline: number;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      consume(buffer.slice(0, newline));
+      buffer = buffer.slice(newline + 1);
+    }
+  }
+
+  consume(buffer + decoder.decode());
+  if (promptTokens !== undefined && completionTokens !== undefined) {
+    onUsage?.({ promptTokens, completionTokens });
+  }
+  return content;
+}
+
+// 增量 JSON 解析：逐字符扫描，顶层对象（或顶层数组中每个对象）的字段一旦完整即回调
+// 模型在 JSON 前后输出的说明文字与代码块标记会被忽略
+export class IncrementalJSONParser {
+  private depth = 0;
+  private fieldDepth = 1;
+  private rootIsArray = false;
+  private itemIndex = -1;
+  private inString = false;
+  private escaped = false;
+  private stringBuffer = '';
+  private key: string | null = null;
+  private afterColon = false;
+  private scalar = '';
+  private nested = '';
+
+  constructor(private onField: StreamFieldCallback) {}
+
+  feed(chunk: string) {
+    for (const ch of chunk) {
+      this.consume(ch);
+    }
+  }
+
+  private consume(ch: string) {
+    const capturing = this.depth > this.fieldDepth;
+    if (capturing) this.nested += ch;
+
+    if (this.inString) {
+      if (this.escaped) {
+        this.escaped = false;
+      } else if (ch === '\\') {
+        this.escaped = true;
+      } else if (ch === '"') {
+        this.inString = false;
+        if (!capturing) this.completeString();
+        return;
+      }
+      if (!capturing) this.stringBuffer += ch;
+      return;
+    }
+
+    if (ch === '"') {
+      if (this.depth > 0) {
+        this.inString = true;
+        this.stringBuffer = '';
+      }
+      return;
+    }
+
+    if (ch === '{' || ch === '[') {
+      if (this.depth === 0) {
+        this.rootIsArray = ch === '[';
+        this.fieldDepth = this.rootIsArray ? 2 : 1;
+      } else if (this.rootIsArray && this.depth === 1 && ch === '{') {
+        this.itemIndex++;
+        this.resetField();
+      } else if (this.depth === this.fieldDepth && this.afterColon) {
+        this.nested = ch;
+      }
+      this.depth++;
+      return;
+    }
+
+    if (ch === '}' || ch === ']') {
+      if (this.depth === this.fieldDepth) this.flushScalar();
+      this.depth = Math.max(this.depth - 1, 0);
+      if (capturing && this.depth === this.fieldDepth) {
+        this.emit(this.nested);
+      }
+      return;
+    }
+
+    if (capturing || this.depth !== this.fieldDepth) return;
+
+    if (ch === ':') {
+      this.afterColon = true;
+    } else if (ch === ',') {
+      this.flushScalar();
+      this.resetField();
+    } else if (this.afterColon && !/\s/.test(ch)) {
+      this.scalar += ch;
+    }
+  }
+
+  private completeString() {
+    if (this.depth !== this.fieldDepth) return;
+
+    let value: string;
+    try {
+      value = JSON.parse(`"${this.stringBuffer}"`);
+    } catch {
+      value = this.stringBuffer;
+    }
+
+    if (this.afterColon) {
+      this.emitValue(value);
+    } else {
+      this.key = value;
+    }
+  }
+
+  private flushScalar() {
+    if (!this.scalar) return;
+    this.emit(this.scalar);
+    this.scalar = '';
+  }
+
+  private emit(raw: string) {
+    try {
+      this.emitValue(JSON.parse(raw));
+    } catch {
+      this.resetField();
+    }
+  }
+
+  private emitValue(value: unknown) {
+    if (this.key !== null) {
+      this.onField(this.key, value, this.rootIsArray ? this.itemIndex : undefined);
+    }
+    this.resetField();
+  }
+
+  private resetField() {
+    this.key = null;
+    this.afterColon = false;
+    this.scalar = '';
+    this.nested = '';
+  }
+}
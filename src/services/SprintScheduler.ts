@@ -0,0 +1,319 @@
+// 迭代排期引擎：按依赖拓扑序与优先级把故事装入固定速率的 Sprint，每若干个 Sprint 组成一个 Release
+// 依赖图一次建好（id -> 下标、入度、后继表），调度过程即带优先级的 Kahn 拓扑排序，整体 O((n + e) log n)
+// 依赖成环的故事及其下游无法排期，以强连通分量报告环
+
+export interface SchedulableStory {
+  id: string;
+  storyPoints: number;
+  dependencies: string[];
+  priority: string;
+  sprint?: number;
+  release?: string;
+}
+
+export interface ScheduleOptions {
+  // 每个 Sprint 可容纳的故事点数
+  velocity: number;
+  sprintsPerRelease?: number;
+  // 优先级排序值，越大越先排；同优先级按输入顺序
+  priorityRank?: Record<string, number>;
+}
+
+export interface SprintSchedule<T extends SchedulableStory> {
+  // 已排期的故事按 Sprint 顺序在前，无法排期的故事（sprint 为 undefined）在后
+  stories: T[];
+  sprintCount: number;
+  releaseCount: number;
+  // 依赖环（每个环为参与的故事 id）
+  cycles: string[][];
+  // 依赖环下游、因此无法排期的故事 id
+  blocked: string[];
+  // 引用了不存在的故事的依赖数（忽略）
+  missingDependencies: number;
+}
+
+export interface SprintGroup<T> {
+  sprint: number;
+  points: number;
+  stories: T[];
+}
+
+export interface ReleaseGroup<T> {
+  release: string;
+  points: number;
+  sprints: SprintGroup<T>[];
+}
+
+const DEFAULT_SPRINTS_PER_RELEASE = 3;
+const DEFAULT_PRIORITY_RANK: Record<string, number> = { '高': 3, '中': 2, '低': 1 };
+// 当前 Sprint 剩余容量放不下堆顶故事时，继续向后查看的故事数上限
+const PACKING_LOOKAHEAD = 16;
+
+// 二叉堆，less(a, b) 为 true 时 a 先出堆
+class IndexHeap {
+  private items: number[] = [];
+
+  constructor(private less: (a: number, b: number) => boolean) {}
+
+  get size(): number {
+    return this.items.length;
+  }
+
+  push(item: number) {
+    const items = this.items;
+    let index = items.push(item) - 1;
+    while (index > 0) {
+      const parent = (index - 1) >> 1;
+      if (!this.less(item, items[parent])) break;
+      items[index] = items[parent];
+      index = parent;
+    }
+    items[index] = item;
+  }
+
+  pop(): number | undefined {
+    const items = this.items;
+    if (items.length === 0) return undefined;
+
+    const top = items[0];
+    const last = items.pop()!;
+    if (items.length > 0) {
+      items[0] = last;
+      let index = 0;
+      while (true) {
+        const left = 2 * index + 1;
+        const right = left + 1;
+        let smallest = index;
+        if (left < items.length && this.less(items[left], items[smallest])) smallest = left;
+        if (right < items.length && this.less(items[right], items[smallest])) smallest = right;
+        if (smallest === index) break;
+        const swap = items[index];
+        items[index] = items[smallest];
+        items[smallest] = swap;
+        index = smallest;
+      }
+    }
+    return top;
+  }
+}
+
+export const releaseName = (sprint: number, sprintsPerRelease = DEFAULT_SPRINTS_PER_RELEASE) =>
+  `R${Math.ceil(sprint / sprintsPerRelease)}`;
+
+export function scheduleSprints<T extends SchedulableStory>(
+  stories: T[],
+  options: ScheduleOptions
+): SprintSchedule<T> {
+  const velocity = Math.max(options.velocity, 0);
+  const sprintsPerRelease = Math.max(options.sprintsPerRelease ?? DEFAULT_SPRINTS_PER_RELEASE, 1);
+  const priorityRank = options.priorityRank ?? DEFAULT_PRIORITY_RANK;
+  const count = stories.length;
+
+  // 依赖图：dependents[i] 为依赖 i 的故事，indegree[i] 为 i 尚未排期的依赖数
+  const indexById = new Map<string, number>();
+  stories.forEach((story, index) => indexById.set(story.id, index));
+
+  const indegree = new Int32Array(count);
+  const dependents: number[][] = Array.from({ length: count }, () => []);
+  let missingDependencies = 0;
+
+  stories.forEach((story, index) => {
+    const seen = new Set<number>();
+    for (const dependencyId of story.dependencies ?? []) {
+      const dependency = indexById.get(dependencyId);
+      if (dependency === undefined) {
+        missingDependencies++;
+        continue;
+      }
+      if (seen.has(dependency)) continue;
+      seen.add(dependency);
+      dependents[dependency].push(index);
+      indegree[index]++;
+    }
+  });
+
+  // 出堆顺序键：优先级高者在前，同优先级按输入顺序
+  const order = new Float64Array(count);
+  let minPoints = Infinity;
+  stories.forEach((story, index) => {
+    order[index] = -(priorityRank[story.priority] ?? 0) * count + index;
+    minPoints = Math.min(minPoints, story.storyPoints || 0);
+  });
+  const ready = new IndexHeap((a, b) => order[a] < order[b]);
+  for (let index = 0; index < count; index++) {
+    if (indegree[index] === 0) ready.push(index);
+  }
+
+  // 逐个 Sprint 装箱：按优先级从就绪堆取故事，放得下则装入，放不下的暂存到下一个 Sprint；
+  // 本 Sprint 完成的故事在 Sprint 结束后才解锁其下游（下游必须排在之后的 Sprint）
+  const sprintOf = new Int32Array(count);
+  const scheduled: number[] = [];
+  let sprint = 0;
+
+  while (ready.size > 0) {
+    sprint++;
+    let points = 0;
+    let skipped = 0;
+    const deferred: number[] = [];
+    const assigned: number[] = [];
+
+    // 剩余容量小于最小故事点数时不再向后查看
+    while (ready.size > 0 && skipped < PACKING_LOOKAHEAD && velocity - points >= minPoints) {
+      const index = ready.pop()!;
+      const storyPoints = stories[index].storyPoints || 0;
+
+      // 超过速率的故事独占一个 Sprint
+      if (points + storyPoints <= velocity || assigned.length === 0) {
+        assigned.push(index);
+        points += storyPoints;
+      } else {
+        deferred.push(index);
+        skipped++;
+      }
+    }
+
+    // 速率为 0 或堆顶故事为 0 点时也保证每个 Sprint 至少排入一个故事
+    if (assigned.length === 0) assigned.push(ready.pop()!);
+
+    for (const index of deferred) ready.push(index);
+    for (const index of assigned) {
+      sprintOf[index] = sprint;
+      scheduled.push(index);
+    }
+    for (const index of assigned) {
+      for (const dependent of dependents[index]) {
+        if (--indegree[dependent] === 0) ready.push(dependent);
+      }
+    }
+  }
+
+  const unscheduled: number[] = [];
+  for (let index = 0; index < count; index++) {
+    if (sprintOf[index] === 0) unscheduled.push(index);
+  }
+  const cycles = findCycles(stories, unscheduled, indexById);
+  const inCycle = new Set(cycles.flat());
+
+  const assigned = scheduled.map(index => ({
+    ...stories[index],
+    sprint: sprintOf[index],
+    release: releaseName(sprintOf[index], sprintsPerRelease),
+  }));
+  const unassigned = unscheduled.map(index => ({ ...stories[index], sprint: undefined, release: undefined }));
+
+  return {
+    stories: [...assigned, ...unassigned],
+    sprintCount: sprint,
+    releaseCount: Math.ceil(sprint / sprintsPerRelease),
+    cycles,
+    blocked: unscheduled.map(index => stories[index].id).filter(id => !inCycle.has(id)),
+    missingDependencies,
+  };
+}
+
+// 在无法排期的故事中找出依赖环：迭代式 Tarjan 强连通分量，节点数大于 1 或自依赖的分量即为环
+function findCycles<T extends SchedulableStory>(
+  stories: T[],
+  candidates: number[],
+  indexById: Map<string, number>
+): string[][] {
+  if (candidates.length === 0) return [];
+
+  const inSubgraph = new Set(candidates);
+  const edges = new Map<number, number[]>();
+  for (const index of candidates) {
+    const targets: number[] = [];
+    for (const dependencyId of stories[index].dependencies ?? []) {
+      const dependency = indexById.get(dependencyId);
+      if (dependency !== undefined && inSubgraph.has(dependency)) targets.push(dependency);
+    }
+    edges.set(index, targets);
+  }
+
+  const discovery = new Map<number, number>();
+  const low = new Map<number, number>();
+  const onStack = new Set<number>();
+  const stack: number[] = [];
+  const cycles: string[][] = [];
+  let time = 0;
+
+  for (const root of candidates) {
+    if (discovery.has(root)) continue;
+
+    const frames: Array<{ node: number; edge: number }> = [{ node: root, edge: 0 }];
+    discovery.set(root, time);
+    low.set(root, time++);
+    stack.push(root);
+    onStack.add(root);
+
+    while (frames.length > 0) {
+      const frame = frames[frames.length - 1];
+      const targets = edges.get(frame.node)!;
+
+      if (frame.edge < targets.length) {
+        const next = targets[frame.edge++];
+        if (!discovery.has(next)) {
+          discovery.set(next, time);
+          low.set(next, time++);
+          stack.push(next);
+          onStack.add(next);
+          frames.push({ node: next, edge: 0 });
+        } else if (onStack.has(next)) {
+          low.set(frame.node, Math.min(low.get(frame.node)!, discovery.get(next)!));
+        }
+        continue;
+      }
+
+      frames.pop();
+      if (frames.length > 0) {
+        const parent = frames[frames.length - 1].node;
+        low.set(parent, Math.min(low.get(parent)!, low.get(frame.node)!));
+      }
+
+      if (low.get(frame.node) === discovery.get(frame.node)) {
+        const component: number[] = [];
+        let member: number;
+        do {
+          member = stack.pop()!;
+          onStack.delete(member);
+          component.push(member);
+        } while (member !== frame.node);
+
+        if (component.length > 1 || targets.includes(frame.node)) {
+          cycles.push(component.reverse().map(index => stories[index].id));
+        }
+      }
+    }
+  }
+
+  return cycles;
+}
+
+// 一次遍历建立 Release -> Sprint -> 故事的分组，Release 与 Sprint 按编号排序，未排期的故事不参与分组
+export function groupByRelease<T extends SchedulableStory>(stories: T[]): ReleaseGroup<T>[] {
+  const sprints = new Map<number, SprintGroup<T> & { release: string }>();
+
+  for (const story of stories) {
+    if (!story.sprint) continue;
+    let group = sprints.get(story.sprint);
+    if (!group) {
+      group = { sprint: story.sprint, release: story.release ?? '', points: 0, stories: [] };
+      sprints.set(story.sprint, group);
+    }
+    group.points += story.storyPoints || 0;
+    group.stories.push(story);
+  }
+
+  const releases = new Map<string, ReleaseGroup<T>>();
+  for (const { release, ...group } of Array.from(sprints.values()).sort((a, b) => a.sprint - b.sprint)) {
+    let releaseGroup = releases.get(release);
+    if (!releaseGroup) {
+      releaseGroup = { release, points: 0, sprints: [] };
+      releases.set(release, releaseGroup);
+    }
+    releaseGroup.points += group.points;
+    releaseGroup.sprints.push(group);
+  }
+
+  return Array.from(releases.values());
+}
@@ -0,0 +1,269 @@
+import type { Story } from '@/types/storyweaver';
+
+// 近似重复故事检测：标题、功能、价值拼接后按字符 n-gram 切分，MinHash 签名 + LSH 分桶召回候选，
+// 再对候选计算精确 Jaccard 相似度确认。每个故事只与同桶候选比较，整体接近线性时间
+
+export type DedupFields = Pick<Story, 'title' | 'action' | 'value'>;
+
+export interface DedupOptions {
+  // Jaccard 相似度达到该阈值即视为重复
+  threshold?: number;
+  // MinHash 签名长度
+  numHashes?: number;
+  // 字符 n-gram 长度
+  shingleSize?: number;
+}
+
+export interface DedupStats {
+  indexed: number;
+  checked: number;
+  duplicates: number;
+  candidatePairs: number;
+}
+
+export const DEFAULT_DEDUP_THRESHOLD = 0.7;
+const DEFAULT_NUM_HASHES = 128;
+// 选择分桶参数时漏召回相对误召回的权重（误召回会被精确 Jaccard 过滤，只增加比较次数）
+const FALSE_NEGATIVE_WEIGHT = 0.9;
+const DEFAULT_SHINGLE_SIZE = 2;
+
+// 价值缺失时的占位文本不参与相似度计算
+const VALUE_PLACEHOLDER = '（待补充）';
+const NON_WORD = /[^\p{L}\p{N}]+/gu;
+
+const FNV_OFFSET = 0x811c9dc5;
+const FNV_PRIME = 0x01000193;
+
+// murmur3 fmix32
+function mix(hash: number): number {
+  hash ^= hash >>> 16;
+  hash = Math.imul(hash, 0x85ebca6b);
+  hash ^= hash >>> 13;
+  hash = Math.imul(hash, 0xc2b2ae35);
+  hash ^= hash >>> 16;
+  return hash >>> 0;
+}
+
+// 有序去重数组求交集大小
+function intersectionSize(a: Uint32Array, b: Uint32Array): number {
+  let count = 0;
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      count++;
+      i++;
+      j++;
+    } else if (a[i] < b[j]) {
+      i++;
+    } else {
+      j++;
+    }
+  }
+  return count;
+}
+
+const bandingCache = new Map<string, [number, number]>();
+
+interface IndexedEntry<T> {
+  story: T;
+  shingles: Uint32Array;
+}
+
+export class StoryDeduplicator<T extends DedupFields = Story> {
+  readonly threshold: number;
+  private shingleSize: number;
+  private multipliers: Uint32Array;
+  private addends: Uint32Array;
+  private bands: number;
+  private rows: number;
+  private buckets: Array<Map<number, number[]>>;
+  private entries: IndexedEntry<T>[] = [];
+  private actions = new Map<string, number>();
+  private stats: DedupStats = { indexed: 0, checked: 0, duplicates: 0, candidatePairs: 0 };
+
+  constructor(options: DedupOptions = {}) {
+    this.threshold = Math.min(Math.max(options.threshold ?? DEFAULT_DEDUP_THRESHOLD, 0), 1);
+    this.shingleSize = Math.max(options.shingleSize ?? DEFAULT_SHINGLE_SIZE, 1);
+
+    const numHashes = Math.max(options.numHashes ?? DEFAULT_NUM_HASHES, 1);
+    [this.bands, this.rows] = StoryDeduplicator.chooseBanding(numHashes, this.threshold);
+
+    const used = this.bands * this.rows;
+    this.multipliers = new Uint32Array(used);
+    this.addends = new Uint32Array(used);
+    for (let k = 0; k < used; k++) {
+      this.multipliers[k] = mix(2 * k + 1) | 1;
+      this.addends[k] = mix(2 * k + 2);
+    }
+
+    this.buckets = Array.from({ length: this.bands }, () => new Map());
+  }
+
+  // 选择分桶参数：b 个桶、每桶 r 行时，相似度为 s 的两条故事成为候选的概率为 1-(1-s^r)^b
+  // 在 b*r 不超过签名长度的组合中，取误召回与漏召回面积加权和最小者（偏向召回）
+  static chooseBanding(numHashes: number, threshold: number): [number, number] {
+    const key = `${numHashes}:${threshold}`;
+    const cached = bandingCache.get(key);
+    if (cached) return cached;
+
+    const integrate = (f: (s: number) => number, from: number, to: number) => {
+      const steps = 50;
+      const width = (to - from) / steps;
+      let area = 0;
+      for (let i = 0; i < steps; i++) area += f(from + (i + 0.5) * width);
+      return area * width;
+    };
+
+    let best: [number, number] = [numHashes, 1];
+    let bestError = Infinity;
+    for (let bands = 1; bands <= numHashes; bands++) {
+      for (let rows = 1; bands * rows <= numHashes; rows++) {
+        const probability = (s: number) => 1 - Math.pow(1 - Math.pow(s, rows), bands);
+        const error = (1 - FALSE_NEGATIVE_WEIGHT) * integrate(probability, 0, threshold)
+          + FALSE_NEGATIVE_WEIGHT * integrate(s => 1 - probability(s), threshold, 1);
+        if (error < bestError) {
+          bestError = error;
+          best = [bands, rows];
+        }
+      }
+    }
+
+    bandingCache.set(key, best);
+    return best;
+  }
+
+  // 返回已索引故事中与之重复的故事（功能文本完全相同，或相似度达到阈值），否则返回 null
+  findDuplicate(story: T): T | null {
+    const action = story.action.toLowerCase().trim();
+    const exact = this.actions.get(action);
+    if (exact !== undefined) return this.entries[exact].story;
+
+    const shingles = this.shingle(story);
+    return this.match(shingles, this.signature(shingles));
+  }
+
+  // 不重复时加入索引并返回 true，重复时返回 false
+  add(story: T): boolean {
+    this.stats.checked++;
+
+    const action = story.action.toLowerCase().trim();
+    if (this.actions.has(action)) {
+      this.stats.duplicates++;
+      return false;
+    }
+
+    const shingles = this.shingle(story);
+    const signature = this.signature(shingles);
+    if (this.match(shingles, signature)) {
+      this.stats.duplicates++;
+      return false;
+    }
+
+    this.insert(story, action, shingles, signature);
+    return true;
+  }
+
+  // 仅建立索引，不做重复检测（用于预先载入已有故事）
+  index(stories: Iterable<T>) {
+    for (const story of stories) {
+      const action = story.action.toLowerCase().trim();
+      const shingles = this.shingle(story);
+      this.insert(story, action, shingles, this.signature(shingles));
+    }
+  }
+
+  // 保留首次出现的故事，过滤其余重复项
+  filter(stories: T[]): T[] {
+    return stories.filter(story => this.add(story));
+  }
+
+  getStats(): DedupStats {
+    return { ...this.stats, indexed: this.entries.length };
+  }
+
+  private insert(story: T, action: string, shingles: Uint32Array, signature: Uint32Array) {
+    const id = this.entries.length;
+    this.entries.push({ story, shingles });
+    if (!this.actions.has(action)) this.actions.set(action, id);
+
+    for (let band = 0; band < this.bands; band++) {
+      const key = this.bandKey(signature, band);
+      const bucket = this.buckets[band].get(key);
+      if (bucket) bucket.push(id);
+      else this.buckets[band].set(key, [id]);
+    }
+  }
+
+  private match(shingles: Uint32Array, signature: Uint32Array): T | null {
+    const seen = new Set<number>();
+
+    for (let band = 0; band < this.bands; band++) {
+      const bucket = this.buckets[band].get(this.bandKey(signature, band));
+      if (!bucket) continue;
+
+      for (const id of bucket) {
+        if (seen.has(id)) continue;
+        seen.add(id);
+        this.stats.candidatePairs++;
+
+        const other = this.entries[id].shingles;
+        const shared = intersectionSize(shingles, other);
+        const union = shingles.length + other.length - shared;
+        if (union > 0 && shared / union >= this.threshold) {
+          return this.entries[id].story;
+        }
+      }
+    }
+
+    return null;
+  }
+
+  // 规范化文本（小写、去除标点与空白）后切分为 n-gram，哈希后排序去重
+  private shingle(story: T): Uint32Array {
+    const value = story.value === VALUE_PLACEHOLDER ? '' : story.value;
+    const text = `${story.title}${story.action}${value}`.toLowerCase().replace(NON_WORD, '');
+    const size = Math.min(this.shingleSize, text.length);
+    const count = Math.max(text.length - size + 1, 0);
+    const hashes = new Uint32Array(count);
+
+    for (let i = 0; i < count; i++) {
+      let hash = FNV_OFFSET;
+      for (let j = i; j < i + size; j++) {
+        hash = Math.imul(hash ^ text.charCodeAt(j), FNV_PRIME);
+      }
+      hashes[i] = mix(hash);
+    }
+
+    hashes.sort();
+    let unique = 0;
+    for (let i = 0; i < hashes.length; i++) {
+      if (i === 0 || hashes[i] !== hashes[i - 1]) hashes[unique++] = hashes[i];
+    }
+    return hashes.subarray(0, unique);
+  }
+
+  // 第 k 个哈希函数为 (a_k * x + b_k) mod 2^32（a_k 为奇数），只计算分桶用到的 b*r 个
+  private signature(shingles: Uint32Array): Uint32Array {
+    const { multipliers, addends } = this;
+    const signature = new Uint32Array(multipliers.length).fill(0xffffffff);
+
+    for (let i = 0; i < shingles.length; i++) {
+      const shingle = shingles[i];
+      for (let k = 0; k < multipliers.length; k++) {
+        const hash = (Math.imul(multipliers[k], shingle) + addends[k]) >>> 0;
+        if (hash < signature[k]) signature[k] = hash;
+      }
+    }
+
+    return signature;
+  }
+
+  private bandKey(signature: Uint32Array, band: number): number {
+    let hash = FNV_OFFSET;
+    for (let row = band * this.rows; row < (band + 1) * this.rows; row++) {
+      hash = Math.imul(hash ^ signature[row], FNV_PRIME);
+    }
+    return hash >>> 0;
+  }
+}
@@ -13,8 +13,13 @@ import {
   generateUUID,
   generateTraceId
 } from '@/types/storyweaver';
-import { LLMOptimizer } from './LLMOptimizer';
-import { LLMModel, LLMConfig } from './LLMService';
+import { LLMOptimizer, CostMonitor } from './LLMOptimizer';
+import { runOrdered } from './LLMBatchPipeline';
+import { sourceLengthScore, storyRuleMatcher } from './StoryRules';
+import { LLMModel, LLMConfig, LLMErrorCode, LLMStoryOptimizationRequest, LLMStoryOptimizationResponse } from './LLMService';
+
+// 流式优化时单个故事字段解析完成的回调
+export type StoryFieldCallback = (field: string, value: unknown) => void;
 
 export class StoryGenerator {
   private llmOptimizer: LLMOptimizer | null = null;
@@ -30,76 +35,20 @@ export class StoryGenerator {
   isLLMEnabled(): boolean {
     return !!this.llmOptimizer && !!this.llmConfig?.apiKey?.trim();
   }
+  // 单项抽取接口，均由编译后的规则匹配器一次扫描得出
   extractRole(text: string): { role: string; confidence: number } {
-    const explicitPatterns = [
-      /作为[了一个个名]*\s*([^，,]+?)(?:，|,|我|可以|能够|需要|想要)/i,
-      /(?:^|\n)([^，,]{2,20}?)可以/,
-      /(?:^|\n)([^，,]{2,20}?)能够/
-    ];
-    
-    for (const pattern of explicitPatterns) {
-      const match = text.match(pattern);
-      if (match) {
-        const extractedRole = match[1]?.trim();
-        if (extractedRole && extractedRole.length >= 2) {
-          return { role: extractedRole, confidence: 0.9 };
-        }
-      }
-    }
-    
-    const roleKeywords: Record<string, string[]> = {
-      '用户': ['用户', '使用者', '终端用户', '普通用户'],
-      '管理员': ['管理员', '超级管理员', '系统管理员', 'admin'],
-      '访客': ['访客', '游客', '未登录用户', '临时用户']
-    };
-    
-    for (const [role, keywords] of Object.entries(roleKeywords)) {
-      for (const keyword of keywords) {
-        if (text.includes(keyword)) {
-          return { role, confidence: 0.8 };
-        }
-      }
-    }
-    
-    return { role: '用户', confidence: 0.5 };
+    const { role, roleConfidence } = storyRuleMatcher.analyze(text);
+    return { role, confidence: roleConfidence };
   }
   
   extractAction(text: string): { action: string | null; confidence: number } {
-    const actionPatterns = [
-      /(?:可以|能够|支持|允许)\s*(.+?)(?:以便|从而|为了|so\s*that|$)/i,
-      /(?:需要|要求|必须)\s*(.+?)(?:，|,|$)/i,
-      /(?:想要|希望|期望)\s*(.+?)(?:，|,|$)/i
-    ];
-    
-    for (const pattern of actionPatterns) {
-      const match = text.match(pattern);
-      if (match) {
-        let action = match[1]?.trim();
-        if (action && action.length >= 5) {
-          return { action, confidence: 0.85 };
-        }
-      }
-    }
-    
-    return { action: null, confidence: 0 };
+    const { action, actionConfidence } = storyRuleMatcher.analyze(text);
+    return { action, confidence: actionConfidence };
   }
   
   extractValue(text: string): { value: string | null; confidence: number } {
-    const valuePatterns = [
-      /(?:以便|从而|为了|so\s*that)\s*(.+?)(?:。|$)/i
-    ];
-    
-    for (const pattern of valuePatterns) {
-      const match = text.match(pattern);
-      if (match) {
-        const value = match[1]?.trim();
-        if (value && value.length >= 3) {
-          return { value, confidence: 0.9 };
-        }
-      }
-    }
-    
-    return { value: null, confidence: 0.3 };
+    const { value, valueConfidence } = storyRuleMatcher.analyze(text);
+    return { value, confidence: valueConfidence };
   }
   
   calculateOverallConfidence(factors: {
@@ -146,81 +95,160 @@ export class StoryGenerator {
   }
   
   inferPriority(text: string): Priority {
-    const highKeywords = ['必须', '一定', '关键', '核心', '重要', 'P0', '高优先级'];
-    const lowKeywords = ['可选', '未来', '暂缓', 'P2', '低优先级', 'nice to have'];
-    
-    const lowerText = text.toLowerCase();
-    
-    if (highKeywords.some(kw => lowerText.includes(kw))) return Priority.P0;
-    if (lowKeywords.some(kw => lowerText.includes(kw))) return Priority.P2;
-    return Priority.P1;
+    return storyRuleMatcher.analyze(text).priority;
   }
   
   calculateTemplateMatch(text: string): number {
-    const patterns = [
-      /As a\s+.+?\s*,?\s*I want(?: to)?\s+.+?\s*,?\s*So that\s+.+?/i,
-      /作为[了一个个名]*\s*.+?\s*[,，]?\s*(?:我)?(?:想|希望|需要|想要|可以|能够)/,
-      /.+?可以.+?以便.+/,
-      /.+?能够.+?从而.+/
-    ];
-    
-    for (const pattern of patterns) {
-      if (pattern.test(text)) return 0.9;
-    }
-    
-    if (/作为|As a/.test(text)) return 0.6;
-    if (/可以|能够|want|need/.test(text)) return 0.4;
-    
-    return 0.2;
+    return storyRuleMatcher.analyze(text).templateMatch;
   }
   
   calculateSourceLength(text: string): number {
-    const length = text.length;
-    if (length >= 20 && length <= 200) return 0.9;
-    if (length >= 10 && length < 20) return 0.7;
-    if (length > 200 && length <= 500) return 0.6;
-    if (length < 10) return 0.3;
-    return 0.4;
+    return sourceLengthScore(text.length);
   }
   
   calculateLanguageClarity(text: string): number {
-    const ambiguousWords = ['等等', '之类', '相关', '其他', '某些'];
-    let penalty = 0;
-    
-    for (const word of ambiguousWords) {
-      if (text.includes(word)) penalty += 0.1;
-    }
-    
-    return Math.max(0.9 - penalty, 0.3);
+    return storyRuleMatcher.analyze(text).languageClarity;
   }
   
   async generateFromSentence(
     sentence: string,
     section: { id: string; title: string }
   ): Promise<Story | null> {
-    const { role, confidence: roleConf } = this.extractRole(sentence);
-    const { action, confidence: actionConf } = this.extractAction(sentence);
+    const story = this.buildStory(sentence, section);
+    if (!story) return null;
+
+    return this.optimizeStory(story, sentence);
+  }
+
+  // 批量生成：启发式规则同步完成，LLM优化按服务提供方限流并行执行，按输入顺序逐个交付
+  // 同一章节内需要优化的故事合并为批量请求，批量结果中缺失的条目逐条回退
+  async generateBatch(
+    items: Array<{ sentence: string; section: { id: string; title: string } }>,
+    onStory?: (story: Story | null, index: number) => void,
+    onField?: (index: number, field: string, value: unknown) => void
+  ): Promise<Array<Story | null>> {
+    const drafts = items.map(item => this.buildStory(item.sentence, item.section));
+    return this.optimizeDrafts(drafts, items, onStory, onField);
+  }
+
+  // 对规则生成的故事草稿（可在文档 Worker 中生成）执行LLM优化，按输入顺序逐个交付
+  // signal 中止时取消进行中的请求，尚未发出的优化直接跳过（保留规则生成的版本）
+  async optimizeDrafts(
+    drafts: Array<Story | null>,
+    items: Array<{ sentence: string }>,
+    onStory?: (story: Story | null, index: number) => void,
+    onField?: (index: number, field: string, value: unknown) => void,
+    signal?: AbortSignal
+  ): Promise<Array<Story | null>> {
+    const fieldCallback = (index: number) => onField && ((field: string, value: unknown) => onField(index, field, value));
+    const batched = this.scheduleBatches(drafts, items, fieldCallback, signal);
+
+    return runOrdered(
+      drafts,
+      (draft, index) => {
+        if (!draft) return Promise.resolve(null);
+        return batched.get(index) ?? this.optimizeStory(draft, items[index].sentence, fieldCallback(index), signal);
+      },
+      onStory
+    );
+  }
+
+  // 按章节分组并按优化器的批量大小切分，返回 故事下标 -> 优化结果 的映射
+  private scheduleBatches(
+    drafts: Array<Story | null>,
+    items: Array<{ sentence: string }>,
+    fieldCallback: (index: number) => StoryFieldCallback | undefined,
+    signal?: AbortSignal
+  ): Map<number, Promise<Story>> {
+    const scheduled = new Map<number, Promise<Story>>();
+    if (!this.isLLMEnabled()) return scheduled;
+
+    const optimizer = this.llmOptimizer!;
+    const batchSize = optimizer.getBatchSize();
+    if (batchSize <= 1) return scheduled;
+
+    const groups = new Map<string, number[]>();
+    drafts.forEach((draft, index) => {
+      if (!draft || !optimizer.shouldOptimize(draft)) return;
+      const sectionId = draft.sourceReference.sectionId;
+      groups.set(sectionId, [...(groups.get(sectionId) || []), index]);
+    });
+
+    for (const indices of groups.values()) {
+      for (let start = 0; start < indices.length; start += batchSize) {
+        const chunk = indices.slice(start, start + batchSize);
+        if (chunk.length === 1) continue;
+
+        const batch = this.optimizeChunk(
+          chunk.map(index => ({
+            story: drafts[index]!,
+            sentence: items[index].sentence,
+            onField: fieldCallback(index),
+          })),
+          signal
+        );
+        chunk.forEach((index, position) => {
+          scheduled.set(index, batch.then(stories => stories[position]));
+        });
+      }
+    }
+
+    return scheduled;
+  }
+
+  private async optimizeChunk(
+    entries: Array<{ story: Story; sentence: string; onField?: StoryFieldCallback }>,
+    signal?: AbortSignal
+  ): Promise<Story[]> {
+    const optimizer = this.llmOptimizer!;
+    let results: Array<LLMStoryOptimizationResponse | null>;
+
+    try {
+      results = await optimizer.optimizeBatch(
+        entries.map(({ story, sentence, onField }) => this.buildOptimizationRequest(story, sentence, onField)),
+        signal
+      );
+    } catch (error: any) {
+      // 已取消或服务提供方已熔断时逐条回退也会立即失败，直接保留规则生成的版本
+      if (signal?.aborted || error?.message === LLMErrorCode.CIRCUIT_OPEN) {
+        return entries.map(({ story }) => story);
+      }
+      console.warn('LLM批量优化失败，逐条回退:', error);
+      results = entries.map(() => null);
+    }
+
+    return Promise.all(entries.map(({ story, sentence, onField }, position) => {
+      const result = results[position];
+      if (!result) return this.optimizeStory(story, sentence, onField, signal);
+
+      this.trackOptimization(result);
+      return result.optimizedStory;
+    }));
+  }
+
+  buildStory(
+    sentence: string,
+    section: { id: string; title: string }
+  ): Story | null {
+    const signals = storyRuleMatcher.analyze(sentence);
+    const { role, action, value } = signals;
     
     if (!action) return null;
     
-    const { value, confidence: valueConf } = this.extractValue(sentence);
     const finalValue = value || '（待补充）';
     const description = `As a ${role}, I want to ${action}, So that ${finalValue}`;
     const title = action.length <= 15 ? action : action.substring(0, 15) + '...';
-    const templateMatch = this.calculateTemplateMatch(sentence);
-    const sourceLength = this.calculateSourceLength(sentence);
-    const languageClarity = this.calculateLanguageClarity(sentence);
     
     const confidence = this.calculateOverallConfidence({
-      templateMatch,
+      templateMatch: signals.templateMatch,
       roleClarity: role !== '用户' ? 0.85 : 0.5,
       actionClarity: action.length >= 10 && action.length <= 100 ? 0.7 : 0.5,
       valueClarity: value && value !== '（待补充）' ? 0.85 : 0.3,
-      sourceLength,
-      languageClarity
+      sourceLength: signals.sourceLength,
+      languageClarity: signals.languageClarity
     });
     
-    let story: Story = {
+    return {
       id: generateUUID(),
       documentId: '',
       title,
@@ -229,7 +257,7 @@ export class StoryGenerator {
       action,
       value: finalValue,
       module: section.title,
-      priority: this.inferPriority(sentence),
+      priority: signals.priority,
       confidence,
       sourceReference: {
         text: sentence,
@@ -243,36 +271,60 @@ export class StoryGenerator {
       sortOrder: 0,
       dependencies: [], // 新增字段
     };
+  }
 
-    // LLM优化
-    if (this.isLLMEnabled() && this.llmOptimizer?.shouldOptimize(story)) {
-      try {
-        const optimizedResult = await this.llmOptimizer.optimizeStory({
-          story,
-          sourceContext: sentence,
-          optimizationGoals: [
-            '提升描述的清晰度',
-            '补充缺失信息',
-            '优化语言表达',
-            '增强置信度'
-          ]
-        });
-        
-        // 更新成本监控
-        const costMonitor = (await import('./LLMOptimizer')).CostMonitor.getInstance();
-        costMonitor.trackUsage(
-          this.llmConfig!.model,
-          optimizedResult.cost.promptTokens,
-          optimizedResult.cost.completionTokens,
-          optimizedResult.timing.total
-        );
+  // LLM优化（并发、速率限制与重试由服务提供方运行时负责）
+  async optimizeStory(
+    story: Story,
+    sentence: string,
+    onField?: StoryFieldCallback,
+    signal?: AbortSignal
+  ): Promise<Story> {
+    if (signal?.aborted || !this.isLLMEnabled() || !this.llmOptimizer?.shouldOptimize(story)) {
+      return story;
+    }
 
-        story = optimizedResult.optimizedStory;
-      } catch (error) {
-        console.warn('LLM优化失败，使用原始版本:', error);
-      }
+    const optimizer = this.llmOptimizer;
+
+    try {
+      const optimizedResult = await optimizer.optimizeStory(this.buildOptimizationRequest(story, sentence, onField), signal);
+
+      this.trackOptimization(optimizedResult);
+      return optimizedResult.optimizedStory;
+    } catch (error) {
+      if (signal?.aborted) return story;
+      console.warn('LLM优化失败，使用原始版本:', error);
+      return story;
     }
-    
-    return story;
+  }
+
+  private buildOptimizationRequest(
+    story: Story,
+    sentence: string,
+    onField?: StoryFieldCallback
+  ): LLMStoryOptimizationRequest {
+    return {
+      story,
+      sourceContext: sentence,
+      onField,
+      optimizationGoals: [
+        '提升描述的清晰度',
+        '补充缺失信息',
+        '优化语言表达',
+        '增强置信度'
+      ]
+    };
+  }
+
+  // 更新成本监控（缓存命中已在优化器中单独计入）
+  private trackOptimization(result: LLMStoryOptimizationResponse) {
+    if (result.cached) return;
+
+    CostMonitor.getInstance().trackUsage(
+      result.model,
+      result.cost.promptTokens,
+      result.cost.completionTokens,
+      result.timing.total
+    );
   }
 }
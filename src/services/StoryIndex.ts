@@ -0,0 +1,257 @@
+import type { Story } from '@/types/storyweaver';
+
+// 故事列表的客户端索引：预先规范化检索文本并建立模块/优先级分桶，字符二元组倒排表在首次搜索时建立，
+// 各排序方式的结果按需计算后缓存。sync 按对象引用比较新旧列表，只重建变化的故事，
+// 编辑单个故事时在已缓存的排序结果中二分插入，不重新排序。
+// 逐字输入时新查询包含上一次查询，只在上一次的结果中继续筛选
+
+export type StorySortKey = 'confidence' | 'priority' | 'module' | 'none';
+
+export interface StoryQuery {
+  module?: string;  // 'all' 或缺省表示不过滤
+  priority?: string;
+  search?: string;
+  sortBy?: StorySortKey | string;
+}
+
+export type IndexableStory = Pick<Story, 'id' | 'title' | 'description' | 'module' | 'priority' | 'confidence'>;
+
+interface Entry<T> {
+  story: T;
+  position: number;
+  title: string;
+  description: string;
+  grams: number[] | null;
+}
+
+const PRIORITY_ORDER: Record<string, number> = { 'P0': 4, 'P1': 3, 'P2': 2, 'P3': 1 };
+
+// 文本中所有相邻字符二元组（去重），以两个 UTF-16 码元拼成的整数表示，避免逐个切出子串
+const bigrams = (text: string): number[] => {
+  const grams = new Set<number>();
+  for (let i = 0; i + 1 < text.length; i++) grams.add(text.charCodeAt(i) * 0x10000 + text.charCodeAt(i + 1));
+  return Array.from(grams);
+};
+
+const addTo = <K, V>(map: Map<K, Set<V>>, key: K, value: V) => {
+  const bucket = map.get(key);
+  if (bucket) bucket.add(value);
+  else map.set(key, new Set([value]));
+};
+
+const removeFrom = <K, V>(map: Map<K, Set<V>>, key: K, value: V) => {
+  const bucket = map.get(key);
+  if (!bucket) return;
+  bucket.delete(value);
+  if (bucket.size === 0) map.delete(key);
+};
+
+export class StoryIndex<T extends IndexableStory = Story> {
+  private entries = new Map<string, Entry<T>>();
+  // 二元组 -> 包含它的故事；只用于缩小候选范围，数组比 Set 建立快得多
+  private grams = new Map<number, Entry<T>[]>();
+  private modules = new Map<string, Set<Entry<T>>>();
+  private priorities = new Map<string, Set<Entry<T>>>();
+  private orders = new Map<StorySortKey, Entry<T>[]>();
+  private gramsBuilt = false;
+  private lastSearch: { query: string; matches: Set<Entry<T>> } | null = null;
+  private version = 0;
+
+  constructor(stories: T[] = []) {
+    this.sync(stories);
+  }
+
+  get size(): number {
+    return this.entries.size;
+  }
+
+  // 与最新的故事数组同步，返回索引版本号（内容有变化时递增），可作为 useMemo 依赖
+  sync(stories: T[]): number {
+    let changed = stories.length !== this.entries.size;
+    let reordered = false;
+    const seen = new Set<string>();
+
+    stories.forEach((story, position) => {
+      seen.add(story.id);
+      const entry = this.entries.get(story.id);
+      if (entry && entry.story === story) {
+        if (entry.position !== position) {
+          entry.position = position;
+          reordered = true;
+        }
+        return;
+      }
+      this.upsert(story, position);
+      changed = true;
+    });
+
+    if (seen.size !== this.entries.size) {
+      for (const id of Array.from(this.entries.keys())) {
+        if (!seen.has(id)) this.remove(id);
+      }
+      changed = true;
+    }
+
+    // 顺序变化影响同分故事的先后（与 Array.prototype.sort 的稳定排序一致），丢弃缓存的排序
+    if (reordered) {
+      this.orders.clear();
+      changed = true;
+    }
+
+    if (changed) this.version++;
+    return this.version;
+  }
+
+  upsert(story: T, position = this.entries.get(story.id)?.position ?? this.entries.size) {
+    const previous = this.entries.get(story.id);
+    if (previous) this.unindex(previous);
+
+    const title = story.title.toLowerCase();
+    const description = story.description.toLowerCase();
+    const entry: Entry<T> = {
+      story,
+      position,
+      title,
+      description,
+      grams: null,
+    };
+    this.entries.set(story.id, entry);
+    this.lastSearch = null;
+
+    if (this.gramsBuilt) this.indexGrams(entry);
+    addTo(this.modules, story.module, entry);
+    addTo(this.priorities, story.priority, entry);
+
+    for (const [key, order] of this.orders) {
+      if (previous) {
+        const index = order.indexOf(previous);
+        if (this.compare(key, previous, entry) === 0 && previous.position === position) {
+          order[index] = entry;
+          continue;
+        }
+        order.splice(index, 1);
+      }
+      order.splice(this.insertionPoint(key, order, entry), 0, entry);
+    }
+  }
+
+  remove(id: string) {
+    const entry = this.entries.get(id);
+    if (!entry) return;
+    this.unindex(entry);
+    this.entries.delete(id);
+    this.lastSearch = null;
+    for (const order of this.orders.values()) {
+      order.splice(order.indexOf(entry), 1);
+    }
+  }
+
+  getModules(): string[] {
+    return Array.from(this.modules.keys());
+  }
+
+  query({ module, priority, search, sortBy }: StoryQuery = {}): T[] {
+    const inModule = module && module !== 'all' ? this.modules.get(module) ?? new Set<Entry<T>>() : null;
+    const inPriority = priority && priority !== 'all' ? this.priorities.get(priority) ?? new Set<Entry<T>>() : null;
+    const matches = this.search(search?.toLowerCase() ?? '');
+
+    const result: T[] = [];
+    for (const entry of this.getOrder((sortBy as StorySortKey) || 'none')) {
+      if (inModule && !inModule.has(entry)) continue;
+      if (inPriority && !inPriority.has(entry)) continue;
+      if (matches && !matches.has(entry)) continue;
+      result.push(entry.story);
+    }
+    return result;
+  }
+
+  // 标题或描述包含查询串的故事；先求候选再逐条确认。候选为上一次查询的结果（新查询包含上一次查询时），
+  // 或查询串各二元组中最短的倒排表
+  private search(query: string): Set<Entry<T>> | null {
+    if (!query) return null;
+    if (this.lastSearch?.query === query) return this.lastSearch.matches;
+
+    let candidates: Iterable<Entry<T>>;
+    if (this.lastSearch && query.includes(this.lastSearch.query)) {
+      candidates = this.lastSearch.matches;
+    } else if (query.length < 2) {
+      candidates = this.entries.values();
+    } else {
+      this.buildGrams();
+      let shortest: Entry<T>[] | undefined;
+      for (const gram of bigrams(query)) {
+        const posting = this.grams.get(gram);
+        if (!posting) return new Set();
+        if (!shortest || posting.length < shortest.length) shortest = posting;
+      }
+      candidates = shortest!;
+    }
+
+    const matches = new Set<Entry<T>>();
+    for (const entry of candidates) {
+      if (entry.title.includes(query) || entry.description.includes(query)) matches.add(entry);
+    }
+    this.lastSearch = { query, matches };
+    return matches;
+  }
+
+  private buildGrams() {
+    if (this.gramsBuilt) return;
+    this.gramsBuilt = true;
+    for (const entry of this.entries.values()) this.indexGrams(entry);
+  }
+
+  private indexGrams(entry: Entry<T>) {
+    entry.grams = bigrams(`${entry.title}\n${entry.description}`);
+    for (const gram of entry.grams) {
+      const posting = this.grams.get(gram);
+      if (posting) posting.push(entry);
+      else this.grams.set(gram, [entry]);
+    }
+  }
+
+  private getOrder(key: StorySortKey): Entry<T>[] {
+    let order = this.orders.get(key);
+    if (!order) {
+      order = Array.from(this.entries.values());
+      order.sort((a, b) => this.compare(key, a, b) || a.position - b.position);
+      this.orders.set(key, order);
+    }
+    return order;
+  }
+
+  private insertionPoint(key: StorySortKey, order: Entry<T>[], entry: Entry<T>): number {
+    let low = 0;
+    let high = order.length;
+    while (low < high) {
+      const middle = (low + high) >> 1;
+      const other = order[middle];
+      if ((this.compare(key, other, entry) || other.position - entry.position) <= 0) low = middle + 1;
+      else high = middle;
+    }
+    return low;
+  }
+
+  private compare(key: StorySortKey, a: Entry<T>, b: Entry<T>): number {
+    switch (key) {
+      case 'confidence':
+        return b.story.confidence.overall - a.story.confidence.overall;
+      case 'priority':
+        return (PRIORITY_ORDER[b.story.priority] || 0) - (PRIORITY_ORDER[a.story.priority] || 0);
+      case 'module':
+        return a.story.module.localeCompare(b.story.module);
+      default:
+        return 0;
+    }
+  }
+
+  private unindex(entry: Entry<T>) {
+    for (const gram of entry.grams ?? []) {
+      const posting = this.grams.get(gram)!;
+      posting.splice(posting.indexOf(entry), 1);
+      if (posting.length === 0) this.grams.delete(gram);
+    }
+    removeFrom(this.modules, entry.story.module, entry);
+    removeFrom(this.priorities, entry.story.priority, entry);
+  }
+}
@@ -0,0 +1,304 @@
+import { Priority } from '@/types/storyweaver';
+
+// 故事启发式规则的编译版本：关键词在模块加载时编译为 Aho-Corasick 自动机，正则预编译一次
+// 每个句子只扫描一遍即得到全部关键词命中，再只运行命中了触发词的正则，一次产出所有抽取信号
+
+export interface StorySignals {
+  role: string;
+  roleConfidence: number;
+  action: string | null;
+  actionConfidence: number;
+  value: string | null;
+  valueConfidence: number;
+  templateMatch: number;
+  sourceLength: number;
+  languageClarity: number;
+  priority: Priority;
+}
+
+interface KeywordEntry {
+  keyword: string;
+  id: number;
+}
+
+// 多模式匹配自动机：关键词编译为稠密转移表（字符先映射到字符类），一次扫描标记所有出现过的关键词
+// foldCase 时 A-Z 与 a-z 映射到同一字符类，等价于在小写化后的文本上匹配
+class KeywordAutomaton {
+  private classOf = new Uint8Array(65536);
+  private classCount = 1;
+  private delta: Int32Array;
+  private outputs: number[][];
+
+  constructor(entries: KeywordEntry[], foldCase: boolean = false) {
+    const children: Array<Map<number, number>> = [new Map()];
+    const outputs: number[][] = [[]];
+
+    for (const { keyword, id } of entries) {
+      let state = 0;
+      for (let i = 0; i < keyword.length; i++) {
+        const cls = this.classFor(keyword.charCodeAt(i), foldCase);
+        let target = children[state].get(cls);
+        if (target === undefined) {
+          target = children.length;
+          children.push(new Map());
+          outputs.push([]);
+          children[state].set(cls, target);
+        }
+        state = target;
+      }
+      outputs[state].push(id);
+    }
+
+    // 广度优先补全转移表：缺失的转移沿失败指针继承，扫描时无需回溯
+    const width = this.classCount;
+    const delta = new Int32Array(children.length * width);
+    const fail = new Int32Array(children.length);
+    const queue: number[] = [];
+
+    for (const [cls, target] of children[0]) {
+      delta[cls] = target;
+      queue.push(target);
+    }
+    for (let head = 0; head < queue.length; head++) {
+      const state = queue[head];
+      outputs[state].push(...outputs[fail[state]]);
+      for (let cls = 0; cls < width; cls++) {
+        const target = children[state].get(cls);
+        if (target === undefined) {
+          delta[state * width + cls] = delta[fail[state] * width + cls];
+        } else {
+          delta[state * width + cls] = target;
+          fail[target] = delta[fail[state] * width + cls];
+          queue.push(target);
+        }
+      }
+    }
+
+    this.delta = delta;
+    this.outputs = outputs;
+  }
+
+  private classFor(code: number, foldCase: boolean): number {
+    const folded = foldCase && code >= 65 && code <= 90 ? code + 32 : code;
+    if (!this.classOf[folded]) {
+      this.classOf[folded] = this.classCount++;
+      if (foldCase && folded >= 97 && folded <= 122) {
+        this.classOf[folded - 32] = this.classOf[folded];
+      }
+    }
+    return this.classOf[folded];
+  }
+
+  next(state: number, code: number, hits: Uint8Array): number {
+    const target = this.delta[state * this.classCount + this.classOf[code]];
+    const ids = this.outputs[target];
+    for (let i = 0; i < ids.length; i++) {
+      hits[ids[i]] = 1;
+    }
+    return target;
+  }
+}
+
+// 规则定义（与逐项抽取的原实现一致，顺序即优先级）
+const ROLE_PATTERNS: Array<{ pattern: RegExp; trigger: string }> = [
+  { pattern: /作为[了一个个名]*\s*([^，,]+?)(?:，|,|我|可以|能够|需要|想要)/i, trigger: '作为' },
+  { pattern: /(?:^|\n)([^，,]{2,20}?)可以/, trigger: '可以' },
+  { pattern: /(?:^|\n)([^，,]{2,20}?)能够/, trigger: '能够' },
+];
+
+const ROLE_KEYWORDS: Array<[string, string[]]> = [
+  ['用户', ['用户', '使用者', '终端用户', '普通用户']],
+  ['管理员', ['管理员', '超级管理员', '系统管理员', 'admin']],
+  ['访客', ['访客', '游客', '未登录用户', '临时用户']],
+];
+
+const ACTION_PATTERNS: Array<{ pattern: RegExp; triggers: string[] }> = [
+  { pattern: /(?:可以|能够|支持|允许)\s*(.+?)(?:以便|从而|为了|so\s*that|$)/i, triggers: ['可以', '能够', '支持', '允许'] },
+  { pattern: /(?:需要|要求|必须)\s*(.+?)(?:，|,|$)/i, triggers: ['需要', '要求', '必须'] },
+  { pattern: /(?:想要|希望|期望)\s*(.+?)(?:，|,|$)/i, triggers: ['想要', '希望', '期望'] },
+];
+
+const VALUE_PATTERN = /(?:以便|从而|为了|so\s*that)\s*(.+?)(?:。|$)/i;
+const VALUE_TRIGGERS = ['以便', '从而', '为了'];
+// so\s*that 不区分大小写，以 "so" 作为触发词
+const VALUE_FOLDED_TRIGGER = 'so';
+
+const TEMPLATE_PATTERNS: Array<{ pattern: RegExp; triggers: string[]; folded?: boolean }> = [
+  { pattern: /As a\s+.+?\s*,?\s*I want(?: to)?\s+.+?\s*,?\s*So that\s+.+?/i, triggers: ['as a'], folded: true },
+  { pattern: /作为[了一个个名]*\s*.+?\s*[,，]?\s*(?:我)?(?:想|希望|需要|想要|可以|能够)/, triggers: ['作为'] },
+  { pattern: /.+?可以.+?以便.+/, triggers: ['可以', '以便'] },
+  { pattern: /.+?能够.+?从而.+/, triggers: ['能够', '从而'] },
+];
+const TEMPLATE_PARTIAL = ['作为', 'As a'];
+const TEMPLATE_WEAK = ['可以', '能够', 'want', 'need'];
+
+// 优先级关键词在小写化后的文本中匹配
+const HIGH_PRIORITY_KEYWORDS = ['必须', '一定', '关键', '核心', '重要', 'P0', '高优先级'];
+const LOW_PRIORITY_KEYWORDS = ['可选', '未来', '暂缓', 'P2', '低优先级', 'nice to have'];
+
+const AMBIGUOUS_WORDS = ['等等', '之类', '相关', '其他', '某些'];
+
+// 关键词表：精确匹配与忽略大小写各编译一个自动机
+class KeywordTable {
+  private ids = new Map<string, number>();
+  readonly exact: KeywordEntry[] = [];
+  readonly folded: KeywordEntry[] = [];
+
+  // 不含字母的关键词小写化前后相同，归入精确匹配
+  id(keyword: string, folded: boolean = false): number {
+    folded = folded && /[a-z]/.test(keyword);
+    const key = `${folded ? 'f' : 'e'}:${keyword}`;
+    let id = this.ids.get(key);
+    if (id === undefined) {
+      id = this.ids.size;
+      this.ids.set(key, id);
+      (folded ? this.folded : this.exact).push({ keyword, id });
+    }
+    return id;
+  }
+
+  get size(): number {
+    return this.ids.size;
+  }
+}
+
+export class StoryRuleMatcher {
+  private exactAutomaton: KeywordAutomaton;
+  private foldedAutomaton: KeywordAutomaton;
+  private keywordCount: number;
+
+  private roleTriggers: number[];
+  private roleKeywords: Array<{ role: string; ids: number[] }>;
+  private actionTriggers: number[][];
+  private valueTriggers: number[];
+  private templateTriggers: number[][];
+  private templatePartial: number[];
+  private templateWeak: number[];
+  private highPriority: number[];
+  private lowPriority: number[];
+  private ambiguous: number[];
+
+  constructor() {
+    const table = new KeywordTable();
+    const exact = (keywords: string[]) => keywords.map(keyword => table.id(keyword));
+    const folded = (keywords: string[]) => keywords.map(keyword => table.id(keyword.toLowerCase(), true));
+
+    this.roleTriggers = exact(ROLE_PATTERNS.map(rule => rule.trigger));
+    this.roleKeywords = ROLE_KEYWORDS.map(([role, keywords]) => ({ role, ids: exact(keywords) }));
+    this.actionTriggers = ACTION_PATTERNS.map(rule => exact(rule.triggers));
+    this.valueTriggers = [...exact(VALUE_TRIGGERS), ...folded([VALUE_FOLDED_TRIGGER])];
+    this.templateTriggers = TEMPLATE_PATTERNS.map(rule => rule.folded ? folded(rule.triggers) : exact(rule.triggers));
+    this.templatePartial = exact(TEMPLATE_PARTIAL);
+    this.templateWeak = exact(TEMPLATE_WEAK);
+    this.highPriority = folded(HIGH_PRIORITY_KEYWORDS.filter(isLowerCase));
+    this.lowPriority = folded(LOW_PRIORITY_KEYWORDS.filter(isLowerCase));
+    this.ambiguous = exact(AMBIGUOUS_WORDS);
+
+    this.exactAutomaton = new KeywordAutomaton(table.exact);
+    this.foldedAutomaton = new KeywordAutomaton(table.folded, true);
+    this.keywordCount = table.size;
+  }
+
+  analyze(text: string): StorySignals {
+    const hits = this.scan(text);
+    const any = (ids: number[]) => ids.some(id => hits[id] === 1);
+    const all = (ids: number[]) => ids.every(id => hits[id] === 1);
+
+    const { role, confidence: roleConfidence } = this.matchRole(text, hits);
+    const { action, confidence: actionConfidence } = this.matchAction(text, hits);
+
+    let value: string | null = null;
+    if (any(this.valueTriggers)) {
+      const captured = text.match(VALUE_PATTERN)?.[1]?.trim();
+      if (captured && captured.length >= 3) value = captured;
+    }
+
+    let templateMatch = 0.2;
+    if (TEMPLATE_PATTERNS.some((rule, index) => all(this.templateTriggers[index]) && rule.pattern.test(text))) {
+      templateMatch = 0.9;
+    } else if (any(this.templatePartial)) {
+      templateMatch = 0.6;
+    } else if (any(this.templateWeak)) {
+      templateMatch = 0.4;
+    }
+
+    let priority = Priority.P1;
+    if (any(this.highPriority)) priority = Priority.P0;
+    else if (any(this.lowPriority)) priority = Priority.P2;
+
+    const penalty = this.ambiguous.reduce((sum, id) => sum + (hits[id] ? 0.1 : 0), 0);
+
+    return {
+      role,
+      roleConfidence,
+      action,
+      actionConfidence,
+      value,
+      valueConfidence: value ? 0.9 : 0.3,
+      templateMatch,
+      sourceLength: sourceLengthScore(text.length),
+      languageClarity: Math.max(0.9 - penalty, 0.3),
+      priority,
+    };
+  }
+
+  // 单次扫描，两个自动机同步推进
+  private scan(text: string): Uint8Array {
+    const hits = new Uint8Array(this.keywordCount);
+    let exactState = 0;
+    let foldedState = 0;
+
+    for (let i = 0; i < text.length; i++) {
+      const code = text.charCodeAt(i);
+      exactState = this.exactAutomaton.next(exactState, code, hits);
+      foldedState = this.foldedAutomaton.next(foldedState, code, hits);
+    }
+
+    return hits;
+  }
+
+  private matchRole(text: string, hits: Uint8Array): { role: string; confidence: number } {
+    for (let i = 0; i < ROLE_PATTERNS.length; i++) {
+      if (!hits[this.roleTriggers[i]]) continue;
+      const extractedRole = text.match(ROLE_PATTERNS[i].pattern)?.[1]?.trim();
+      if (extractedRole && extractedRole.length >= 2) {
+        return { role: extractedRole, confidence: 0.9 };
+      }
+    }
+
+    for (const { role, ids } of this.roleKeywords) {
+      if (ids.some(id => hits[id] === 1)) {
+        return { role, confidence: 0.8 };
+      }
+    }
+
+    return { role: '用户', confidence: 0.5 };
+  }
+
+  private matchAction(text: string, hits: Uint8Array): { action: string | null; confidence: number } {
+    for (let i = 0; i < ACTION_PATTERNS.length; i++) {
+      if (!this.actionTriggers[i].some(id => hits[id] === 1)) continue;
+      const action = text.match(ACTION_PATTERNS[i].pattern)?.[1]?.trim();
+      if (action && action.length >= 5) {
+        return { action, confidence: 0.85 };
+      }
+    }
+
+    return { action: null, confidence: 0 };
+  }
+}
+
+// 含大写字母的关键词在小写化文本中永远不会出现（原实现中的 P0 / P2），编译时直接排除
+function isLowerCase(keyword: string): boolean {
+  return keyword === keyword.toLowerCase();
+}
+
+export function sourceLengthScore(length: number): number {
+  if (length >= 20 && length <= 200) return 0.9;
+  if (length >= 10 && length < 20) return 0.7;
+  if (length > 200 && length <= 500) return 0.6;
+  if (length < 10) return 0.3;
+  return 0.4;
+}
+
+export const storyRuleMatcher = new StoryRuleMatcher();
@@ -0,0 +1,307 @@
+import { LLMModel, LLMServiceType, getServiceType } from './LLMService';
+
+// Token 计数：按服务提供方选择分词器，用于请求前的上下文预算，以及提供方未报告用量时的成本估算
+// 文本先按各家分词器的预分词规则切成片段，再逐片段计数；片段高度重复，计数结果按片段缓存
+// 默认分词器按各家公开的字符/token 换算比例估算片段 token 数；通过 loadBPETokenizer 载入
+// tiktoken 格式的词表后，改为按字节级 BPE 精确编码
+
+export interface Tokenizer {
+  readonly name: string;
+  count(text: string): number;
+  // 批量计数，相同文本只计算一次
+  countBatch(texts: string[]): number[];
+  // 截断为不超过 maxTokens 的前缀，在片段边界处截断
+  truncate(text: string, maxTokens: number): string;
+}
+
+// GPT-4o（o200k_base）的预分词规则；JS 不支持 (?i:...)，缩写后缀展开为大小写字符类
+export const O200K_PATTERN = /[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?:'[sStTmMdD]|'[rR][eE]|'[vV][eE]|'[lL][lL])?|[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?:'[sStTmMdD]|'[rR][eE]|'[vV][eE]|'[lL][lL])?|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n/]*|\s*[\r\n]+|\s+(?!\S)|\s+/gu;
+
+// cl100k_base 的预分词规则，多数开源 BPE 词表沿用
+export const CL100K_PATTERN = /'[sStTmMdD]|'[rR][eE]|'[vV][eE]|'[lL][lL]|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+/gu;
+
+// 片段缓存上限，超过后整体清空
+const PIECE_CACHE_LIMIT = 100000;
+// 整段文本计数缓存（LRU），覆盖反复计数的提示模板与上下文
+const TEXT_CACHE_LIMIT = 512;
+
+abstract class PretokenizedTokenizer implements Tokenizer {
+  private pieceCache = new Map<string, number>();
+  private textCache = new Map<string, number>();
+
+  constructor(readonly name: string, protected pattern: RegExp) {}
+
+  protected abstract countPiece(piece: string): number;
+
+  count(text: string): number {
+    if (!text) return 0;
+
+    const cached = this.textCache.get(text);
+    if (cached !== undefined) {
+      this.textCache.delete(text);
+      this.textCache.set(text, cached);
+      return cached;
+    }
+
+    let total = 0;
+    for (const match of text.matchAll(this.pattern)) {
+      total += this.countCached(match[0]);
+    }
+
+    if (this.textCache.size >= TEXT_CACHE_LIMIT) {
+      this.textCache.delete(this.textCache.keys().next().value!);
+    }
+    this.textCache.set(text, total);
+    return total;
+  }
+
+  countBatch(texts: string[]): number[] {
+    const counts = new Map<string, number>();
+    return texts.map(text => {
+      let count = counts.get(text);
+      if (count === undefined) {
+        count = this.count(text);
+        counts.set(text, count);
+      }
+      return count;
+    });
+  }
+
+  truncate(text: string, maxTokens: number): string {
+    if (maxTokens <= 0) return '';
+    if (this.count(text) <= maxTokens) return text;
+
+    let total = 0;
+    for (const match of text.matchAll(this.pattern)) {
+      const count = this.countCached(match[0]);
+      if (total + count > maxTokens) {
+        return text.slice(0, match.index) + this.truncatePiece(match[0], maxTokens - total);
+      }
+      total += count;
+    }
+    return text;
+  }
+
+  // 超出预算的片段（如不含标点的长段中文）按字符二分截取
+  private truncatePiece(piece: string, maxTokens: number): string {
+    let low = 0;
+    let high = piece.length;
+    while (low < high) {
+      const middle = Math.ceil((low + high) / 2);
+      if (this.countPiece(piece.slice(0, middle)) <= maxTokens) low = middle;
+      else high = middle - 1;
+    }
+
+    // 不拆开代理对
+    const code = piece.charCodeAt(low - 1);
+    if (low > 0 && code >= 0xd800 && code <= 0xdbff) low--;
+    return piece.slice(0, low);
+  }
+
+  private countCached(piece: string): number {
+    let count = this.pieceCache.get(piece);
+    if (count === undefined) {
+      count = this.countPiece(piece);
+      if (this.pieceCache.size >= PIECE_CACHE_LIMIT) this.pieceCache.clear();
+      this.pieceCache.set(piece, count);
+    }
+    return count;
+  }
+}
+
+// 字节级 BPE：片段按 UTF-8 字节展开，反复合并词表中排名最小的相邻字节串
+// 词表以 latin1 字符串（每个字符对应一个字节）为键
+export class BPETokenizer extends PretokenizedTokenizer {
+  private encoder = new TextEncoder();
+
+  constructor(name: string, private ranks: Map<string, number>, pattern: RegExp = O200K_PATTERN) {
+    super(name, pattern);
+  }
+
+  encode(text: string): number[] {
+    const tokens: number[] = [];
+    for (const match of text.matchAll(this.pattern)) {
+      tokens.push(...this.encodePiece(match[0]));
+    }
+    return tokens;
+  }
+
+  protected countPiece(piece: string): number {
+    return this.merge(this.toBytes(piece)).length - 1;
+  }
+
+  private encodePiece(piece: string): number[] {
+    const bytes = this.toBytes(piece);
+    const parts = this.merge(bytes);
+    const tokens: number[] = [];
+    for (let i = 0; i < parts.length - 1; i++) {
+      tokens.push(this.ranks.get(bytes.slice(parts[i], parts[i + 1])) ?? -1);
+    }
+    return tokens;
+  }
+
+  private toBytes(piece: string): string {
+    const bytes = this.encoder.encode(piece);
+    let result = '';
+    for (let i = 0; i < bytes.length; i++) result += String.fromCharCode(bytes[i]);
+    return result;
+  }
+
+  // 返回合并后各 token 的起始字节位置（末尾附加总长度）
+  private merge(bytes: string): number[] {
+    if (this.ranks.has(bytes)) return [0, bytes.length];
+
+    const parts = Array.from({ length: bytes.length + 1 }, (_, i) => i);
+    while (parts.length > 2) {
+      let minRank = Infinity;
+      let minIndex = -1;
+      for (let i = 0; i < parts.length - 2; i++) {
+        const rank = this.ranks.get(bytes.slice(parts[i], parts[i + 2]));
+        if (rank !== undefined && rank < minRank) {
+          minRank = rank;
+          minIndex = i;
+        }
+      }
+      if (minIndex < 0) break;
+      parts.splice(minIndex + 1, 1);
+    }
+    return parts;
+  }
+}
+
+// 解析 tiktoken 词表文件：每行为 base64 编码的字节串与排名
+export function parseTiktokenRanks(content: string): Map<string, number> {
+  const ranks = new Map<string, number>();
+  for (const line of content.split('\n')) {
+    const [token, rank] = line.trim().split(' ');
+    if (token && rank) ranks.set(atob(token), Number(rank));
+  }
+  return ranks;
+}
+
+// 估算参数：中日韩字符每字 token 数、拉丁字母与数字每 token 字符数
+interface EstimateProfile {
+  cjkTokensPerChar: number;
+  latinCharsPerToken: number;
+}
+
+const isCJK = (code: number) =>
+  (code >= 0x3040 && code <= 0x30ff) ||  // 日文假名
+  (code >= 0x3400 && code <= 0x4dbf) ||
+  (code >= 0x4e00 && code <= 0x9fff) ||
+  (code >= 0xac00 && code <= 0xd7af) ||  // 韩文音节
+  (code >= 0xf900 && code <= 0xfaff);
+
+const isSpace = (code: number) => code === 0x20 || code === 0x09 || code === 0x0a || code === 0x0d || code === 0x3000;
+
+const isWordChar = (code: number) =>
+  (code >= 0x30 && code <= 0x39) ||
+  (code >= 0x41 && code <= 0x5a) ||
+  (code >= 0x61 && code <= 0x7a) ||
+  (code >= 0xc0 && code <= 0x24f);  // 带变音符的拉丁字母
+
+// 按预分词片段估算：片段前导空格并入单词不单独计数，纯空白片段计 1，
+// ASCII 标点每 2 个计 1，全角标点与其他符号每个计 1
+export class EstimatingTokenizer extends PretokenizedTokenizer {
+  constructor(name: string, private profile: EstimateProfile, pattern: RegExp = O200K_PATTERN) {
+    super(name, pattern);
+  }
+
+  protected countPiece(piece: string): number {
+    let cjk = 0;
+    let word = 0;
+    let asciiSymbols = 0;
+    let otherSymbols = 0;
+
+    for (let i = 0; i < piece.length; i++) {
+      const code = piece.charCodeAt(i);
+      if (isCJK(code)) cjk++;
+      else if (isWordChar(code)) word++;
+      else if (isSpace(code)) continue;
+      else if (code < 0x80) asciiSymbols++;
+      else if (code < 0xdc00 || code > 0xdfff) otherSymbols++;  // 代理对只计一次
+    }
+
+    const tokens = Math.ceil(cjk * this.profile.cjkTokensPerChar)
+      + Math.ceil(word / this.profile.latinCharsPerToken)
+      + Math.ceil(asciiSymbols / 2)
+      + otherSymbols;
+    return Math.max(tokens, 1);
+  }
+}
+
+// 各家分词器：OpenAI 为 o200k_base；Claude 词表对中文切分较细；Gemini 与国内模型的词表
+// 针对中文扩充，按官方文档的换算（约 1.5~1.7 个汉字一个 token）估算
+const DEFAULT_TOKENIZERS: Record<LLMServiceType, () => Tokenizer> = {
+  [LLMServiceType.OpenAI]: () => new EstimatingTokenizer('o200k-estimate', { cjkTokensPerChar: 0.7, latinCharsPerToken: 5 }),
+  [LLMServiceType.Claude]: () => new EstimatingTokenizer('claude-estimate', { cjkTokensPerChar: 1.1, latinCharsPerToken: 4 }, CL100K_PATTERN),
+  [LLMServiceType.Google]: () => new EstimatingTokenizer('gemini-estimate', { cjkTokensPerChar: 0.65, latinCharsPerToken: 4.5 }),
+  [LLMServiceType.Minimax]: () => new EstimatingTokenizer('minimax-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 4 }, CL100K_PATTERN),
+  [LLMServiceType.Kimi]: () => new EstimatingTokenizer('kimi-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 4 }, CL100K_PATTERN),
+  [LLMServiceType.GLM]: () => new EstimatingTokenizer('glm-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 4 }, CL100K_PATTERN),
+  [LLMServiceType.Volcano]: () => new EstimatingTokenizer('volcano-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 4 }, CL100K_PATTERN),
+  [LLMServiceType.DeepSeek]: () => new EstimatingTokenizer('deepseek-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 3.3 }, CL100K_PATTERN),
+  [LLMServiceType.Doubao]: () => new EstimatingTokenizer('doubao-estimate', { cjkTokensPerChar: 0.6, latinCharsPerToken: 4 }, CL100K_PATTERN),
+};
+
+const tokenizers = new Map<LLMServiceType, Tokenizer>();
+
+export function getTokenizer(model: LLMModel): Tokenizer {
+  const type = getServiceType(model);
+  let tokenizer = tokenizers.get(type);
+  if (!tokenizer) {
+    tokenizer = DEFAULT_TOKENIZERS[type]();
+    tokenizers.set(type, tokenizer);
+  }
+  return tokenizer;
+}
+
+// 多个模型共用的预算分词器：计数取各分词器的最大值，截断结果对每个分词器都不超过上限，
+// 用于请求可能被路由到其中任一模型时的上下文预算
+class BudgetTokenizer implements Tokenizer {
+  readonly name: string;
+
+  constructor(private tokenizers: Tokenizer[]) {
+    this.name = tokenizers.map(tokenizer => tokenizer.name).join('+');
+  }
+
+  count(text: string): number {
+    return Math.max(...this.tokenizers.map(tokenizer => tokenizer.count(text)));
+  }
+
+  countBatch(texts: string[]): number[] {
+    const counts = this.tokenizers.map(tokenizer => tokenizer.countBatch(texts));
+    return texts.map((_, index) => Math.max(...counts.map(batch => batch[index])));
+  }
+
+  // 各分词器的截断结果都是原文前缀，依次截断即得到同时满足所有分词器的前缀
+  truncate(text: string, maxTokens: number): string {
+    return this.tokenizers.reduce((result, tokenizer) => tokenizer.truncate(result, maxTokens), text);
+  }
+}
+
+export function getBudgetTokenizer(models: LLMModel[]): Tokenizer {
+  const distinct = Array.from(new Set(models.map(getTokenizer)));
+  return distinct.length === 1 ? distinct[0] : new BudgetTokenizer(distinct);
+}
+
+// 替换某个服务提供方的分词器（如接入官方分词库）
+export function registerTokenizer(type: LLMServiceType, tokenizer: Tokenizer) {
+  tokenizers.set(type, tokenizer);
+}
+
+// 下载 tiktoken 格式词表并注册为该服务提供方的精确分词器
+export async function loadBPETokenizer(
+  type: LLMServiceType,
+  url: string,
+  pattern: RegExp = O200K_PATTERN
+): Promise<Tokenizer> {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`Tokenizer download failed: ${response.status}`);
+  }
+
+  const tokenizer = new BPETokenizer(`${type}-bpe`, parseTiktokenRanks(await response.text()), pattern);
+  registerTokenizer(type, tokenizer);
+  return tokenizer;
+}
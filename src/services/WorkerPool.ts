@@ -0,0 +1,162 @@
+// Web Worker 池：固定数量的 Worker 各自一次执行一个任务，其余任务排队
+// 任务执行中可逐条回传消息（进度、分批结果），结束时回传 done 或 error；
+// 取消执行中的任务时直接终止对应 Worker（扫描循环无需轮询取消标记），下一个任务到来时再补建
+
+export type WorkerReply<M> =
+  | { jobId: number; type: 'message'; message: M }
+  | { jobId: number; type: 'done'; result: unknown }
+  | { jobId: number; type: 'error'; error: string };
+
+export interface WorkerJobOptions<M> {
+  // 随任务转移所有权的对象（如文件的 ArrayBuffer），避免复制
+  transfer?: Transferable[];
+  onMessage?: (message: M) => void;
+  signal?: AbortSignal;
+}
+
+interface Job<Req, M> {
+  id: number;
+  request: Req;
+  options: WorkerJobOptions<M>;
+  resolve: (result: any) => void;
+  reject: (error: unknown) => void;
+  cleanup: () => void;
+}
+
+interface Slot<Req, M> {
+  worker: Worker | null;
+  job: Job<Req, M> | null;
+}
+
+export const abortError = () => new DOMException('任务已取消', 'AbortError');
+
+export class WorkerPool<Req, M> {
+  private slots: Slot<Req, M>[];
+  private queue: Job<Req, M>[] = [];
+  private nextJobId = 1;
+
+  constructor(private createWorker: () => Worker, size: number) {
+    this.slots = Array.from({ length: Math.max(size, 1) }, () => ({ worker: null, job: null }));
+  }
+
+  run<R>(request: Req, options: WorkerJobOptions<M> = {}): Promise<R> {
+    return new Promise<R>((resolve, reject) => {
+      const { signal } = options;
+      if (signal?.aborted) {
+        reject(abortError());
+        return;
+      }
+
+      const job: Job<Req, M> = { id: this.nextJobId++, request, options, resolve, reject, cleanup: () => {} };
+      if (signal) {
+        const onAbort = () => this.cancel(job);
+        signal.addEventListener('abort', onAbort, { once: true });
+        job.cleanup = () => signal.removeEventListener('abort', onAbort);
+      }
+
+      this.queue.push(job);
+      this.pump();
+    });
+  }
+
+  // 终止全部 Worker，排队与执行中的任务均以取消结束
+  terminate() {
+    for (const job of this.queue.splice(0)) this.settle(job, abortError());
+    for (const slot of this.slots) {
+      if (slot.job) this.settle(slot.job, abortError());
+      slot.worker?.terminate();
+      slot.worker = null;
+      slot.job = null;
+    }
+  }
+
+  private pump() {
+    for (const slot of this.slots) {
+      if (this.queue.length === 0) return;
+      if (slot.job) continue;
+
+      const job = this.queue.shift()!;
+      slot.job = job;
+      if (!slot.worker) slot.worker = this.spawn(slot);
+      slot.worker.postMessage({ jobId: job.id, request: job.request }, job.options.transfer ?? []);
+    }
+  }
+
+  private spawn(slot: Slot<Req, M>): Worker {
+    const worker = this.createWorker();
+
+    worker.onmessage = (event: MessageEvent<WorkerReply<M>>) => {
+      const reply = event.data;
+      const job = slot.job;
+      if (!job || reply.jobId !== job.id) return;
+
+      if (reply.type === 'message') {
+        job.options.onMessage?.(reply.message);
+        return;
+      }
+
+      slot.job = null;
+      if (reply.type === 'done') this.settle(job, null, reply.result);
+      else this.settle(job, new Error(reply.error));
+      this.pump();
+    };
+
+    // Worker 自身崩溃（脚本加载失败等）：当前任务失败，丢弃该 Worker
+    worker.onerror = (event: ErrorEvent) => {
+      event.preventDefault();
+      const job = slot.job;
+      worker.terminate();
+      slot.worker = null;
+      slot.job = null;
+      if (job) this.settle(job, new Error(event.message || 'Worker 执行失败'));
+      this.pump();
+    };
+
+    return worker;
+  }
+
+  private cancel(job: Job<Req, M>) {
+    const queued = this.queue.indexOf(job);
+    if (queued >= 0) {
+      this.queue.splice(queued, 1);
+      this.settle(job, abortError());
+      return;
+    }
+
+    const slot = this.slots.find(slot => slot.job === job);
+    if (!slot) return;
+    slot.worker?.terminate();
+    slot.worker = null;
+    slot.job = null;
+    this.settle(job, abortError());
+    this.pump();
+  }
+
+  private settle(job: Job<Req, M>, error: unknown, result?: unknown) {
+    job.cleanup();
+    if (error) job.reject(error);
+    else job.resolve(result);
+  }
+}
+
+// Worker 端：接收任务并执行 handler，handler 通过 post 回传中间消息，返回值作为任务结果
+export function serveWorkerJobs<Req, M>(
+  handler: (request: Req, post: (message: M, transfer?: Transferable[]) => void) => unknown
+) {
+  const scope = self as unknown as {
+    onmessage: ((event: MessageEvent<{ jobId: number; request: Req }>) => void) | null;
+    postMessage: (message: WorkerReply<M>, transfer?: Transferable[]) => void;
+  };
+
+  scope.onmessage = async (event) => {
+    const { jobId, request } = event.data;
+    try {
+      const result = await handler(request, (message, transfer = []) =>
+        scope.postMessage({ jobId, type: 'message', message }, transfer)
+      );
+      scope.postMessage({ jobId, type: 'done', result });
+    } catch (error) {
+      scope.postMessage({ jobId, type: 'error', error: error instanceof Error ? error.message : String(error) });
+    }
+  };
+}
@@ -109,6 +109,8 @@ export interface DocumentSection {
   startPosition?: number;
   endPosition?: number;
   charCount: number;
+  // 章节内容指纹（类型 + 标题 + 正文），用于修订版文档的增量处理
+  fingerprint?: string;
   parentId?: string;
   childrenIds?: string[];
 }
@@ -156,6 +158,11 @@ export interface ParsedDocument {
   sectionCount?: number;
   stories?: Story[];
   storyCount?: number;
+  // 基于上一版本增量处理时：上一版本ID，以及沿用故事、未重新生成的章节数
+  previousVersionId?: string;
+  reusedSectionCount?: number;
+  // 去重时过滤掉的近似重复故事数
+  duplicateCount?: number;
   averageConfidence?: number;
   errorMessage?: string;
   errorCode?: ErrorCode;
@@ -0,0 +1,11 @@
+-- 故事与文档列表的游标分页索引
+-- 列表按 (created_at DESC, id DESC) 排序并按用户过滤，复合索引可让每页查询只扫描 limit + 1 行
+
+CREATE INDEX IF NOT EXISTS idx_stories_user_created_id
+    ON stories(user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_documents_user_created_id
+    ON documents(user_id, created_at DESC, id DESC);
+
+-- 刷新 PostgREST schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,17 @@
+-- 上传内容去重
+-- 上传时计算文件内容的 SHA-256；同一用户重复上传相同内容时复用已有的存储对象与解析结果
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS source_document_id UUID REFERENCES documents(id) ON DELETE SET NULL;
+
+-- 按用户 + 内容哈希查找重复文档
+CREATE INDEX IF NOT EXISTS idx_documents_user_content_hash
+    ON documents(user_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+
+-- 删除文档时统计共享同一存储对象的引用数
+CREATE INDEX IF NOT EXISTS idx_documents_storage_path
+    ON documents(storage_path);
+
+-- 刷新 PostgREST schema cache
+NOTIFY pgrst, 'reload schema';
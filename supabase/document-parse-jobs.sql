@@ -0,0 +1,13 @@
+-- 文档解析任务状态
+-- 解析由任务队列异步执行：uploaded → parsing → parsed / failed，记录重试次数与最后一次失败原因
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS parse_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS parse_error TEXT;
+
+-- 查找未完成的解析任务：定时任务按 updated_at 补投超时未更新的文档（如 isolate 重启后）
+CREATE INDEX IF NOT EXISTS idx_documents_pending_parse
+    ON documents(status, updated_at)
+    WHERE status IN ('uploaded', 'parsing');
+
+-- 刷新 PostgREST schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,10 @@
+-- 文档对象存储
+-- 上传的原始文件流式写入 documents 桶，解析任务从桶中流式读回；单文件上限 50MB
+
+INSERT INTO storage.buckets (id, name, public, file_size_limit)
+VALUES ('documents', 'documents', false, 52428800)
+ON CONFLICT (id) DO NOTHING;
+
+-- 桶不对 anon / authenticated 角色开放：anon key 随前端分发，任何人都能用它读写对象。
+-- 后端以 service role key（SUPABASE_SERVICE_KEY，绕过 RLS）访问存储，鉴权由 Worker 完成，路径按 documents/<user_id>/ 隔离
+DROP POLICY IF EXISTS "backend access documents bucket" ON storage.objects;
@@ -0,0 +1,28 @@
+-- 故事批量更新
+-- 一条 UPDATE ... FROM 语句只更新当前用户已存在的行：不会重新插入已删除的故事，
+-- 也只写入条目中出现的列，不覆盖其他请求对未修改字段的并发编辑
+
+CREATE OR REPLACE FUNCTION public.update_stories(
+    p_user_id UUID,
+    p_items JSONB
+)
+RETURNS SETOF stories AS $$
+    UPDATE stories AS s
+    SET
+        document_id = CASE WHEN i.item ? 'document_id' THEN (i.item->>'document_id')::UUID ELSE s.document_id END,
+        title = CASE WHEN i.item ? 'title' THEN i.item->>'title' ELSE s.title END,
+        description = CASE WHEN i.item ? 'description' THEN i.item->>'description' ELSE s.description END,
+        action = CASE WHEN i.item ? 'action' THEN i.item->>'action' ELSE s.action END,
+        value = CASE WHEN i.item ? 'value' THEN i.item->>'value' ELSE s.value END,
+        module = CASE WHEN i.item ? 'module' THEN i.item->>'module' ELSE s.module END,
+        priority = CASE WHEN i.item ? 'priority' THEN i.item->>'priority' ELSE s.priority END,
+        status = CASE WHEN i.item ? 'status' THEN i.item->>'status' ELSE s.status END,
+        updated_at = now()
+    FROM jsonb_array_elements(p_items) AS i(item)
+    WHERE s.id = (i.item->>'id')::UUID
+      AND s.user_id = p_user_id
+    RETURNING s.*;
+$$ LANGUAGE sql;
+
+-- 刷新 PostgREST schema cache
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,102 @@
+-- 故事全文检索
+-- 以 pg_trgm 三元组索引替代逐行 ILIKE 扫描：三元组按字符切分，同时适用于中文（无词边界）与英文；
+-- 另建 simple 配置的 tsvector 索引用于英文词项匹配，检索结果按相关度打分排序
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 检索文本：标题 + 描述 + 功能 + 价值
+CREATE OR REPLACE FUNCTION public.story_search_document(
+    p_title TEXT,
+    p_description TEXT,
+    p_action TEXT,
+    p_value TEXT
+)
+RETURNS TEXT AS $$
+    SELECT lower(
+        coalesce(p_title, '') || ' ' ||
+        coalesce(p_description, '') || ' ' ||
+        coalesce(p_action, '') || ' ' ||
+        coalesce(p_value, '')
+    );
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_stories_search_trgm
+    ON stories USING gin (public.story_search_document(title, description, action, value) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_stories_title_trgm
+    ON stories USING gin (lower(title) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_stories_search_tsv
+    ON stories USING gin (to_tsvector('simple', public.story_search_document(title, description, action, value)));
+
+-- 排序检索 RPC
+-- 命中条件：子串匹配（走三元组索引）、词相似度匹配（容错）或英文词项匹配
+-- 打分：标题子串命中 > 标题相似度 > 全文相似度 > 词项排名
+CREATE OR REPLACE FUNCTION public.search_stories(
+    p_user_id UUID,
+    p_query TEXT,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    document_id UUID,
+    title TEXT,
+    description TEXT,
+    action TEXT,
+    value TEXT,
+    module TEXT,
+    priority TEXT,
+    status TEXT,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    score REAL,
+    total_count BIGINT
+) AS $$
+    WITH q AS (
+        SELECT
+            lower(trim(p_query)) AS term,
+            '%' || replace(replace(replace(lower(trim(p_query)), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern,
+            plainto_tsquery('simple', p_query) AS tsq
+    ),
+    matches AS (
+        SELECT
+            s.*,
+            public.story_search_document(s.title, s.description, s.action, s.value) AS doc
+        FROM stories s, q
+        WHERE s.user_id = p_user_id
+          AND (
+              public.story_search_document(s.title, s.description, s.action, s.value) LIKE q.pattern
+              OR q.term <% public.story_search_document(s.title, s.description, s.action, s.value)
+              OR to_tsvector('simple', public.story_search_document(s.title, s.description, s.action, s.value)) @@ q.tsq
+          )
+    )
+    SELECT
+        m.id,
+        m.user_id,
+        m.document_id,
+        m.title,
+        m.description,
+        m.action,
+        m.value,
+        m.module,
+        m.priority,
+        m.status,
+        m.created_at,
+        m.updated_at,
+        (
+            CASE WHEN lower(m.title) LIKE q.pattern THEN 1.0 ELSE 0 END
+            + 2 * word_similarity(q.term, lower(coalesce(m.title, '')))
+            + word_similarity(q.term, m.doc)
+            + ts_rank(to_tsvector('simple', m.doc), q.tsq)
+        )::REAL AS score,
+        count(*) OVER () AS total_count
+    FROM matches m, q
+    ORDER BY score DESC, m.created_at DESC, m.id DESC
+    LIMIT least(greatest(p_limit, 1), 100)
+    OFFSET greatest(p_offset, 0);
+$$ LANGUAGE sql STABLE;
+
+-- 刷新 PostgREST schema cache
+NOTIFY pgrst, 'reload schema';